@@ -3,6 +3,7 @@ import sys
 import argparse
 
 from chewie.chewie import Chewie
+from chewie.sharded_chewie import ShardedChewie
 
 
 def get_logger(name, log_level=logging.DEBUG):
@@ -57,6 +58,36 @@ def logoff_handler(address, group_address):
     )
 
 
+def radius_server(value):
+    """Parse a --radius_server argument: ip[:port[:secret[:weight]]].
+    An IPv6 ip is written in brackets, [ip]. The weight is the last field after the
+    secret, so a secret containing ':' must be followed by one, e.g. 'se:cret:1' or
+    'se:cret:' for the default weight."""
+    usage = "expected ip[:port[:secret[:weight]]] or [ipv6][:port...], got %s" % value
+    if value.startswith("["):
+        ip, bracket, rest = value[1:].partition("]")
+        if not bracket or (rest and not rest.startswith(":")):
+            raise argparse.ArgumentTypeError(usage)
+        rest = rest[1:]
+    else:
+        ip, _, rest = value.partition(":")
+    server = {"ip": ip}
+    port, _, secret = rest.partition(":")
+    weight = None
+    if ":" in secret:
+        secret, weight = secret.rsplit(":", 1)
+    try:
+        if port:
+            server["port"] = int(port)
+        if weight:
+            server["weight"] = int(weight)
+    except ValueError as exception:
+        raise argparse.ArgumentTypeError(usage) from exception
+    if secret:
+        server["secret"] = secret
+    return server
+
+
 def main():
     """Chewie main function, configure and start a chewie process"""
 
@@ -84,23 +115,151 @@ def main():
         "-rs",
         "--radius_secret",
         dest="radius_secret",
-        help="Set the Secret used for connecting to the RADIUS Server - Default: SECRET",
-        default="SECRET",
+        help="Set the Secret used for connecting to the RADIUS Server - Default: SECRET, "
+        "radsec with --radsec",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        dest="workers",
+        type=int,
+        help="Set the number of worker processes to shard ports over - Default: 1",
+        default=1,
+    )
+    parser.add_argument(
+        "-rn",
+        "--radius_sockets",
+        dest="radius_sockets",
+        type=int,
+        help="Set the number of RADIUS source sockets, each allows 256 outstanding "
+        "requests - Default: 1",
+        default=1,
+    )
+    parser.add_argument(
+        "-rv",
+        "--radius_server",
+        dest="radius_servers",
+        type=radius_server,
+        action="append",
+        help="Add a RADIUS Server to balance requests across, as "
+        "ip[:port[:secret[:weight]]] ([ip] for IPv6), may be repeated - "
+        "Default: --radius_ip",
+    )
+    parser.add_argument(
+        "--radsec",
+        dest="radsec",
+        action="store_true",
+        help="Send RADIUS over TLS (RadSec, RFC 6614) rather than UDP, to port 2083",
+    )
+    parser.add_argument(
+        "--radsec_ca",
+        dest="radsec_ca",
+        help="Set the CA certificates file RadSec servers are verified against "
+        "- Default: the system's",
+    )
+    parser.add_argument(
+        "--radsec_cert",
+        dest="radsec_cert",
+        help="Set the certificate (and key) file Chewie authenticates RadSec with",
+    )
+    parser.add_argument(
+        "--radsec_key",
+        dest="radsec_key",
+        help="Set the private key file for --radsec_cert - Default: in --radsec_cert",
+    )
+    parser.add_argument(
+        "--mab_cache_ttl",
+        dest="mab_cache_ttl",
+        type=float,
+        help="Reuse a MAB Access-Accept for a MAC seen again on its port for this many "
+        "seconds, at most its Session-Timeout - Default: ask the RADIUS Server every time",
+    )
+    parser.add_argument(
+        "--mab_cache_size",
+        dest="mab_cache_size",
+        type=int,
+        help="Set the most MACs the MAB cache keeps - Default: 10000",
+    )
+    parser.add_argument(
+        "--mab_reject_backoff",
+        dest="mab_reject_backoff",
+        type=float,
+        help="Send no MAB request for a MAC for this many seconds after it is rejected, "
+        "doubling with each reject in a row - Default: ask the RADIUS Server every time",
+    )
+    parser.add_argument(
+        "--mab_reject_max_backoff",
+        dest="mab_reject_max_backoff",
+        type=float,
+        help="Set the most seconds a rejected MAC is held down for - Default: 300",
+    )
+    parser.add_argument(
+        "--mab_mac_rate",
+        dest="mab_mac_rate",
+        type=float,
+        help="Set the DHCP frames a second each MAC may send to MAB - Default: no limit",
+    )
+    parser.add_argument(
+        "--mab_port_rate",
+        dest="mab_port_rate",
+        type=float,
+        help="Set the DHCP frames a second each port may send to MAB - Default: no limit",
     )
     args = parser.parse_args()
 
+    radsec = None
+    radius_secret = args.radius_secret
+    if args.radsec:
+        radsec = {
+            "ca_certs": args.radsec_ca,
+            "certfile": args.radsec_cert,
+            "keyfile": args.radsec_key,
+        }
+    elif radius_secret is None:
+        radius_secret = "SECRET"
+
     logger = get_logger("CHEWIE")
     logger.info("Starting Chewie...")
 
-    chewie = Chewie(
-        args.interface,
-        logger,
-        auth_handler,
-        failure_handler,
-        logoff_handler,
-        radius_server_ip=args.radius_ip,
-        radius_server_secret=args.radius_secret,
-    )
+    if args.workers > 1:
+        chewie = ShardedChewie(
+            args.interface,
+            logger,
+            auth_handler,
+            failure_handler,
+            logoff_handler,
+            radius_server_ip=args.radius_ip,
+            radius_server_secret=radius_secret,
+            radius_sockets=args.radius_sockets,
+            radius_servers=args.radius_servers,
+            radsec=radsec,
+            mab_cache_ttl=args.mab_cache_ttl,
+            mab_cache_size=args.mab_cache_size,
+            mab_reject_backoff=args.mab_reject_backoff,
+            mab_reject_max_backoff=args.mab_reject_max_backoff,
+            mab_mac_rate=args.mab_mac_rate,
+            mab_port_rate=args.mab_port_rate,
+            workers=args.workers,
+        )
+    else:
+        chewie = Chewie(
+            args.interface,
+            logger,
+            auth_handler,
+            failure_handler,
+            logoff_handler,
+            radius_server_ip=args.radius_ip,
+            radius_server_secret=radius_secret,
+            radius_sockets=args.radius_sockets,
+            radius_servers=args.radius_servers,
+            radsec=radsec,
+            mab_cache_ttl=args.mab_cache_ttl,
+            mab_cache_size=args.mab_cache_size,
+            mab_reject_backoff=args.mab_reject_backoff,
+            mab_reject_max_backoff=args.mab_reject_max_backoff,
+            mab_mac_rate=args.mab_mac_rate,
+            mab_port_rate=args.mab_port_rate,
+        )
     chewie.run()
 
 
@@ -0,0 +1,194 @@
+"""asyncio native 802.1X speaker, for embedding in an asyncio controller"""
+import asyncio
+import socket
+
+from chewie.chewie import Chewie
+from chewie.message_parser import MessagePacker
+from chewie.nfv_sockets import EapSocket, MabSocket
+
+
+class NonBlockingSocketMixin:
+    """Opens a PromiscuousSocket with a plain (non green) non-blocking socket"""
+
+    def open(self, socket_filter):
+        """Setup non-blocking socket"""
+        self.socket = socket.socket(socket.PF_PACKET, socket.SOCK_RAW, socket_filter)
+        self.socket.setblocking(False)
+        self.socket.bind((self.interface_name, 0))
+
+    def receive_nowait(self):
+        """receive a frame without blocking
+        Returns:
+            the frame, or None if there is nothing to receive
+        """
+        try:
+            return self.socket.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return None
+
+
+class AsyncioEapSocket(NonBlockingSocketMixin, EapSocket):
+    """EapSocket for use with an asyncio loop"""
+
+
+class AsyncioMabSocket(NonBlockingSocketMixin, MabSocket):
+    """MabSocket for use with an asyncio loop"""
+
+    def receive_nowait(self):
+        """receive a DHCP request without blocking, other frames are skipped
+        Returns:
+            the frame, or None if there is no DHCP request to receive
+        """
+        while True:
+            frame = super().receive_nowait()
+            if frame is None or self.keep_frame(frame):
+                return frame
+
+
+class RadiusProtocol(asyncio.DatagramProtocol):
+    """Hands datagrams from the RADIUS server to AsyncioChewie"""
+
+    def __init__(self, chewie, socket_index=0):
+        self.chewie = chewie
+        self.socket_index = socket_index
+
+    def datagram_received(self, data, addr):
+        self.chewie.process_radius_datagram(data, self.socket_index)
+
+    def error_received(self, exc):
+        self.chewie.logger.warning("RADIUS socket error: %s", exc)
+
+
+class AsyncioChewie(Chewie):
+    """Chewie driven by an asyncio event loop instead of eventlet.
+
+    The PF_PACKET sockets are watched with loop.add_reader, RADIUS uses a
+    DatagramProtocol and the loop itself takes the place of TimerScheduler
+    (loop.call_later returns handles with the same cancel() api as TimerJob).
+    Handlers and port_up/port_down are the same as Chewie's, but must be
+    called from the loop's thread after start().
+    """
+
+    # Frames read per readable callback, so one busy socket cannot starve the loop.
+    MAX_FRAMES_PER_READ = 64
+
+    def __init__(self, interface_name, logger=None, **kwargs):
+        super().__init__(interface_name, logger, **kwargs)
+        self.eap_output_messages = asyncio.Queue()
+        self.radius_output_messages = asyncio.Queue()
+        self.timer_scheduler = None
+        self.loop = None
+        self.radius_transports = []
+        self.tasks = []
+
+    async def run(self):
+        """setup chewie and run until cancelled"""
+        await self.start()
+        try:
+            await asyncio.gather(*self.tasks)
+        finally:
+            self.shutdown()
+
+    async def start(self):
+        """setup the sockets and start reading and sending on the running loop"""
+        self.logger.info("Starting")
+        self.loop = asyncio.get_running_loop()
+        self.timer_scheduler = self.loop
+        self.setup_eap_socket()
+        self.setup_mab_socket()
+        await self.setup_radius_socket()
+        self.loop.add_reader(self.eap_socket.socket, self.receive_eap_messages)
+        self.loop.add_reader(self.mab_socket.socket, self.receive_mab_messages)
+        self.tasks = [
+            self.loop.create_task(self.send_eap_messages()),
+            self.loop.create_task(self.send_radius_messages()),
+        ]
+
+    def shutdown(self):
+        """stop reading and sending and close the sockets"""
+        for task in self.tasks:
+            task.cancel()
+        for sock in (self.eap_socket, self.mab_socket):
+            if sock and sock.socket:
+                self.loop.remove_reader(sock.socket)
+                sock.close()
+        for radius_transport in self.radius_transports:
+            radius_transport.close()
+
+    def setup_eap_socket(self):
+        """Setup EAP socket"""
+        log_prefix = "%s.EapSocket" % self.logger.name
+        self.eap_socket = AsyncioEapSocket(self.interface_name, log_prefix)
+        self.eap_socket.setup()
+
+    def setup_mab_socket(self):
+        """Setup Mab socket"""
+        log_prefix = "%s.MabSocket" % self.logger.name
+        self.mab_socket = AsyncioMabSocket(self.interface_name, log_prefix)
+        self.mab_socket.setup()
+
+    async def setup_radius_socket(self):
+        """Setup the Radius sockets, each one has its own source port"""
+        if self.radsec is not None:
+            raise ValueError("RadSec needs the eventlet Chewie")
+        self.radius_transports = []
+        for socket_index in range(self.radius_socket_count):
+            listen_port = self.radius_listen_port
+            if listen_port:
+                listen_port += socket_index
+            radius_transport, _ = await self.loop.create_datagram_endpoint(
+                lambda index=socket_index: RadiusProtocol(self, index),
+                local_addr=(self.radius_listen_ip, listen_port),
+            )
+            self.radius_transports.append(radius_transport)
+            self.logger.info(
+                "Radius Listening on %s:%d", self.radius_listen_ip, listen_port
+            )
+
+    async def send_eap_messages(self):
+        """Send EAP messages to Supplicant forever."""
+        while self.running():
+            eap_queue_message = await self.eap_output_messages.get()
+            self.logger.info(
+                "Sending message %s from %s to %s",
+                eap_queue_message.message,
+                str(eap_queue_message.port_mac),
+                str(eap_queue_message.src_mac),
+            )
+            await self.loop.sock_sendall(
+                self.eap_socket.socket,
+                MessagePacker.ethernet_pack(
+                    eap_queue_message.message,
+                    eap_queue_message.port_mac,
+                    eap_queue_message.src_mac,
+                ),
+            )
+
+    async def send_radius_messages(self):
+        """send RADIUS messages to RADIUS Server forever."""
+        while self.running():
+            radius_output_bits = await self.radius_output_messages.get()
+            self.send_radius_request(radius_output_bits)
+
+    def send_radius_datagram(self, socket_index, packed_message, server):
+        """Send a packed RADIUS request from the RADIUS transport socket_index to server"""
+        self.radius_transports[socket_index].sendto(packed_message, server.address)
+
+    def receive_eap_messages(self):
+        """receive the eap messages waiting on the socket (reader callback)"""
+        for _ in range(self.MAX_FRAMES_PER_READ):
+            packed_message = self.eap_socket.receive_nowait()
+            if packed_message is None:
+                return
+            self.process_eap_frame(packed_message)
+
+    def receive_mab_messages(self):
+        """receive the DHCP requests waiting on the socket (reader callback)"""
+        for _ in range(self.MAX_FRAMES_PER_READ):
+            packed_message = self.mab_socket.receive_nowait()
+            if packed_message is None:
+                return
+            self.logger.info(
+                "Received DHCP packet for MAB. packed_message: %s", str(packed_message)
+            )
+            self.send_eth_to_state_machine(packed_message)
@@ -0,0 +1,162 @@
+"""Batched datagram receive with recvmmsg(2), pulls many frames per wakeup"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+
+from eventlet.hubs import trampoline
+
+
+class IoVec(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """struct iovec"""
+
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class MsgHdr(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """struct msghdr"""
+
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class MMsgHdr(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """struct mmsghdr"""
+
+    _fields_ = [("msg_hdr", MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def load_recvmmsg():
+    """
+    Returns:
+        libc's recvmmsg function, or None if it is not available.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        recvmmsg = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    recvmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+    ]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+
+RECVMMSG = load_recvmmsg()
+
+
+class BatchReceiver:
+    """Receives up to batch_size datagrams per call into preallocated buffers.
+
+    With recvmmsg a whole batch costs one syscall, without it (or with use_recvmmsg
+    False) the socket is drained with one non-blocking recv per datagram.
+    """
+
+    DEFAULT_BATCH_SIZE = 32
+    DEFAULT_BUFFER_SIZE = 4096
+
+    def __init__(self, sock, batch_size=None, buffer_size=None, use_recvmmsg=True):
+        """
+        Args:
+            sock: socket (green or plain) to receive on.
+            batch_size (int): most datagrams returned by one receive()
+            buffer_size (int): longest datagram, longer ones are truncated as with recv()
+            use_recvmmsg (bool): False to force the recv fallback
+        """
+        self.sock = sock
+        self.fileno = sock.fileno()
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.buffer_size = buffer_size or self.DEFAULT_BUFFER_SIZE
+        self.recvmmsg = RECVMMSG if use_recvmmsg else None
+        self.plain_socket = None
+
+        self.syscalls = 0
+        self.datagrams = 0
+
+        if self.recvmmsg:
+            self.buffer = ctypes.create_string_buffer(
+                self.batch_size * self.buffer_size
+            )
+            self.view = memoryview(self.buffer).cast("B")
+            self.iovecs = (IoVec * self.batch_size)()
+            self.headers = (MMsgHdr * self.batch_size)()
+            base = ctypes.addressof(self.buffer)
+            for i in range(self.batch_size):
+                self.iovecs[i].iov_base = base + i * self.buffer_size
+                self.iovecs[i].iov_len = self.buffer_size
+                self.headers[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+                self.headers[i].msg_hdr.msg_iovlen = 1
+
+    def receive(self, wait=True):
+        """Receive the datagrams waiting on the socket.
+        Args:
+            wait (bool): wait (without blocking the eventlet hub) for at least one datagram.
+        Returns:
+            list of bytes, empty only if wait is False and nothing was waiting.
+        """
+        while True:
+            if wait:
+                trampoline(self.fileno, read=True)
+            if self.recvmmsg:
+                datagrams = self._receive_recvmmsg()
+            else:
+                datagrams = self._receive_recv()
+            if datagrams or not wait:
+                self.datagrams += len(datagrams)
+                return datagrams
+
+    def _receive_recvmmsg(self):
+        while True:
+            self.syscalls += 1
+            received = self.recvmmsg(
+                self.fileno, self.headers, self.batch_size, socket.MSG_DONTWAIT, None
+            )
+            if received >= 0:
+                break
+            err = ctypes.get_errno()
+            if err == errno.EINTR:
+                continue
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            raise OSError(err, os.strerror(err))
+
+        datagrams = []
+        for i in range(received):
+            start = i * self.buffer_size
+            length = min(self.headers[i].msg_len, self.buffer_size)
+            datagrams.append(bytes(self.view[start : start + length]))
+        return datagrams
+
+    def _receive_recv(self):
+        if self.plain_socket is None:
+            # a plain duplicate, so MSG_DONTWAIT reads never block (or trampoline).
+            self.plain_socket = socket.socket(fileno=os.dup(self.fileno))
+        datagrams = []
+        while len(datagrams) < self.batch_size:
+            self.syscalls += 1
+            try:
+                datagrams.append(
+                    self.plain_socket.recv(self.buffer_size, socket.MSG_DONTWAIT)
+                )
+            except (BlockingIOError, InterruptedError):
+                break
+        return datagrams
+
+    def close(self):
+        """release the duplicated fallback socket, the wrapped socket is left open"""
+        if self.plain_socket is not None:
+            self.plain_socket.close()
+            self.plain_socket = None
@@ -0,0 +1,103 @@
+"""Classic BPF socket filters, so the kernel drops frames Chewie would ignore"""
+import ctypes
+import struct
+
+SO_ATTACH_FILTER = 26
+SOL_SOCKET = 1
+
+# opcodes
+LD_H_ABS = 0x28  # A = u16 at [k]
+LD_B_ABS = 0x30  # A = u8 at [k]
+JEQ_K = 0x15  # if A == k
+JSET_K = 0x45  # if A & k
+RET_K = 0x06  # return k bytes of the frame (0 drops it)
+
+ACCEPT = "accept"
+DROP = "drop"
+
+ETH_TYPE_OFFSET = 12
+IPV4_ETHERTYPE = 0x0800
+IPV4_NO_OPTIONS = 0x45  # version 4, 5 word header
+IPV4_FRAGMENT = 0x1FFF  # fragment offset bits
+UDP_PROTOCOL = 17
+SNAP_LENGTH = 0x40000
+
+
+def assemble(program):
+    """Resolve jump labels into the relative offsets BPF uses.
+    Args:
+        program (list): instructions (code, jump_true, jump_false, k) where the jumps are
+            0 (next instruction) or the name of a label, and labels given as ("label", name)
+    Returns:
+        list of (code, jt, jf, k) tuples
+    """
+    labels = {}
+    instructions = []
+    for entry in program:
+        if entry[0] == "label":
+            labels[entry[1]] = len(instructions)
+        else:
+            instructions.append(entry)
+
+    def offset(target, index):
+        if target == 0:
+            return 0
+        return labels[target] - index - 1
+
+    return [
+        (code, offset(jt, index), offset(jf, index), k)
+        for index, (code, jt, jf, k) in enumerate(instructions)
+    ]
+
+
+def ipv4_dhcp_request():
+    """Instructions that accept a DHCP request (UDP 68 -> 67) in an option-less,
+    unfragmented IPv4 packet after the ethernet header, and drop anything else"""
+    ip_header = 14
+    return [
+        (LD_B_ABS, 0, 0, ip_header + 9),
+        (JEQ_K, 0, DROP, UDP_PROTOCOL),
+        (LD_B_ABS, 0, 0, ip_header),
+        (JEQ_K, 0, DROP, IPV4_NO_OPTIONS),
+        (LD_H_ABS, 0, 0, ip_header + 6),
+        (JSET_K, DROP, 0, IPV4_FRAGMENT),
+        (LD_H_ABS, 0, 0, ip_header + 20),
+        (JEQ_K, 0, DROP, 68),
+        (LD_H_ABS, 0, 0, ip_header + 22),
+        (JEQ_K, ACCEPT, DROP, 67),
+    ]
+
+
+def dhcp_request_filter():
+    """
+    The kernel takes 802.1Q tags out of received frames (into skb metadata) before
+    packet sockets see them, so tagged requests are matched as untagged ones.
+    Returns:
+        assembled program passing only DHCP requests.
+    """
+    program = [
+        (LD_H_ABS, 0, 0, ETH_TYPE_OFFSET),
+        (JEQ_K, 0, DROP, IPV4_ETHERTYPE),
+    ]
+    program += ipv4_dhcp_request()
+    program += [
+        ("label", ACCEPT),
+        (RET_K, 0, 0, SNAP_LENGTH),
+        ("label", DROP),
+        (RET_K, 0, 0, 0),
+    ]
+    return assemble(program)
+
+
+def attach_filter(sock, instructions):
+    """Attach an assembled program to sock with SO_ATTACH_FILTER.
+    Raises:
+        OSError: if the kernel rejects the program.
+    """
+    filters = b"".join(
+        struct.pack("HBBI", *instruction) for instruction in instructions
+    )
+    buffer = ctypes.create_string_buffer(filters)
+    # struct sock_fprog {unsigned short len; struct sock_filter *filter;}
+    program = struct.pack("HP", len(instructions), ctypes.addressof(buffer))
+    sock.setsockopt(SOL_SOCKET, SO_ATTACH_FILTER, program)
@@ -10,12 +10,24 @@ from chewie.event import (
     EventMessageReceived,
     EventPortStatusChange,
     EventPreemptiveEAPResponseMessageReceived,
+    EventRadiusTimeout,
 )
+from chewie.mab_cache import MabRejectCache, MabResultCache
+from chewie.mab_rate_limiter import MabRateLimiter
 from chewie.mac_address import MacAddress
 from chewie.message_parser import MessageParser, MessagePacker, IdentityMessage
-from chewie.radius_lifecycle import RadiusLifecycle
+from chewie.radius_client import RadiusClient
+from chewie.radius_lifecycle import RadiusLifecycle, RadiusIdsExhausted
+from chewie.radius_servers import RadiusServer, RadiusServerPool
 from chewie.radius_socket import RadiusSocket
-from chewie.state_machines.eap_state_machine import FullEAPStateMachine
+from chewie.radsec_socket import (
+    RADSEC_PORT,
+    RADSEC_SECRET,
+    RadSecSocket,
+    radsec_ssl_context,
+)
+from chewie.reauth_policy import ReauthPolicy
+from chewie.state_machines.eap_state_machine import FullEAPStateMachine, SessionContext
 from chewie.state_machines.mab_state_machine import MacAuthenticationBypassStateMachine
 from chewie.utils import get_logger, MessageParseError, EapQueueMessage
 from chewie.utils import get_random_id as utils_get_random_id
@@ -54,8 +66,51 @@ class Chewie:
         radius_server_port=None,
         radius_server_secret=None,
         chewie_id=None,
+        reauth_jitter=0.0,
+        max_reauths_per_second=None,
+        use_packet_ring=False,
+        radius_sockets=1,
+        radius_servers=None,
+        radsec=None,
+        mab_cache_ttl=None,
+        mab_cache_size=None,
+        mab_reject_backoff=None,
+        mab_reject_max_backoff=None,
+        mab_mac_rate=None,
+        mab_port_rate=None,
     ):
+        """
+        Args:
+            reauth_jitter (float): fraction (0 - 1) of a session's period its
+                reauthentication may be brought forward by, to spread reauthentications.
+            max_reauths_per_second (int): global cap of reauthentications due in any
+                second, kept by bringing them forward. None for no cap.
+            use_packet_ring (bool): receive EAP and MAB frames from a memory mapped
+                PACKET_MMAP ring rather than with recv(), taking a block of frames per
+                wakeup with no copy. Needs TPACKET_V3 (Linux 3.2+); a socket that cannot
+                map the ring logs a warning and falls back to recv().
+            radius_sockets (int): number of RADIUS source sockets.
+            radius_servers (list): dicts of 'ip', 'port', 'secret' and 'weight' of the
+                RADIUS servers to balance requests across. port, secret and weight
+                default to radius_server_port, radius_server_secret and 1. Defaults to
+                the one server radius_server_ip.
+            radsec (dict): send RADIUS over TLS (RFC 6614) rather than UDP, with these
+                radsec_ssl_context() arguments ('ca_certs', 'certfile', 'keyfile',
+                'password', 'check_hostname'). Each RADIUS socket keeps a connection
+                to each server. The port defaults to 2083 and the secret to 'radsec'.
+            mab_cache_ttl (float): seconds a MAB Access-Accept is reused for a MAC seen
+                again on its port (at most its Session-Timeout), None not to cache them.
+            mab_cache_size (int): most (MAC, port)s the MAB cache keeps.
+            mab_reject_backoff (float): seconds no MAB request is sent for a MAC after
+                it is rejected, doubling with each reject in a row. None to always ask.
+            mab_reject_max_backoff (float): most seconds a rejected MAC is held down.
+            mab_mac_rate (float): DHCP frames a second each MAC may send to MAB, None
+                for no limit.
+            mab_port_rate (float): DHCP frames a second each port may send to MAB, None
+                for no limit.
+        """
         self.interface_name = interface_name
+        self.use_packet_ring = use_packet_ring
         self.log_name = Chewie.__name__
         if logger:
             self.log_name = logger.name + "." + Chewie.__name__
@@ -66,12 +121,19 @@ class Chewie:
         self.logoff_handler = logoff_handler
 
         self.radius_server_ip = radius_server_ip
+        self.radsec = radsec
         self.radius_secret = radius_server_secret
         self.radius_server_port = self.RADIUS_UDP_PORT
+        if radsec is not None:
+            self.radius_server_port = RADSEC_PORT
+            if not radius_server_secret:
+                self.radius_secret = RADSEC_SECRET
         if radius_server_port:
             self.radius_server_port = radius_server_port
         self.radius_listen_ip = "0.0.0.0"
         self.radius_listen_port = 0
+        # each source socket adds 256 RADIUS packet IDs that can be waiting for replies
+        self.radius_socket_count = radius_sockets
 
         self.chewie_id = "44-44-44-44-44-44:"  # used by the RADIUS Attribute
         # 'Called-Station' in Access-Request
@@ -79,6 +141,7 @@ class Chewie:
             self.chewie_id = chewie_id
 
         self.state_machines = {}  # port_id_str: { mac : state_machine}
+        self.session_context = None
         self.port_to_eapol_id = (
             {}
         )  # port_id: last ID used in preemptive identity request.
@@ -91,19 +154,55 @@ class Chewie:
         self.radius_output_messages = Queue()
 
         self.radius_lifecycle = RadiusLifecycle(
-            self.radius_secret, self.chewie_id, self.logger
+            self.radius_secret,
+            self.chewie_id,
+            self.logger,
+            sockets=radius_sockets,
+            servers=self.build_radius_servers(radius_servers),
         )
         self.timer_scheduler = timer_scheduler.TimerScheduler(self.logger)
+        self.reauth_policy = ReauthPolicy(reauth_jitter, max_reauths_per_second)
+        self.mab_cache = None
+        if mab_cache_ttl:
+            self.mab_cache = MabResultCache(mab_cache_ttl, mab_cache_size)
+        self.mab_reject_cache = None
+        if mab_reject_backoff:
+            self.mab_reject_cache = MabRejectCache(
+                mab_reject_backoff, mab_reject_max_backoff
+            )
+        self.mab_rate_limiter = MabRateLimiter(mab_mac_rate, mab_port_rate)
 
         self.eap_socket = None
         self.mab_socket = None
         self.pool = None
         self.eventlets = None
-        self.radius_socket = None
+        self.radius_sockets = []
+        self.radius_client = None
         self.interface_index = None
 
         self.eventlets = []
 
+    def build_radius_servers(self, radius_servers):
+        """
+        Args:
+            radius_servers (list): dicts of RADIUS server settings, see __init__.
+        Returns:
+            RadiusServerPool
+        """
+        if not radius_servers:
+            radius_servers = [{"ip": self.radius_server_ip}]
+        return RadiusServerPool(
+            [
+                RadiusServer(
+                    server["ip"],
+                    server.get("port", self.radius_server_port),
+                    server.get("secret", self.radius_secret),
+                    server.get("weight", 1),
+                )
+                for server in radius_servers
+            ]
+        )
+
     def run(self):
         """setup chewie and start socket eventlet threads"""
         self.logger.info("Starting")
@@ -117,9 +216,32 @@ class Chewie:
         return True
 
     def shutdown(self):
-        """kill eventlets and quit"""
+        """kill eventlets, close the sockets and quit"""
         for eventlet in self.eventlets:
             eventlet.kill()
+        for sock in (self.eap_socket, self.mab_socket):
+            if sock is not None:
+                sock.close()
+        if self.radsec is not None:
+            for radius_socket in self.radius_sockets:
+                radius_socket.close()
+
+    def stats(self):
+        """
+        Returns:
+            dict of the counters of reauthentication scheduling, RADIUS requests and
+            MAB, by part
+        """
+        stats = {
+            "reauth": self.reauth_policy.stats(),
+            "radius": self.radius_lifecycle.stats(),
+            "mab_rate_limiter": self.mab_rate_limiter.stats(),
+        }
+        if self.mab_cache is not None:
+            stats["mab_cache"] = self.mab_cache.stats()
+        if self.mab_reject_cache is not None:
+            stats["mab_reject_cache"] = self.mab_reject_cache.stats()
+        return stats
 
     def start_threads_and_wait(self):
         """Start the thread and wait until they complete (hopefully never)"""
@@ -130,7 +252,10 @@ class Chewie:
         self.eventlets.append(self.pool.spawn(self.receive_mab_messages))
 
         self.eventlets.append(self.pool.spawn(self.send_radius_messages))
-        self.eventlets.append(self.pool.spawn(self.receive_radius_messages))
+        for socket_index in range(len(self.radius_sockets)):
+            self.eventlets.append(
+                self.pool.spawn(self.receive_radius_messages, socket_index)
+            )
 
         self.eventlets.append(self.pool.spawn(self.timer_scheduler.run))
 
@@ -149,8 +274,8 @@ class Chewie:
         if self.auth_handler:
             self.auth_handler(src_mac, port_id, *args, **kwargs)
 
-        self.port_to_identity_job[port_id] = self.timer_scheduler.call_later(
-            period, self.reauth_port, src_mac, port_id
+        self.port_to_identity_job[port_id] = self.reauth_policy.call_later(
+            self.timer_scheduler, period, self.reauth_port, src_mac, port_id
         )
 
     def auth_failure(self, src_mac, port_id):
@@ -184,6 +309,8 @@ class Chewie:
         job = self.port_to_identity_job.get(port_id, None)
 
         if port_id in self.state_machines:
+            for state_machine in self.state_machines[port_id].values():
+                state_machine.cancel_retransmit_timer()
             del self.state_machines[port_id]
 
         if job:
@@ -305,28 +432,58 @@ class Chewie:
     def setup_eap_socket(self):
         """Setup EAP socket"""
         log_prefix = "%s.EapSocket" % self.logger.name
-        self.eap_socket = EapSocket(self.interface_name, log_prefix)
+        self.eap_socket = EapSocket(
+            self.interface_name, log_prefix, use_packet_ring=self.use_packet_ring
+        )
         self.eap_socket.setup()
 
     def setup_mab_socket(self):
         """Setup Mab socket"""
         log_prefix = "%s.MabSocket" % self.logger.name
-        self.mab_socket = MabSocket(self.interface_name, log_prefix)
+        self.mab_socket = MabSocket(
+            self.interface_name, log_prefix, use_packet_ring=self.use_packet_ring
+        )
         self.mab_socket.setup()
 
     def setup_radius_socket(self):
-        """Setup Radius socket"""
+        """Setup the Radius sockets, each one has its own source port"""
+        if self.radsec is not None:
+            self.setup_radsec_socket()
+            return
         log_prefix = "%s.RadiusSocket" % self.logger.name
-        self.radius_socket = RadiusSocket(
-            self.radius_listen_ip,
-            self.radius_listen_port,
-            self.radius_server_ip,
-            self.radius_server_port,
-            log_prefix,
-        )
-        self.radius_socket.setup()
+        self.radius_sockets = []
+        for socket_index in range(self.radius_socket_count):
+            listen_port = self.radius_listen_port
+            if listen_port:
+                listen_port += socket_index
+            radius_socket = RadiusSocket(
+                self.radius_listen_ip,
+                listen_port,
+                self.radius_server_ip,
+                self.radius_server_port,
+                log_prefix,
+            )
+            radius_socket.setup()
+            self.radius_sockets.append(radius_socket)
+            self.logger.info(
+                "Radius Listening on %s:%d", self.radius_listen_ip, listen_port
+            )
+
+    def setup_radsec_socket(self):
+        """Setup RadSec sockets in place of the Radius sockets, each one has its own
+        TLS connection to each server"""
+        log_prefix = "%s.RadSecSocket" % self.logger.name
+        ssl_context = radsec_ssl_context(**self.radsec)
+        server_addresses = [server.address for server in self.radius_lifecycle.servers]
+        self.radius_sockets = []
+        for _ in range(self.radius_socket_count):
+            radius_socket = RadSecSocket(server_addresses, log_prefix, ssl_context)
+            radius_socket.setup()
+            self.radius_sockets.append(radius_socket)
         self.logger.info(
-            "Radius Listening on %s:%d", self.radius_listen_ip, self.radius_listen_port
+            "RadSec connecting %d times to %s",
+            self.radius_socket_count,
+            ", ".join(server.name for server in self.radius_lifecycle.servers),
         )
 
     def send_eap_messages(self):
@@ -349,7 +506,13 @@ class Chewie:
             )
 
     def send_eth_to_state_machine(self, packed_message):
-        """Send an ethernet frame to MAB State Machine"""
+        """Send an ethernet frame to MAB State Machine, unless it is rate limited"""
+        if not self.mab_rate_limiter.allow(
+            bytes(packed_message[6:12]),
+            bytes(packed_message[0:6]),
+            self.mab_request_in_flight,
+        ):
+            return
         ethernet_packet = EthernetPacket.parse(packed_message)
         port_id = ethernet_packet.dst_mac
         src_mac = ethernet_packet.src_mac
@@ -359,40 +522,61 @@ class Chewie:
         state_machine = self.get_state_machine(src_mac, port_id, message_id)
         event = EventMessageReceived(ethernet_packet, port_id)
         state_machine.event(event)
-        # NOTE: Should probably throttle packets in once one is received
+
+    def mab_request_in_flight(self, src_mac, port_id):
+        """
+        Args:
+            src_mac (bytes):
+            port_id (bytes):
+        Returns:
+            True if src_mac's MAB state machine is waiting for the RADIUS server.
+        """
+        port_state_machines = self.state_machines.get(str(MacAddress(port_id)))
+        if not port_state_machines:
+            return False
+        state_machine = port_state_machines.get(str(MacAddress(src_mac)))
+        return (
+            isinstance(state_machine, MacAuthenticationBypassStateMachine)
+            and state_machine.state == MacAuthenticationBypassStateMachine.AAA_IDLE
+        )
 
     def receive_eap_messages(self):
         """receive eap messages from supplicant forever."""
         while self.running():
             sleep(0)
             self.logger.info("waiting for eap.")
-            packed_message = self.eap_socket.receive()
-            self.logger.info("Received packed_message: %s", str(packed_message))
-            try:
-                eap, dst_mac = MessageParser.ethernet_parse(packed_message)
-            except MessageParseError as exception:
-                self.logger.warning(
-                    "MessageParser.ethernet_parse threw exception.\n"
-                    " packed_message: '%s'.\n"
-                    " exception: '%s'.",
-                    packed_message,
-                    exception,
-                )
-                continue
+            for packed_message in self.eap_socket.receive_batch():
+                self.process_eap_frame(packed_message)
+
+    def process_eap_frame(self, packed_message):
+        """parse a received EAPOL frame and send it on to its state machine"""
+        self.logger.info("Received packed_message: %s", str(packed_message))
+        try:
+            eap, dst_mac = MessageParser.ethernet_parse(packed_message)
+        except MessageParseError as exception:
+            self.logger.warning(
+                "MessageParser.ethernet_parse threw exception.\n"
+                " packed_message: '%s'.\n"
+                " exception: '%s'.",
+                packed_message,
+                exception,
+            )
+            return
 
-            self.logger.info("Received eap message: %s", str(eap))
-            self.send_eap_to_state_machine(eap, dst_mac)
+        self.logger.info("Received eap message: %s", str(eap))
+        self.send_eap_to_state_machine(eap, dst_mac)
 
     def receive_mab_messages(self):
         """Receive DHCP request for MAB."""
         while self.running():
             sleep(0)
             self.logger.info("waiting for MAB activity.")
-            packed_message = self.mab_socket.receive()
-            self.logger.info(
-                "Received DHCP packet for MAB. packed_message: %s", str(packed_message)
-            )
-            self.send_eth_to_state_machine(packed_message)
+            for packed_message in self.mab_socket.receive_batch():
+                self.logger.info(
+                    "Received DHCP packet for MAB. packed_message: %s",
+                    str(packed_message),
+                )
+                self.send_eth_to_state_machine(packed_message)
 
     def send_eap_to_state_machine(self, eap, dst_mac):
         """sends an eap message to the state machine"""
@@ -419,50 +603,105 @@ class Chewie:
         while self.running():
             sleep(0)
             radius_output_bits = self.radius_output_messages.get()
-            packed_message = self.radius_lifecycle.process_outbound(radius_output_bits)
-            self.radius_socket.send(packed_message)
-            self.logger.info("sent radius message.")
+            self.send_radius_request(radius_output_bits)
+
+    def send_radius_request(self, radius_output_bits):
+        """Pack and send a request from a state machine, and time its reply"""
+        try:
+            self.get_radius_client().send(radius_output_bits)
+        except RadiusIdsExhausted as exception:
+            self.logger.warning("Dropping RADIUS request: %s", exception)
+            self.radius_request_timed_out(
+                radius_output_bits.src_mac, radius_output_bits.port_mac
+            )
+            return
+        self.logger.info("sent radius message.")
+
+    def send_radius_datagram(self, socket_index, packed_message, server):
+        """Send a packed RADIUS request from the RADIUS socket socket_index to server"""
+        self.radius_sockets[socket_index].send(packed_message, server.address)
+
+    def get_radius_client(self):
+        """The RadiusClient the state machines' requests are sent through. Built on
+        first use, so the sockets, lifecycle and scheduler can be replaced until then.
+        Returns:
+            RadiusClient
+        """
+        if self.radius_client is None:
+            self.radius_client = RadiusClient(
+                self.radius_lifecycle,
+                self.send_radius_datagram,
+                self.timer_scheduler,
+                self.logger,
+                reply_handler=self.send_radius_to_state_machine,
+                timeout_handler=self.radius_request_timed_out,
+            )
+        return self.radius_client
+
+    def radius_request_timed_out(self, src_mac, port_id):
+        """Tell the session's state machine (if there is one) no reply is coming"""
+        state_machine = self.state_machines.get(str(port_id), {}).get(str(src_mac))
+        if state_machine:
+            state_machine.event(EventRadiusTimeout())
 
-    def receive_radius_messages(self):
-        """receive RADIUS messages from RADIUS server forever."""
+    def receive_radius_messages(self, socket_index=0):
+        """receive RADIUS messages from RADIUS server forever.
+        Args:
+            socket_index (int): which of the RADIUS sockets to receive on.
+        """
+        radius_socket = self.radius_sockets[socket_index]
         while self.running():
             sleep(0)
             self.logger.info("waiting for radius.")
-            packed_message = self.radius_socket.receive()
-            try:
-                radius = MessageParser.radius_parse(
-                    packed_message, self.radius_secret, self.radius_lifecycle
-                )
-            except MessageParseError as exception:
-                self.logger.warning(
-                    "MessageParser.radius_parse threw exception.\n"
-                    " packed_message: '%s'.\n"
-                    " exception: '%s'.",
-                    packed_message,
-                    exception,
-                )
-                continue
-            self.logger.info("Received RADIUS message: %s", str(radius))
-            self.send_radius_to_state_machine(radius)
+            for packed_message in radius_socket.receive_batch():
+                self.process_radius_datagram(packed_message, socket_index)
+
+    def process_radius_datagram(self, packed_message, socket_index=0):
+        """parse a received RADIUS packet and send it on to what is waiting for it"""
+        self.get_radius_client().receive(packed_message, socket_index)
 
-    def send_radius_to_state_machine(self, radius):
+    def send_radius_to_state_machine(self, radius, socket_index=0):
         """sends a radius message to the state machine"""
+        request_id = self.radius_lifecycle.request_id(socket_index, radius.packet_id)
         event = self.radius_lifecycle.build_event_radius_message_received(radius)
-        state_machine = self.get_state_machine_from_radius_packet_id(radius.packet_id)
+        state_machine = self.get_state_machine_from_radius_packet_id(request_id)
+        # answered, so the id can be reused (and duplicate replies are dropped).
+        self.radius_lifecycle.complete_request(request_id)
         state_machine.event(event)
 
     def get_state_machine_from_radius_packet_id(self, packet_id):
         """Gets a FullEAPStateMachine from the RADIUS message packet_id
         Args:
-            packet_id (int): id of the received RADIUS message
+            packet_id (int): request_id (see RadiusLifecycle) of the received RADIUS message
         Returns:
             FullEAPStateMachine
         """
-        return self.get_state_machine(
-            **self.radius_lifecycle.packet_id_to_mac[packet_id]
-        )
+        request = self.radius_lifecycle.in_flight.get(packet_id)
+        if request is None:
+            raise KeyError(packet_id)
+        return self.get_state_machine(request.src_mac, request.port_id)
 
     # TODO change message_id functionality
+    def get_session_context(self):
+        """The queues, scheduler, handlers and logger shared by the FullEAPStateMachines.
+        Built on first use, so the queues and scheduler can be replaced until then.
+        Returns:
+            SessionContext
+        """
+        if self.session_context is None:
+            self.session_context = SessionContext(
+                self.eap_output_messages,
+                self.radius_output_messages,
+                self.timer_scheduler,
+                self.auth_success,
+                self.auth_failure,
+                self.auth_logoff,
+                logger=get_logger("%s.SM" % self.logger.name),
+                reauth_policy=self.reauth_policy,
+                radius_retransmits=True,
+            )
+        return self.session_context
+
     def get_state_machine(self, src_mac, port_id, message_id=-1):
         """Gets or creates if it does not already exist an FullEAPStateMachine for the src_mac.
         Args:
@@ -500,26 +739,18 @@ class Chewie:
                 self.auth_success,
                 self.auth_failure,
                 log_prefix,
+                mab_cache=self.mab_cache,
+                mab_reject_cache=self.mab_reject_cache,
             )
             self.state_machines[port_id_str][src_mac_str] = state_machine
             return state_machine
 
         if not state_machine:
             self.logger.info("Creating EAP FULL State Machine")
-            log_prefix = "%s.SM - port: %s, client: %s" % (
-                self.logger.name,
-                port_id_str,
+            state_machine = FullEAPStateMachine.from_context(
+                self.get_session_context(),
                 src_mac,
-            )
-            state_machine = FullEAPStateMachine(
-                self.eap_output_messages,
-                self.radius_output_messages,
-                src_mac,
-                self.timer_scheduler,
-                self.auth_success,
-                self.auth_failure,
-                self.auth_logoff,
-                log_prefix,
+                "port: %s, client: %s" % (port_id_str, src_mac),
             )
             self.state_machines[port_id_str][src_mac_str] = state_machine
             self.logger.debug(
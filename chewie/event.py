@@ -39,6 +39,13 @@ class EventSessionTimeout(Event):
         self.state_machine = state_machine
 
 
+class EventRadiusTimeout(Event):
+    """The RADIUS request went unanswered, through all its retransmissions."""
+
+    def __init__(self):
+        self.type = self.TIMER_EXPIRED
+
+
 class EventMessageReceived(Event):
     """Message (EAP) Received. Radius Message event is a child"""
 
@@ -0,0 +1,208 @@
+"""Recent MAB results, so a MAC seen again is authorised (or rejected) locally"""
+import time
+from collections import OrderedDict
+
+
+class MabCacheEntry:  # pylint: disable=too-few-public-methods
+    """A cached Access-Accept for a (MAC, port)"""
+
+    __slots__ = ("reply", "attributes", "session_timeout", "expires_at")
+
+    def __init__(self, reply, attributes, session_timeout, expires_at):
+        self.reply = reply
+        self.attributes = attributes
+        self.session_timeout = session_timeout
+        self.expires_at = expires_at
+
+
+class MabResultCache:
+    """Access-Accepts for MAB, keyed by (MAC, port), least recently used first.
+
+    An entry is kept for ttl seconds, or the Session-Timeout the RADIUS server gave if
+    that is shorter, so the server's decision is never reused past when it would have
+    been asked again. Past max_entries, the least recently used entry is evicted.
+    """
+
+    DEFAULT_TTL = 300  # seconds
+    DEFAULT_MAX_ENTRIES = 10000
+
+    def __init__(self, ttl=None, max_entries=None, clock=None):
+        """
+        Args:
+            ttl (float): most seconds an Access-Accept is reused for.
+            max_entries (int): most (MAC, port)s to keep.
+            clock (callable): monotonic clock, defaults to time.monotonic
+        """
+        self.ttl = ttl or self.DEFAULT_TTL
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        self.clock = clock or time.monotonic
+        self.entries = OrderedDict()  # (src_mac str, port_id str): MabCacheEntry
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, src_mac, port_id, reply, attributes, session_timeout=None):
+        """Cache an Access-Accept.
+        Args:
+            src_mac (MacAddress):
+            port_id (MacAddress):
+            reply (RadiusAccessAccept): as received.
+            attributes (dict): its attributes, as passed to the auth_handler.
+            session_timeout (int): the Session-Timeout it was given, if any.
+        """
+        ttl = self.ttl
+        if session_timeout:
+            ttl = min(ttl, session_timeout)
+        key = (str(src_mac), str(port_id))
+        self.entries.pop(key, None)
+        self.entries[key] = MabCacheEntry(
+            reply, attributes, session_timeout, self.clock() + ttl
+        )
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, src_mac, port_id):
+        """
+        Returns:
+            the MabCacheEntry for (src_mac, port_id), None if there is none or it has
+            expired.
+        """
+        key = (str(src_mac), str(port_id))
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.clock() >= entry.expires_at:
+            del self.entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def remove(self, src_mac, port_id):
+        """Forget (src_mac, port_id), e.g. when it has been rejected"""
+        self.entries.pop((str(src_mac), str(port_id)), None)
+
+    def stats(self):
+        """
+        Returns:
+            dict of size and counters
+        """
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class MabRejectEntry:  # pylint: disable=too-few-public-methods
+    """A MAC's run of MAB Access-Rejects"""
+
+    __slots__ = ("reply", "rejects", "blocked_until")
+
+    def __init__(self, reply, rejects, blocked_until):
+        self.reply = reply
+        self.rejects = rejects
+        self.blocked_until = blocked_until
+
+
+class MabRejectCache:
+    """MACs recently rejected for MAB, held down with exponential backoff.
+
+    After a MAC's nth Access-Reject in a row, no Access-Request is sent for it for
+    backoff * 2**(n - 1) seconds, up to max_backoff; its frames are rejected locally
+    instead. A MAC not rejected again for max_backoff seconds after its hold down
+    starts over. At most max_entries MACs are held down, the least recently rejected
+    are forgotten first.
+    """
+
+    DEFAULT_BACKOFF = 5  # seconds
+    DEFAULT_MAX_BACKOFF = 300  # seconds
+    DEFAULT_MAX_ENTRIES = 10000
+
+    def __init__(self, backoff=None, max_backoff=None, max_entries=None, clock=None):
+        """
+        Args:
+            backoff (float): seconds a MAC is held down after its first reject.
+            max_backoff (float): most seconds a MAC is held down.
+            max_entries (int): most MACs to hold down.
+            clock (callable): monotonic clock, defaults to time.monotonic
+        """
+        self.backoff = backoff or self.DEFAULT_BACKOFF
+        self.max_backoff = max(max_backoff or self.DEFAULT_MAX_BACKOFF, self.backoff)
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        self.clock = clock or time.monotonic
+        self.entries = OrderedDict()  # src_mac str: MabRejectEntry
+
+        self.rejects = 0
+        self.suppressed = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, src_mac, reply):
+        """Hold src_mac down after an Access-Reject.
+        Args:
+            src_mac (MacAddress):
+            reply (RadiusAccessReject): as received.
+        Returns:
+            seconds src_mac is held down for
+        """
+        now = self.clock()
+        key = str(src_mac)
+        entry = self.entries.pop(key, None)
+        rejects = 1
+        if entry is not None and now - entry.blocked_until < self.max_backoff:
+            rejects = entry.rejects + 1
+        hold_down = min(self.backoff * 2 ** min(rejects - 1, 32), self.max_backoff)
+        self.entries[key] = MabRejectEntry(reply, rejects, now + hold_down)
+        self.rejects += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+        return hold_down
+
+    def get(self, src_mac):
+        """Check src_mac before sending an Access-Request for it, counting the request
+        as suppressed if it is held down.
+        Returns:
+            the MabRejectEntry if src_mac is held down, None if it may be asked about.
+        """
+        entry = self.entries.get(str(src_mac))
+        if entry is None or self.clock() >= entry.blocked_until:
+            return None
+        self.suppressed += 1
+        return entry
+
+    def remove(self, src_mac):
+        """Forget src_mac, e.g. when it has been accepted"""
+        self.entries.pop(str(src_mac), None)
+
+    def stats(self):
+        """
+        Returns:
+            dict of size and counters, suppressed is the Access-Requests not sent
+        """
+        now = self.clock()
+        return {
+            "entries": len(self.entries),
+            "held_down": sum(
+                1 for entry in self.entries.values() if now < entry.blocked_until
+            ),
+            "max_entries": self.max_entries,
+            "rejects": self.rejects,
+            "suppressed": self.suppressed,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,119 @@
+"""Token bucket rate limiting of the frames that trigger MAB, ahead of its state machines"""
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods
+    """Tokens left for a MAC or port, as of updated"""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class MabRateLimiter:
+    """Decides which DHCP frames reach a MAB state machine, before they are parsed.
+
+    A frame is dropped if its MAC already has a MAB request waiting for the RADIUS
+    server (the state machine would ignore it), or if its MAC or port is over its
+    rate: each has a token bucket of burst frames, refilled at rate frames a second.
+    A rate of None does not limit. Buckets are kept for at most max_buckets MACs (and
+    as many ports), the least recently used are forgotten first.
+    """
+
+    DEFAULT_MAX_BUCKETS = 10000
+
+    def __init__(
+        self,
+        mac_rate=None,
+        port_rate=None,
+        mac_burst=None,
+        port_burst=None,
+        max_buckets=None,
+        clock=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Args:
+            mac_rate (float): frames a second each MAC may send, None for no limit.
+            port_rate (float): frames a second each port may send, None for no limit.
+            mac_burst (int): frames a MAC may send at once, defaults to mac_rate.
+            port_burst (int): frames a port may send at once, defaults to port_rate.
+            max_buckets (int): most MACs to keep a bucket for.
+            clock (callable): monotonic clock, defaults to time.monotonic
+        """
+        self.mac_rate = mac_rate
+        self.port_rate = port_rate
+        self.mac_burst = max(mac_burst or mac_rate or 1, 1)
+        self.port_burst = max(port_burst or port_rate or 1, 1)
+        self.max_buckets = max_buckets or self.DEFAULT_MAX_BUCKETS
+        self.clock = clock or time.monotonic
+        self.mac_buckets = OrderedDict()  # src_mac bytes: TokenBucket
+        self.port_buckets = OrderedDict()  # port_id bytes: TokenBucket
+
+        self.allowed = 0
+        self.in_flight_dropped = 0
+        self.mac_dropped = 0
+        self.port_dropped = 0
+
+    def allow(self, src_mac, port_id, in_flight=None):
+        """Take a token for a frame from src_mac on port_id.
+        Args:
+            src_mac (bytes): source MAC of the frame.
+            port_id (bytes): destination MAC of the frame, which identifies the port.
+            in_flight (callable): (src_mac, port_id) True if the MAC is waiting on a
+                MAB request.
+        Returns:
+            True if the frame should go to its state machine, False to drop it.
+        """
+        if in_flight is not None and in_flight(src_mac, port_id):
+            self.in_flight_dropped += 1
+            return False
+        now = self.clock()
+        if self.mac_rate is not None and not self.take(
+            self.mac_buckets, src_mac, self.mac_rate, self.mac_burst, now
+        ):
+            self.mac_dropped += 1
+            return False
+        if self.port_rate is not None and not self.take(
+            self.port_buckets, port_id, self.port_rate, self.port_burst, now
+        ):
+            self.port_dropped += 1
+            return False
+        self.allowed += 1
+        return True
+
+    def take(self, buckets, key, rate, burst, now):  # pylint: disable=too-many-arguments
+        """Take a token from key's bucket.
+        Returns:
+            True if there was one
+        """
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= self.max_buckets:
+                buckets.popitem(last=False)
+            buckets[key] = TokenBucket(burst - 1, now)
+            return True
+        buckets.move_to_end(key)
+        tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+        if tokens < 1:
+            bucket.tokens = tokens
+            return False
+        bucket.tokens = tokens - 1
+        return True
+
+    def stats(self):
+        """
+        Returns:
+            dict of frames allowed and dropped (by reason), and buckets kept
+        """
+        return {
+            "allowed": self.allowed,
+            "in_flight_dropped": self.in_flight_dropped,
+            "mac_dropped": self.mac_dropped,
+            "port_dropped": self.port_dropped,
+            "mac_buckets": len(self.mac_buckets),
+            "port_buckets": len(self.port_buckets),
+        }
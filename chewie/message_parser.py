@@ -12,12 +12,18 @@ from chewie.eap import (
     PARSERS_TYPES,
 )
 from chewie.ethernet_packet import EthernetPacket
-from chewie.radius import RadiusAttributesList, RadiusAccessRequest, Radius
+from chewie.radius import (
+    RadiusAttributesList,
+    RadiusAccessRequest,
+    RadiusStatusServer,
+    Radius,
+)
 from chewie.radius_attributes import (
     CallingStationId,
     UserName,
     MessageAuthenticator,
     EAPMessage,
+    NASIdentifier,
     NASPort,
     UserPassword,
 )
@@ -246,14 +252,19 @@ class MessageParser:
         )
 
     @staticmethod
-    def radius_parse(packed_message, secret, radius_lifecycle):
+    def radius_parse(packed_message, secret, radius_lifecycle, socket_index=0):
         """Parses a RADIUS packet
+        Args:
+            socket_index (int): the RADIUS socket packed_message was received on.
         Returns:
             RadiusPacket
         Raises:
             MessageParseError: the packed_message cannot be parsed"""
         parsed_radius = Radius.parse(
-            packed_message, secret, radius_lifecycle=radius_lifecycle
+            packed_message,
+            secret,
+            radius_lifecycle=radius_lifecycle,
+            socket_index=socket_index,
         )
         return parsed_radius
 
@@ -275,17 +286,36 @@ class MessagePacker:
         )
         return ethernet_packet.pack()
 
+    @staticmethod
+    def nas_port_attribute(nas_port):
+        """
+        Args:
+            nas_port (int or Attribute): NAS-Port number, or its (packed) attribute.
+        Returns:
+            NAS-Port attribute
+        """
+        if isinstance(nas_port, int):
+            return NASPort.create(nas_port)
+        return nas_port
+
     @staticmethod
     def radius_mab_pack(
-        src_mac, radius_packet_id, request_authenticator, secret, nas_port
-    ):
+        src_mac,
+        radius_packet_id,
+        request_authenticator,
+        secret,
+        nas_port,
+        calling_station_id=None,
+    ):  # pylint: disable=too-many-arguments
         attr_list = []
         no_dots_mac = str(src_mac).replace(":", "")
         attr_list.append(UserName.create(no_dots_mac))
-        attr_list.append(CallingStationId.create(str(src_mac).replace(":", "-")))
+        if calling_station_id is None:
+            calling_station_id = CallingStationId.create(str(src_mac).replace(":", "-"))
+        attr_list.append(calling_station_id)
 
         if nas_port:
-            attr_list.append(NASPort.create(nas_port))
+            attr_list.append(MessagePacker.nas_port_attribute(nas_port))
 
         ciphertext = UserPassword.encrypt(secret, request_authenticator, no_dots_mac)
         attr_list.append(UserPassword.create(ciphertext))
@@ -302,6 +332,33 @@ class MessagePacker:
         )
         return access_request.build(secret)
 
+    @staticmethod
+    def radius_status_server_pack(
+        radius_packet_id, request_authenticator, secret, nas_identifier
+    ):
+        """
+        Packs up a RADIUS Status-Server (RFC 5997), to check a RADIUS Server is alive.
+        Args:
+            radius_packet_id (int):
+            request_authenticator (bytes):
+            secret (str): RADIUS secret used between Chewie and RADIUS Server
+            nas_identifier (str): identifies Chewie to the RADIUS Server
+        Returns:
+            packed RADIUS packet (bytes)
+        """
+        attributes = RadiusAttributesList(
+            [
+                NASIdentifier.create(nas_identifier),
+                MessageAuthenticator.create(
+                    bytes.fromhex("00000000000000000000000000000000")
+                ),
+            ]
+        )
+        status_server = RadiusStatusServer(
+            radius_packet_id, request_authenticator, attributes
+        )
+        return status_server.build(secret)
+
     @staticmethod
     def radius_pack(
         eap_message,
@@ -313,6 +370,7 @@ class MessagePacker:
         secret,
         nas_port=None,
         extra_attributes=None,
+        calling_station_id=None,
     ):
         """
         Packs up a RADIUS message to send to a RADIUS Server.
@@ -324,7 +382,9 @@ class MessagePacker:
             request_authenticator (bytes):
             state (State): RADIUS State
             secret (str): RADIUS secret used between Chewie and RADIUS Server
+            nas_port (int or Attribute): NAS-Port number, or its (packed) attribute.
             extra_attributes (list): list of extra RADIUS attributes to send along with the above.
+            calling_station_id (Attribute): defaults to one made from src_mac.
 
         Returns:
             packed RADIUS packet (bytes)
@@ -334,10 +394,12 @@ class MessagePacker:
 
         attr_list = []
         attr_list.append(UserName.create(username))
-        attr_list.append(CallingStationId.create(str(src_mac)))
+        if calling_station_id is None:
+            calling_station_id = CallingStationId.create(str(src_mac))
+        attr_list.append(calling_station_id)
 
         if nas_port:
-            attr_list.append(NASPort.create(nas_port))
+            attr_list.append(MessagePacker.nas_port_attribute(nas_port))
 
         attr_list.extend(extra_attributes)
 
@@ -5,7 +5,10 @@ from abc import ABC, abstractmethod
 from fcntl import ioctl
 from eventlet.green import socket
 
+from chewie.batch_socket import BatchReceiver
+from chewie.bpf import attach_filter, dhcp_request_filter
 from chewie.mac_address import MacAddress
+from chewie.packet_ring import PacketRing
 from chewie.utils import get_logger
 
 
@@ -30,15 +33,51 @@ class PromiscuousSocket(ABC):
     def setup(self):  # pylint: disable=missing-docstring
         pass
 
-    def __init__(self, interface_name, log_prefix):
+    def __init__(self, interface_name, log_prefix, use_packet_ring=False):
+        """
+        Args:
+            use_packet_ring (bool): receive from a TPACKET_V3 PACKET_MMAP ring
+                (PacketRing) rather than with recv(), falling back to recv() if the
+                kernel cannot map one.
+        """
         self.socket = None
+        self.batch_receiver = None
+        self.use_packet_ring = use_packet_ring
+        self.packet_ring = None
+        self.pending_frames = []
         self.interface_index = None
         self.interface_name = interface_name
         self.logger = get_logger(log_prefix)
 
+    def receive_frames(self):
+        """Receive the frames waiting on the socket (at least one).
+        Returns:
+            list of frames. With a packet ring these are zero-copy memoryviews that are
+            only valid until the next call, otherwise bytes.
+        """
+        if self.packet_ring:
+            return self.packet_ring.receive_views()
+        if self.batch_receiver is None:
+            self.batch_receiver = BatchReceiver(self.socket)
+        return self.batch_receiver.receive()
+
+    def receive_batch(self):
+        """Receive all the frames waiting on the socket (at least one), up to a batch.
+        Returns:
+            list of frames (bytes)
+        """
+        return [bytes(frame) for frame in self.receive_frames()]
+
+    def receive_pending(self):
+        """Receive a single frame by way of receive_batch()"""
+        while not self.pending_frames:
+            self.pending_frames = self.receive_batch()
+        return self.pending_frames.pop(0)
+
     def _setup(self, socket_filter):
-        """Set up the socket"""
+        """Set up the socket, closing any set up before"""
         self.logger.info("Setting up socket on interface: %s", self.interface_name)
+        self.close()
         try:
             self.open(socket_filter)
             self.get_interface_index()
@@ -46,6 +85,29 @@ class PromiscuousSocket(ABC):
         except socket.error as err:
             self.logger.error("Unable to setup socket: %s", str(err))
             raise err
+        if self.use_packet_ring:
+            self.setup_packet_ring()
+
+    def setup_packet_ring(self):
+        """Map a TPACKET_V3 receive ring, falling back to recv() if that is not possible"""
+        try:
+            self.packet_ring = PacketRing(self.socket)
+        except (OSError, ValueError) as err:
+            self.logger.warning("Unable to setup packet ring, using recv: %s", str(err))
+            self.packet_ring = None
+
+    def close(self):
+        """Unmap the packet ring (if any) and close the socket"""
+        if self.packet_ring is not None:
+            self.packet_ring.close()
+            self.packet_ring = None
+        if self.batch_receiver is not None:
+            self.batch_receiver.close()
+            self.batch_receiver = None
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        self.pending_frames = []
 
     def open(self, socket_filter):
         """Setup EAP socket"""
@@ -85,20 +147,61 @@ class EapSocket(PromiscuousSocket):
 
     def receive(self):
         """receive from eap socket"""
+        if self.packet_ring:
+            return self.receive_pending()
         return self.socket.recv(4096)
 
 
 class MabSocket(PromiscuousSocket):
-    """Handle the Mab socket for DHCP Requests"""
+    """Handle the Mab socket for DHCP Requests
+
+    A BPF filter attached to the socket has the kernel drop everything but DHCP
+    requests, the same check is repeated in Python in case the filter is unavailable.
+    """
 
     IP_ETHERTYPE = 0x0800
     DHCP_UDP_SRC = 68
     DHCP_UDP_DST = 67
     UDP_IPTYPE = b"\x11"
+    IPV4_TYPE = b"\x08\x00"
+    PACKET_STATISTICS = 6
+
+    def __init__(
+        self,
+        interface_name,
+        log_prefix,
+        use_packet_ring=False,
+        use_bpf_filter=True,
+    ):
+        """
+        Args:
+            use_packet_ring (bool): receive from a TPACKET_V3 ring, as PromiscuousSocket.
+            use_bpf_filter (bool): attach the in-kernel DHCP request filter.
+        """
+        super().__init__(interface_name, log_prefix, use_packet_ring)
+        self.use_bpf_filter = use_bpf_filter
+        self.bpf_attached = False
+        self.dhcp_requests = 0
+        self.python_dropped = 0
+        self.kernel_packets = 0
+        self.kernel_dropped = 0
 
     def setup(self):
         """Set up the socket"""
         self._setup(socket.htons(self.IP_ETHERTYPE))
+        if self.use_bpf_filter:
+            self.attach_bpf_filter()
+
+    def attach_bpf_filter(self):
+        """Attach the DHCP request filter, falling back to the Python filter on failure"""
+        try:
+            attach_filter(self.socket, dhcp_request_filter())
+            self.bpf_attached = True
+        except OSError as err:
+            self.logger.warning(
+                "Unable to attach BPF filter, filtering in Python: %s", str(err)
+            )
+            self.bpf_attached = False
 
     def send(self, data):
         """Not Implemented -- This socket is purely for Listening"""
@@ -106,13 +209,76 @@ class MabSocket(PromiscuousSocket):
 
     def receive(self):
         """Receive activity from supplicant-facing socket"""
+        if self.packet_ring:
+            return self.receive_pending()
         # Skip all packets that are not DHCP requests
         while True:
             ret_val = self.socket.recv(4096)
 
-            if ret_val[23:24] == self.UDP_IPTYPE:
-                src_port = struct.unpack(">H", ret_val[34:36])[0]
-                dst_port = struct.unpack(">H", ret_val[36:38])[0]
+            if self.keep_frame(ret_val):
+                return ret_val
+
+    def receive_batch(self):
+        """Receive the DHCP requests waiting on the socket (at least one), up to a batch.
+        Returns:
+            list of frames (bytes)
+        """
+        while True:
+            # filter before copying, so only DHCP requests leave the packet ring.
+            frames = [
+                bytes(frame)
+                for frame in self.receive_frames()
+                if self.keep_frame(frame)
+            ]
+            if frames:
+                return frames
+
+    def keep_frame(self, frame):
+        """Python fallback filter, counts what it keeps and drops.
+        Returns:
+            True if the frame is a DHCP request
+        """
+        if self.is_dhcp_request(frame):
+            self.dhcp_requests += 1
+            return True
+        self.python_dropped += 1
+        return False
+
+    def is_dhcp_request(self, frame):
+        """
+        Returns:
+            True if the ethernet frame is a DHCP request (UDP 68 -> 67)
+        """
+        if frame[12:14] != self.IPV4_TYPE:
+            return False
+        if len(frame) < 38:
+            return False
+        if frame[23:24] == self.UDP_IPTYPE:
+            src_port = struct.unpack(">H", frame[34:36])[0]
+            dst_port = struct.unpack(">H", frame[36:38])[0]
+
+            return src_port == self.DHCP_UDP_SRC and dst_port == self.DHCP_UDP_DST
+        return False
 
-                if src_port == self.DHCP_UDP_SRC and dst_port == self.DHCP_UDP_DST:
-                    return ret_val
+    def stats(self):
+        """
+        Returns:
+            dict of counters. kernel_packets/kernel_dropped come from PACKET_STATISTICS,
+            (frames passed by the BPF filter, and those lost to a full receive queue),
+            python_dropped are frames only the Python filter caught.
+        """
+        if self.socket is not None:
+            # tpacket_stats (tpacket_stats_v3 with a packet ring), reading resets them.
+            packets, dropped = struct.unpack_from(
+                "II",
+                self.socket.getsockopt(self.SOL_PACKET, self.PACKET_STATISTICS, 12),
+            )
+            self.kernel_packets += packets
+            self.kernel_dropped += dropped
+        return {
+            "bpf_attached": self.bpf_attached,
+            "dhcp_requests": self.dhcp_requests,
+            "python_dropped": self.python_dropped,
+            "kernel_packets": self.kernel_packets,
+            "kernel_dropped": self.kernel_dropped,
+        }
@@ -0,0 +1,154 @@
+"""PACKET_MMAP (TPACKET_V3) receive ring for PF_PACKET sockets"""
+import mmap
+import struct
+
+from eventlet.hubs import trampoline
+
+
+class PacketRing:
+    """Memory mapped TPACKET_V3 receive ring.
+
+    The kernel writes frames straight into blocks shared with user space and hands
+    a block over when it fills up or its block timeout expires, so a whole block of
+    frames is read with no recv() and no copy. Frames are returned as memoryviews
+    into the ring, they are only valid until the next receive_views() call
+    (which gives the block back to the kernel).
+    """
+
+    SOL_PACKET = 263
+    PACKET_RX_RING = 5
+    PACKET_VERSION = 10
+    TPACKET_V3 = 2
+
+    TP_STATUS_KERNEL = 0
+    TP_STATUS_USER = 1
+
+    DEFAULT_BLOCK_SIZE = 1 << 16  # must be a multiple of the page size
+    DEFAULT_BLOCK_COUNT = 64
+    DEFAULT_FRAME_SIZE = 2048
+    DEFAULT_BLOCK_TIMEOUT = 10  # ms, a partly filled block is handed over after this
+
+    # struct tpacket_block_desc: version, offset_to_priv, then tpacket_hdr_v1 starting with
+    # block_status, num_pkts, offset_to_first_pkt
+    BLOCK_STATUS_OFFSET = 8
+    BLOCK_HEADER = struct.Struct("=III")
+    # struct tpacket3_hdr: tp_next_offset, tp_sec, tp_nsec, tp_snaplen, tp_len, tp_status,
+    # tp_mac, tp_net
+    PACKET_HEADER = struct.Struct("=IIIIIIHH")
+
+    def __init__(
+        self,
+        sock,
+        block_size=None,
+        block_count=None,
+        frame_size=None,
+        block_timeout=None,
+    ):  # pylint: disable=too-many-arguments
+        """Switch sock to TPACKET_V3 and map its receive ring.
+        Args:
+            sock: bound PF_PACKET socket.
+            block_size (int): bytes per block.
+            block_count (int): number of blocks in the ring.
+            frame_size (int): nominal frame size, used by the kernel to size the ring.
+            block_timeout (int): ms before a partly filled block is handed to user space.
+        Raises:
+            OSError: if the kernel does not support (or permit) the ring.
+        """
+        self.sock = sock
+        self.block_size = block_size or self.DEFAULT_BLOCK_SIZE
+        self.block_count = block_count or self.DEFAULT_BLOCK_COUNT
+        frame_size = frame_size or self.DEFAULT_FRAME_SIZE
+        block_timeout = block_timeout or self.DEFAULT_BLOCK_TIMEOUT
+
+        sock.setsockopt(self.SOL_PACKET, self.PACKET_VERSION, self.TPACKET_V3)
+        request = struct.pack(
+            "=7I",
+            self.block_size,
+            self.block_count,
+            frame_size,
+            self.block_size * self.block_count // frame_size,
+            block_timeout,
+            0,  # tp_sizeof_priv
+            0,  # tp_feature_req_word
+        )
+        sock.setsockopt(self.SOL_PACKET, self.PACKET_RX_RING, request)
+        self.ring = mmap.mmap(
+            sock.fileno(),
+            self.block_size * self.block_count,
+            mmap.MAP_SHARED,
+            mmap.PROT_READ | mmap.PROT_WRITE,
+        )
+        self.view = memoryview(self.ring)
+        self.current_block = 0
+        self.held_block = None
+
+        self.blocks = 0
+        self.frames = 0
+
+    def block_offset(self, block):
+        """
+        Returns:
+            offset of block in the ring.
+        """
+        return block * self.block_size
+
+    def block_ready(self, block):
+        """
+        Returns:
+            True if the kernel has handed block over to user space.
+        """
+        status, _, _ = self.BLOCK_HEADER.unpack_from(
+            self.ring, self.block_offset(block) + self.BLOCK_STATUS_OFFSET
+        )
+        return bool(status & self.TP_STATUS_USER)
+
+    def release(self):
+        """Hand the block returned by the last receive_views() back to the kernel"""
+        if self.held_block is None:
+            return
+        struct.pack_into(
+            "=I",
+            self.ring,
+            self.block_offset(self.held_block) + self.BLOCK_STATUS_OFFSET,
+            self.TP_STATUS_KERNEL,
+        )
+        self.current_block = (self.held_block + 1) % self.block_count
+        self.held_block = None
+
+    def receive_views(self, wait=True):
+        """Receive the frames of the next block.
+        Args:
+            wait (bool): wait (without blocking the eventlet hub) for a block.
+        Returns:
+            list of memoryview, valid until the next call. Empty only if wait is False
+            and no block was ready.
+        """
+        self.release()
+        while not self.block_ready(self.current_block):
+            if not wait:
+                return []
+            trampoline(self.sock.fileno(), read=True)
+
+        block_offset = self.block_offset(self.current_block)
+        _, num_pkts, offset = self.BLOCK_HEADER.unpack_from(
+            self.ring, block_offset + self.BLOCK_STATUS_OFFSET
+        )
+        offset += block_offset
+        views = []
+        for _ in range(num_pkts):
+            next_offset, _, _, snaplen, _, _, mac, _ = self.PACKET_HEADER.unpack_from(
+                self.ring, offset
+            )
+            views.append(self.view[offset + mac : offset + mac + snaplen])
+            offset += next_offset
+
+        self.held_block = self.current_block
+        self.blocks += 1
+        self.frames += num_pkts
+        return views
+
+    def close(self):
+        """unmap the ring"""
+        self.held_block = None
+        self.view.release()
+        self.ring.close()
@@ -1,15 +1,21 @@
 """RADIUS Packets"""
 import copy
-import hashlib
-import hmac
 import struct
+from collections.abc import Mapping
 
 import binascii
-from chewie.radius_attributes import ATTRIBUTE_TYPES, Attribute, MessageAuthenticator
+from chewie.radius_attributes import (
+    ATTRIBUTE_DESCRIPTIONS,
+    ATTRIBUTE_TYPES,
+    Attribute,
+    MessageAuthenticator,
+)
+from chewie.radius_crypto import radius_crypto
 from chewie.radius_datatypes import Concat
 from chewie.utils import MessageParseError
 
 RADIUS_HEADER_LENGTH = 1 + 1 + 2 + 16
+ZERO_MESSAGE_AUTHENTICATOR = bytes(16)
 
 PACKET_TYPE_PARSERS = {}
 
@@ -43,12 +49,13 @@ class Radius:
     STATUS_CLIENT = 13
 
     @staticmethod
-    def parse(packed_message, secret, radius_lifecycle=None):
+    def parse(packed_message, secret, radius_lifecycle=None, socket_index=0):
         """
         Args:
             packed_message:
             secret (str): Shared sceret between chewie and RADIUS server.
             radius_lifecycle: RadiusLifecycle object
+            socket_index (int): the RADIUS socket packed_message was received on.
         Returns:
             RadiusPacket - RadiusAccessChallenge/RadiusAccessRequest/
                             RadiusAccessAccept/RadiusAccessFailure
@@ -63,19 +70,26 @@ class Radius:
             raise MessageParseError(
                 "Unable to unpack first 20 bytes of RADIUS header"
             ) from exception
+        if len(packed_message) < length:
+            raise MessageParseError(
+                "RADIUS packet is %d bytes, shorter than its Length %d"
+                % (len(packed_message), length)
+            )
 
         if code in PACKET_TYPE_PARSERS.keys():
             radius_packet = PACKET_TYPE_PARSERS[code](
                 packet_id,
                 authenticator,
-                RadiusAttributesList.parse(packed_message[RADIUS_HEADER_LENGTH:]),
+                RadiusAttributesList.parse(
+                    memoryview(packed_message)[RADIUS_HEADER_LENGTH:length]
+                ),
             )
             if code == Radius.ACCESS_REQUEST:
                 request_authenticator = authenticator
             else:
                 try:
-                    request_authenticator = (
-                        radius_lifecycle.packet_id_to_request_authenticator[packet_id]
+                    request_authenticator = radius_lifecycle.request_authenticator(
+                        radius_lifecycle.request_id(socket_index, packet_id)
                     )
                 except KeyError as exception:
                     raise MessageParseError(
@@ -83,7 +97,10 @@ class Radius:
                     ) from exception
             try:
                 return radius_packet.validate_packet(
-                    secret, request_authenticator=request_authenticator, code=code
+                    secret,
+                    request_authenticator=request_authenticator,
+                    code=code,
+                    packed_message=memoryview(packed_message)[:length],
                 )
             except (
                 InvalidMessageAuthenticatorError,
@@ -119,15 +136,21 @@ class RadiusPacket(Radius):
         return cls(packet_id, request_authenticator, attributes)
 
     def pack(self):
-        header = struct.pack(
+        """Packs the header and every attribute into one bytearray, sized up front.
+        Returns:
+            packed packet (bytearray)"""
+        length = RADIUS_HEADER_LENGTH + len(self.attributes)
+        self.packed = bytearray(length)
+        struct.pack_into(
             "!BBH16s",
+            self.packed,
+            0,
             self.CODE,
             self.packet_id,
-            RADIUS_HEADER_LENGTH + self.attributes.__len__(),
+            length,
             self.authenticator,
         )
-        packed_attributes = self.attributes.pack()
-        self.packed = bytearray(header + packed_attributes)
+        self.attributes.pack_into(self.packed, RADIUS_HEADER_LENGTH)
         return self.packed
 
     def build(self, secret=None):
@@ -150,93 +173,128 @@ class RadiusPacket(Radius):
             return self.packed
 
         if secret:
-            message_authenticator = bytearray(
-                hmac.new(secret.encode(), self.packed, "md5").digest()
-            )
-
-            for i in range(16):
-                self.packed[i + position] = message_authenticator[i]
+            self.packed[position : position + 16] = radius_crypto(
+                secret
+            ).message_authenticator(self.packed)
         return self.packed
 
-    def validate_packet(self, secret, request_authenticator=None, code=None):
+    def validate_packet(
+        self, secret, request_authenticator=None, code=None, packed_message=None
+    ):
         """Calculates the Response Authenticator (in Radius Header) and
         MessageAuthenticator (a Radius Attribute) hashes and compares with what was provided.
+        Both are hashed straight from the packet's bytes, with the request authenticator
+        and zeros fed to the hash in place of the fields they replace.
         Args:
             code (int): The RADIUS Code (e.g. Access-Challenge)
-            secret (str): secret shared between RADIUS and chewie.
+            secret (str or RadiusCrypto): secret shared between RADIUS and chewie.
             request_authenticator (): the original request authenticator for this
              packet (which is a response)
+            packed_message (bytes): this packet as received, packed if not given.
         Raises:
             ValueError: if secret is None or empty string.
             InvalidResponseAuthenticatorError: if Response Authenticator does not match calculated.
             InvalidMessageAuthenticatorError: if MessageAuthenticator does not match calculated.
         """
-        # Copy this packet so we can modify the 'Authenticator' and 'Message-Authenticator'
-        radius_packet = copy.deepcopy(self)
+        crypto = radius_crypto(secret)
 
-        if not secret:
-            raise ValueError("secret cannot be None for hashing")
+        if packed_message is None:
+            packed_message = RadiusPacket.pack(copy.copy(self))
+        packed_message = memoryview(packed_message)
+        if request_authenticator is None:
+            request_authenticator = packed_message[4:RADIUS_HEADER_LENGTH]
 
         self.validate_response_authenticator(
-            radius_packet, request_authenticator, secret, code
+            packed_message, request_authenticator, crypto, code
         )
 
         self.validate_message_authenticator(
-            radius_packet, secret, request_authenticator
+            packed_message, crypto, request_authenticator
         )
         return self
 
+    @staticmethod
+    def message_authenticator_position(packed_message):
+        """
+        Args:
+            packed_message (memoryview): a packed RADIUS packet
+        Returns:
+            position (bytes) of the first Message-Authenticator's value, None if there is
+            none.
+        """
+        position = RADIUS_HEADER_LENGTH
+        end = len(packed_message) - Attribute.HEADER_SIZE
+        while position <= end:
+            attribute_length = packed_message[position + 1]
+            if attribute_length < Attribute.HEADER_SIZE:
+                return None
+            if packed_message[position] == MessageAuthenticator.TYPE:
+                return position + Attribute.HEADER_SIZE
+            position += attribute_length
+        return None
+
     @staticmethod
     def validate_response_authenticator(
-        radius_packet, request_authenticator, secret, code
+        packed_message, request_authenticator, crypto, code
     ):
+        """
+        Args:
+            packed_message (memoryview): the packed response.
+            request_authenticator (bytes): of the request the packet responds to.
+            crypto (RadiusCrypto): for the secret shared between RADIUS and chewie.
+            code (int): The RADIUS Code
+        """
         if request_authenticator and code in [
             Radius.ACCESS_REJECT,
             Radius.ACCESS_ACCEPT,
             Radius.ACCESS_CHALLENGE,
         ]:
-            response_authenticator = radius_packet.authenticator
-            radius_packet.authenticator = request_authenticator
-            radius_packet.pack()
-            calculated_response_authenticator = hashlib.md5(
-                radius_packet.packed + bytearray(secret, "utf-8")
-            ).digest()
+            response_authenticator = packed_message[4:RADIUS_HEADER_LENGTH]
+            calculated_response_authenticator = crypto.response_authenticator(
+                packed_message[:4],
+                request_authenticator,
+                packed_message[RADIUS_HEADER_LENGTH:],
+            )
             if calculated_response_authenticator != response_authenticator:
                 raise InvalidResponseAuthenticatorError(
                     "Original ResponseAuthenticator: '%s', does not match calculated: '%s' %s"
                     % (
-                        response_authenticator,
+                        bytes(response_authenticator),
                         calculated_response_authenticator,
-                        binascii.hexlify(radius_packet.packed),
+                        binascii.hexlify(packed_message),
                     )
                 )
 
     @staticmethod
-    def validate_message_authenticator(radius_packet, secret, request_authenticator):
-        message_authenticator = radius_packet.attributes.find(
-            MessageAuthenticator.DESCRIPTION
+    def validate_message_authenticator(packed_message, crypto, request_authenticator):
+        """
+        Args:
+            packed_message (memoryview): the packed packet.
+            crypto (RadiusCrypto): for the secret shared between RADIUS and chewie.
+            request_authenticator (bytes): of the request, if the packet is a response.
+        """
+        position = RadiusPacket.message_authenticator_position(packed_message)
+        if position is None:
+            return
+        original_ma = packed_message[position : position + 16]
+
+        # hash the packet as it was signed, with the request authenticator in the header
+        # and a zeroed Message-Authenticator.
+        new_ma = crypto.message_authenticator(
+            packed_message[:4],
+            request_authenticator,
+            packed_message[RADIUS_HEADER_LENGTH:position],
+            ZERO_MESSAGE_AUTHENTICATOR,
+            packed_message[position + 16 :],
         )
-        if message_authenticator:
-            radius_packet.authenticator = request_authenticator
 
-            original_ma = message_authenticator.bytes_data
-            # Replace the Original Message Authenticator
-            message_authenticator.bytes_data = bytes.fromhex(
-                "00000000000000000000000000000000"
+        # compare old and new message authenticator
+        if original_ma != new_ma:
+            raise InvalidMessageAuthenticatorError(
+                "Original Message-Authenticator: '%s', does not match calculated: '%s'"
+                % (binascii.hexlify(original_ma), binascii.hexlify(new_ma))
             )
 
-            radius_packet.pack()
-
-            # calculate new hash message authenticator
-            new_ma = hmac.new(secret.encode(), radius_packet.packed, "md5").digest()
-
-            # compare old and new message authenticator
-            if original_ma != new_ma:
-                raise InvalidMessageAuthenticatorError(
-                    "Original Message-Authenticator: '%s', does not match calculated: '%s'"
-                    % (binascii.hexlify(original_ma), binascii.hexlify(new_ma))
-                )
-
 
 @register_packet_type_parser
 class RadiusAccessRequest(RadiusPacket):
@@ -258,113 +316,267 @@ class RadiusAccessChallenge(RadiusPacket):
     CODE = Radius.ACCESS_CHALLENGE
 
 
+class RadiusStatusServer(RadiusPacket):
+    """Only sent (RFC 5997), a RADIUS server answers it with an Access-Accept"""
+
+    CODE = Radius.STATUS_SERVER
+
+
 class RadiusAttributesList:
-    """Container class for the Radius Attribute Value Pairs"""
+    """Container class for the Radius Attribute Value Pairs.
+
+    The position of each attribute type and the byte offset of each attribute are
+    indexed on first use. Change the list through append() or by assigning attributes,
+    or call invalidate() after changing it (or an attribute's length) in place.
+    """
 
     def __init__(self, attributes):
+        self.positions = None  # type: indexes into attributes
+        self.offsets = None  # byte offset of each attribute
+        self.total_length = None
         self.attributes = attributes
 
+    @property
+    def attributes(self):
+        """list of Attribute"""
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, attributes):
+        self._attributes = attributes
+        self.invalidate()
+
+    def append(self, attribute):
+        """Add attribute to the end of the list"""
+        self._attributes.append(attribute)
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget the index, it is rebuilt when next needed"""
+        self.positions = None
+        self.offsets = None
+        self.total_length = None
+
+    def index_attributes(self):
+        """Index the positions of each attribute type, and the byte offsets"""
+        if self.positions is not None:
+            return
+        positions = {}
+        offsets = []
+        offset = 0
+        for i, attr in enumerate(self._attributes):
+            positions.setdefault(attr.TYPE, []).append(i)
+            offsets.append(offset)
+            offset += attr.full_length()
+        self.offsets = offsets
+        self.total_length = offset
+        self.positions = positions
+
+    def indexes_of(self, item):
+        """
+        Args:
+            item (str): description of attribute.
+        Returns:
+            list of the positions of attributes with description item (empty if none)
+        """
+        attribute_type = ATTRIBUTE_DESCRIPTIONS.get(item)
+        if attribute_type is None:
+            return []
+        self.index_attributes()
+        return self.positions.get(attribute_type.TYPE, [])
+
     @classmethod
     def parse(cls, attributes_data):
         """
-
         Args:
-            attributes_data:
-
+            attributes_data (bytes or memoryview): the packed attributes, which must not
+                change while the returned list is in use.
         Returns:
-            RadiusAttributeList
+            ParsedRadiusAttributesList
         Raises:
             MessageParseError: if unable to parse an attribute's data.
         """
-        attributes = []
-        attributes_to_concat = {}
-        cls.extract_attributes(attributes_data, attributes, attributes_to_concat)
-
-        attributes = cls.merge_concat_attributes(attributes, attributes_to_concat)
+        return ParsedRadiusAttributesList(attributes_data)
 
-        return cls(attributes)
+    def find(self, item):
+        """Find first attribute that has the matching description
+        Args:
+            item (str): description of attribute to find
+        Returns:
+            attribute or None if not found"""
+        indexes = self.indexes_of(item)
+        if not indexes:
+            return None
+        return self._attributes[indexes[0]]
 
-    @classmethod
-    def merge_concat_attributes(cls, attributes, attributes_to_concat):
+    def find_all(self, item):
         """
-        Removes concat attributes for attributes list, and inserts a single new master attribute
-        for all concat attributes of the same type (e.g. EAPMessage, EAPMessage, = 1 EAPMessage)
         Args:
-            attributes (list):
-            attributes_to_concat (dict): attribute - position.
+            item (str): description of attributes to find
         Returns:
-            attributes (list)
+            list of every attribute that has the matching description"""
+        return [self._attributes[i] for i in self.indexes_of(item)]
+
+    def indexof(self, item):
+        """Finds the position (number of bytes) that item is at in list.
+        Args:
+            item (str): description of attribute to find index of.
+        Returns:
+            int - number of bytes to item.
         Raises:
-            MessageParseError: RadiusAttribute.parse will raise error
-            if it cannot parse the attribute's data
+            ValueErrpr: if cannot find item
         """
-        # Join Attributes that's datatype is Concat into one attribute.
-        concatenated_attributes = []
-        for value, list_ in attributes_to_concat.items():
-            concatenated_data = b""
-            for d, i in list_:
-                concatenated_data += d.bytes_data
-            concatenated_attributes.append(
-                tuple((ATTRIBUTE_TYPES[value].parse(concatenated_data), i))
-            )
-        # Remove old Attributes that were concatenated.
-        for ca, _ in concatenated_attributes:
-            attributes = [x for x in attributes if x.TYPE != ca.TYPE]
+        indexes = self.indexes_of(item)
+        if not indexes:
+            raise ValueError("Cannot find item: %s in attributes list" % item)
+        return self.offsets[indexes[0]]
 
-        # need to put them back in the same position.
-        for ca, i in concatenated_attributes:
-            attributes.insert(i, ca)
+    def __len__(self):
+        self.index_attributes()
+        return self.total_length
 
-        return attributes
+    def pack(self):
+        packed = bytearray(len(self))
+        self.pack_into(packed, 0)
+        return bytes(packed)
 
-    @classmethod
-    def extract_attributes(cls, attributes_data, attributes, attributes_to_concat):
+    def pack_into(self, buffer, offset):
+        """Write every attribute into buffer.
+        Args:
+            buffer (bytearray): at least len(self) bytes from offset.
+            offset (int): where the first attribute starts.
+        Returns:
+            offset just after the last attribute.
+        """
+        for attr in self._attributes:
+            offset = attr.pack_into(buffer, offset)
+        return offset
+
+    def to_dict(self):
+        ret = {}
+        for a in self.attributes:
+            ret[a.DESCRIPTION] = a.data()
+        return ret
+
+
+class ParsedRadiusAttributesList(RadiusAttributesList):
+    """The attributes of a received packet, decoded only when asked for.
+
+    Parsing walks the packed attributes once, recording each one's (type, offset,
+    length). find(), to_dict() and attributes decode from the packed bytes on first
+    use, so a reply whose attributes are mostly unread costs little more than the walk.
+    Attribute types without a registered Attribute class are skipped. The list is read
+    only.
+    """
+
+    def __init__(self, attributes_data):  # pylint: disable=super-init-not-called
         """
-        Extracts Radius Attributes from a packed payload.
-        Keeps track of attribute ordering.
         Args:
-            attributes_data (): data to extract from (input).
-            attributes: attributes extracted (output variable).
-            attributes_to_concat (dict): (output variable).
+            attributes_data (bytes or memoryview): the packed attributes.
+        Raises:
+            MessageParseError: if an attribute's header or length is malformed.
+        """
+        self.attributes_data = memoryview(attributes_data)
+        self.entries = None  # (type, offset, length) of each known attribute
+        self.positions = None  # type: indexes into entries
+        self.decoded = {}  # index into entries: Attribute
+        self._attributes = None
+        self.index_attributes()
+
+    def index_attributes(self):
+        """Record the type, offset and length of each attribute, checking the lengths
+        of those that will be decoded.
         Raises:
-            MessageParseError: RadiusAttribute.parse will raise error
-            if it cannot parse the attribute's data
+            MessageParseError: if an attribute's header or length is malformed.
         """
-        total_length = len(attributes_data)
+        if self.positions is not None:
+            return
+        data = self.attributes_data
+        total_length = len(data)
+        entries = []
+        positions = {}
         pos = 0
-        index = -1
-        last_attribute = -1
         while pos < total_length:
-            try:
-                type_, attr_length = struct.unpack(
-                    "!BB", attributes_data[pos : pos + Attribute.HEADER_SIZE]
-                )
-            except struct.error as exception:
+            if pos + Attribute.HEADER_SIZE > total_length:
                 raise MessageParseError(
                     "Unable to unpack first 2 bytes of attribute header"
-                ) from exception
-            data = attributes_data[pos + Attribute.HEADER_SIZE : pos + attr_length]
+                )
+            type_ = data[pos]
+            attr_length = data[pos + 1]
+            if attr_length < Attribute.HEADER_SIZE or pos + attr_length > total_length:
+                raise MessageParseError(
+                    "RADIUS attribute %s has invalid length %d" % (type_, attr_length)
+                )
+            attribute_type = ATTRIBUTE_TYPES.get(type_)
+            if attribute_type is not None:
+                data_type = attribute_type.DATA_TYPE
+                value_length = attr_length - Attribute.HEADER_SIZE
+                if data_type is not Concat and not (
+                    data_type.MIN_DATA_LENGTH
+                    <= value_length
+                    <= data_type.MAX_DATA_LENGTH
+                ):
+                    raise MessageParseError("%s unable to unpack." % data_type.__name__)
+                positions.setdefault(type_, []).append(len(entries))
+                entries.append((type_, pos, attr_length))
             pos += attr_length
+        self.entries = entries
+        self.positions = positions
 
-            packed_value = data[: attr_length - Attribute.HEADER_SIZE]
-            try:
-                attribute = ATTRIBUTE_TYPES[type_].parse(packed_value)
-            except KeyError as exception:
-                raise MessageParseError(
-                    "Cannot find parser for RADIUS attribute %s" % type_
-                ) from exception
-            # keep track of where the concated AVP should be in the attributes list.
-            # required so the hashing gives correct hash.
-            if attribute.DATA_TYPE != Concat or last_attribute != attribute.TYPE:
-                index += 1
-            last_attribute = attribute.TYPE
+    def value(self, index):
+        """
+        Returns:
+            the packed value (memoryview) of entries[index]
+        """
+        _, offset, length = self.entries[index]
+        return self.attributes_data[offset + Attribute.HEADER_SIZE : offset + length]
 
-            if attribute.DATA_TYPE.DATA_TYPE_VALUE == Concat.DATA_TYPE_VALUE:
-                if attribute.TYPE not in attributes_to_concat:
-                    attributes_to_concat[attribute.TYPE] = []
-                attributes_to_concat[attribute.TYPE].append((attribute, index))
+    def decode(self, type_, last=False):
+        """
+        Args:
+            type_ (int): attribute type.
+            last (bool): decode the last attribute of type_ rather than the first.
+        Returns:
+            Attribute, with the values of every attribute of a Concat type joined.
+            None if there is no attribute of type_.
+        """
+        indexes = self.positions.get(type_)
+        if not indexes:
+            return None
+        attribute_type = ATTRIBUTE_TYPES[type_]
+        if attribute_type.DATA_TYPE is not Concat:
+            return self.attribute_at(indexes[-1] if last else indexes[0])
+        attribute = self.decoded.get(indexes[0])
+        if attribute is None:
+            attribute = attribute_type.parse(
+                b"".join(self.value(index) for index in indexes)
+            )
+            self.decoded[indexes[0]] = attribute
+        return attribute
 
-            attributes.append(attribute)
+    def attribute_at(self, index):
+        """
+        Returns:
+            Attribute, entries[index] decoded on its own
+        """
+        attribute = self.decoded.get(index)
+        if attribute is None:
+            attribute = ATTRIBUTE_TYPES[self.entries[index][0]].parse(self.value(index))
+            self.decoded[index] = attribute
+        return attribute
+
+    @property
+    def attributes(self):
+        """Every known attribute decoded, in order, Concat attributes joined where the
+        first of them was"""
+        if self._attributes is None:
+            self._attributes = []
+            for index, (type_, _, _) in enumerate(self.entries):
+                if ATTRIBUTE_TYPES[type_].DATA_TYPE is not Concat:
+                    self._attributes.append(self.attribute_at(index))
+                elif self.positions[type_][0] == index:
+                    self._attributes.append(self.decode(type_))
+        return self._attributes
 
     def find(self, item):
         """Find first attribute that has the matching description
@@ -372,10 +584,24 @@ class RadiusAttributesList:
             item (str): description of attribute to find
         Returns:
             attribute or None if not found"""
-        for attr in self.attributes:
-            if item == attr.DESCRIPTION:
-                return attr
-        return None
+        attribute_type = ATTRIBUTE_DESCRIPTIONS.get(item)
+        if attribute_type is None:
+            return None
+        return self.decode(attribute_type.TYPE)
+
+    def find_all(self, item):
+        """
+        Args:
+            item (str): description of attributes to find
+        Returns:
+            list of every attribute that has the matching description, a Concat
+            type's joined into one"""
+        indexes = self.indexes_of(item)
+        if not indexes:
+            return []
+        if ATTRIBUTE_TYPES[self.entries[indexes[0]][0]].DATA_TYPE is Concat:
+            return [self.decode(self.entries[indexes[0]][0])]
+        return [self.attribute_at(i) for i in indexes]
 
     def indexof(self, item):
         """Finds the position (number of bytes) that item is at in list.
@@ -384,31 +610,70 @@ class RadiusAttributesList:
         Returns:
             int - number of bytes to item.
         Raises:
-            ValueErrpr: if cannot find item
+            ValueError: if cannot find item
         """
-        i = 0
-        for attr in self.attributes:
-            if item == attr.DESCRIPTION:
-                break
-            i += attr.full_length()
-        else:
+        indexes = self.indexes_of(item)
+        if not indexes:
             raise ValueError("Cannot find item: %s in attributes list" % item)
-        return i
+        return self.entries[indexes[0]][1]
 
     def __len__(self):
-        total = 0
-        for attr in self.attributes:
-            total = total + attr.full_length()
-        return total
+        return len(self.attributes_data)
 
     def pack(self):
-        packed_attributes = bytes()
-        for attr in self.attributes:
-            packed_attributes += attr.pack()
-        return packed_attributes
+        return bytes(self.attributes_data)
+
+    def pack_into(self, buffer, offset):
+        end = offset + len(self.attributes_data)
+        buffer[offset:end] = self.attributes_data
+        return end
 
     def to_dict(self):
-        ret = {}
-        for a in self.attributes:
-            ret[a.DESCRIPTION] = a.data()
-        return ret
+        return ParsedRadiusAttributesDict(self)
+
+
+class ParsedRadiusAttributesDict(Mapping):
+    """Description: data() of a ParsedRadiusAttributesList's attributes, decoded on
+    lookup. The last attribute of a type wins, as with RadiusAttributesList.to_dict().
+    Pickles (and compares) as a dict."""
+
+    def __init__(self, attributes_list):
+        self.attributes_list = attributes_list
+
+    def attribute(self, description):
+        """
+        Returns:
+            the last Attribute with description, None if there is none
+        """
+        attribute_type = ATTRIBUTE_DESCRIPTIONS.get(description)
+        if attribute_type is None:
+            return None
+        return self.attributes_list.decode(attribute_type.TYPE, last=True)
+
+    def __getitem__(self, description):
+        attribute = self.attribute(description)
+        if attribute is None:
+            raise KeyError(description)
+        return attribute.data()
+
+    def __contains__(self, key):
+        return self.attribute(key) is not None
+
+    def get(self, key, default=None):
+        attribute = self.attribute(key)
+        if attribute is None:
+            return default
+        return attribute.data()
+
+    def __iter__(self):
+        for type_ in self.attributes_list.positions:
+            yield ATTRIBUTE_TYPES[type_].DESCRIPTION
+
+    def __len__(self):
+        return len(self.attributes_list.positions)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
@@ -2,13 +2,12 @@
 # TODO if attributes have requirements e.g. length must be above minimum, can enforce that here.
 # TODO could we auto generate this from the radius-types-2.csv available from iana.org?
 
-import struct
-from hashlib import md5
-
 import math
+from chewie.radius_crypto import radius_crypto
 from chewie.radius_datatypes import Concat, Enum, Integer, String, Text, Vsa
 
 ATTRIBUTE_TYPES = {}
+ATTRIBUTE_DESCRIPTIONS = {}
 
 # TODO Fix Class Docstrings
 
@@ -52,9 +51,19 @@ class Attribute:
         Returns:
             packed attribute (including header) bytes
         """
-        tl = struct.pack("!BB", self.TYPE, self.full_length())
-        v = self._data_type.pack(self.TYPE)
-        return tl + v
+        packed = bytearray(self.full_length())
+        self.pack_into(packed, 0)
+        return bytes(packed)
+
+    def pack_into(self, buffer, offset):
+        """Write the packed attribute (including header) into buffer.
+        Args:
+            buffer (bytearray): at least full_length() bytes from offset.
+            offset (int): where the attribute starts.
+        Returns:
+            offset just after the attribute.
+        """
+        return self._data_type.pack_into(buffer, offset, self.TYPE)
 
     def full_length(self):
         """
@@ -75,9 +84,42 @@ class Attribute:
         self._data_type.bytes_data = value
 
 
+class PackedAttribute:
+    """An Attribute packed once, to be sent unchanged in many packets"""
+
+    def __init__(self, attribute):
+        """
+        Args:
+            attribute (Attribute): the attribute to pack.
+        """
+        self.attribute = attribute
+        self.TYPE = attribute.TYPE  # pylint: disable=invalid-name
+        self.DESCRIPTION = attribute.DESCRIPTION  # pylint: disable=invalid-name
+        self.packed = attribute.pack()
+
+    def pack(self):
+        return self.packed
+
+    def pack_into(self, buffer, offset):
+        end = offset + len(self.packed)
+        buffer[offset:end] = self.packed
+        return end
+
+    def full_length(self):
+        return len(self.packed)
+
+    def data(self):
+        return self.attribute.data()
+
+    @property
+    def bytes_data(self):
+        return self.attribute.bytes_data
+
+
 def register_attribute_type(cls):
     """Decoratot to register RADIUS attribute types"""
     ATTRIBUTE_TYPES[cls.TYPE] = cls
+    ATTRIBUTE_DESCRIPTIONS[cls.DESCRIPTION] = cls
     return cls
 
 
@@ -106,8 +148,7 @@ class UserPassword(Attribute):
         def string_pop(s, length):
             return s[:length], s[length:]
 
-        if isinstance(secret, str):
-            secret = secret.encode()
+        crypto = radius_crypto(secret)
 
         if isinstance(req_authenticator, int):
             req_authenticator = req_authenticator.to_bytes(16, "big")
@@ -117,7 +158,7 @@ class UserPassword(Attribute):
 
         padded_width = math.ceil(len(password) / BASE) * BASE
         padded_password = password.ljust(padded_width, chr(0)).encode()
-        b_sec = md5(secret + req_authenticator).digest()
+        b_sec = crypto.secret_md5(req_authenticator)
 
         while len(padded_password) > 0:
             p_sec, padded_password = string_pop(padded_password, BASE)
@@ -125,7 +166,7 @@ class UserPassword(Attribute):
             c_sec = bytes(cipher_array)
             ciphertext += c_sec
 
-            b_sec = md5(secret + c_sec).digest()
+            b_sec = crypto.secret_md5(c_sec)
 
         return ciphertext
 
@@ -134,15 +175,14 @@ class UserPassword(Attribute):
         def string_pop(s, length):
             return s[:length], s[length:]
 
-        if isinstance(secret, str):
-            secret = secret.encode()
+        crypto = radius_crypto(secret)
 
         if isinstance(req_authenticator, int):
             req_authenticator = req_authenticator.to_bytes(16, "big")
 
         BASE = 16
         cleartext = ""
-        b_sec = md5(secret + req_authenticator).digest()
+        b_sec = crypto.secret_md5(req_authenticator)
 
         while len(ciphertext) > 0:
             c_sec, ciphertext = string_pop(ciphertext, BASE)
@@ -150,7 +190,7 @@ class UserPassword(Attribute):
             p_sec = bytes(pass_array)
             cleartext += p_sec.decode("ascii")
 
-            b_sec = md5(secret + c_sec).digest()
+            b_sec = crypto.secret_md5(c_sec)
         return cleartext.strip("\0")
 
 
@@ -317,11 +357,6 @@ class EAPMessage(Attribute):
     DATA_TYPE = Concat
     DESCRIPTION = "EAP-Message"
 
-    def pack(self):
-        """Concat types need to override AttributeType.pack().
-        as Concat.pack() may return multiple packed AVP (each with their own length)"""
-        return self._data_type.pack(self.TYPE)
-
     # NOTE: Delayed imports are to avoid circular dependency chain.
     # Should be refactored out when possible but will need to redesign the message_parser module.
     @classmethod
@@ -0,0 +1,220 @@
+"""Send RADIUS requests and hand their validated replies to whatever waits on them"""
+import itertools
+
+from eventlet import sleep
+from eventlet.event import Event
+
+from chewie.message_parser import MessageParser
+from chewie.radius import RadiusPacket
+from chewie.radius_in_flight import RadiusIdsExhausted, RadiusRequestTimeout
+from chewie.utils import MessageParseError
+
+
+class RadiusClient:
+    """Sends RADIUS requests and matches their replies.
+
+    Request ids, retransmission, failover to another server and Status-Server probes
+    of dead servers are all handled here, over the request ids and servers of a
+    RadiusLifecycle. A request is a RadiusQueueMessage (packed for whichever server
+    it goes to) or a RadiusPacket. request() returns an eventlet Event that is sent
+    the validated reply, or RadiusRequestTimeout; as many requests can wait at once
+    as the lifecycle has request ids (256 per RADIUS socket). Requests sent with
+    send() have their replies passed to reply_handler instead, which is how Chewie
+    drives its state machines.
+    """
+
+    def __init__(
+        self,
+        radius_lifecycle,
+        send_datagram,
+        timer_scheduler,
+        logger,
+        reply_handler=None,
+        timeout_handler=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Args:
+            radius_lifecycle (RadiusLifecycle):
+            send_datagram (callable): (socket_index, packed request, RadiusServer) to
+                send a request from the RADIUS socket socket_index.
+            timer_scheduler (TimerScheduler): to schedule retransmissions and probes.
+            logger (Logger):
+            reply_handler (callable): (radius, socket_index) for each valid reply to a
+                request sent with send(). It completes the request (see
+                RadiusLifecycle.complete_request) once done with its InFlightRequest.
+                If None, those replies are dropped.
+            timeout_handler (callable): (src_mac, port_id) when a request sent with
+                send() goes unanswered by every server, or expires.
+        """
+        self.radius_lifecycle = radius_lifecycle
+        self.send_datagram = send_datagram
+        self.timer_scheduler = timer_scheduler
+        self.logger = logger
+        self.reply_handler = reply_handler
+        self.timeout_handler = timeout_handler
+        # RadiusPackets have no session of their own, each gets a port_id from here.
+        self.packet_sessions = itertools.count()
+
+    def request(self, message, server=None):
+        """Send a request, and return what its reply will be sent to.
+        Args:
+            message (RadiusQueueMessage or RadiusPacket): the request.
+            server (RadiusServer): where to send it, defaults to the pool's choice.
+        Returns:
+            Event, sent the validated reply (RadiusPacket) or RadiusRequestTimeout.
+        Raises:
+            RadiusIdsExhausted: if every request id is waiting for a reply.
+        """
+        reply_event = Event()
+        self.send(message, server, reply_event)
+        return reply_event
+
+    def send(self, message, server=None, reply_event=None):
+        """Pack and send a request, and time its reply.
+        Args:
+            message (RadiusQueueMessage or RadiusPacket): the request.
+            server (RadiusServer): where to send it, defaults to the pool's choice.
+            reply_event (Event): sent the reply, reply_handler gets it if None.
+        Returns:
+            InFlightRequest
+        Raises:
+            RadiusIdsExhausted: if every request id is waiting for a reply.
+        """
+        radius_lifecycle = self.radius_lifecycle
+        if isinstance(message, RadiusPacket):
+            src_mac, port_id = type(self).__name__, next(self.packet_sessions)
+            socket_index, packed_message = radius_lifecycle.process_outbound_packet(
+                message, src_mac, port_id, server
+            )
+        else:
+            src_mac, port_id = message.src_mac, message.port_mac
+            socket_index, packed_message = radius_lifecycle.process_outbound(
+                message, server
+            )
+        request = radius_lifecycle.in_flight_request(src_mac, port_id)
+        request.reply_event = reply_event
+        self.send_datagram(socket_index, packed_message, request.server)
+        self.schedule_retransmit(request)
+        return request
+
+    def schedule_retransmit(self, request):
+        """Send request again if its reply has not arrived in time
+        Args:
+            request (InFlightRequest): the request just sent.
+        """
+        request.retransmit_job = self.timer_scheduler.call_later(
+            self.radius_lifecycle.retransmit_delay(request),
+            self.retransmit,
+            request,
+        )
+
+    def retransmit(self, request):
+        """Resend the same datagram for a request still waiting for a reply (or send it
+        to another server), or give up on it once no server is left to try or it has
+        expired. Answered and superseded requests are left alone."""
+        # still set if the request was freed, so only send() requests have none.
+        reply_event = request.reply_event
+        try:
+            retransmission = self.radius_lifecycle.retransmit(request)
+        except RadiusRequestTimeout as exception:
+            self.logger.warning("RADIUS request timed out: %s", exception)
+            if reply_event is None and self.timeout_handler is not None:
+                self.timeout_handler(request.src_mac, request.port_id)
+            retransmission = None
+        self.schedule_probe(request.server)
+        if retransmission is None:
+            return
+        self.logger.info(
+            "retransmitting RADIUS request %d (%d) to %s",
+            retransmission.request_id,
+            retransmission.retransmits,
+            retransmission.server.name,
+        )
+        self.send_datagram(
+            retransmission.socket_index, retransmission.packed, retransmission.server
+        )
+        self.schedule_retransmit(retransmission)
+
+    def schedule_probe(self, server):
+        """Probe a dead server with Status-Server until it is revived. A lone server
+        is not probed, it still gets every request."""
+        servers = self.radius_lifecycle.servers
+        if server is None or not server.dead or server.probe_job is not None:
+            return
+        if len(servers) < 2:
+            return
+        server.probe_job = self.timer_scheduler.call_later(
+            servers.probe_interval, self.probe_server, server
+        )
+
+    def probe_server(self, server):
+        """Send a Status-Server to a dead server"""
+        server.probe_job = None
+        if not server.dead:
+            self.logger.info("RADIUS server %s is alive again", server.name)
+            return
+        try:
+            socket_index, packed_message = self.radius_lifecycle.status_server_request(
+                server
+            )
+        except RadiusIdsExhausted as exception:
+            self.logger.warning("Not probing RADIUS server: %s", exception)
+        else:
+            self.logger.info("probing dead RADIUS server %s", server.name)
+            self.send_datagram(socket_index, packed_message, server)
+        self.schedule_probe(server)
+
+    def receive(self, packed_message, socket_index=0):
+        """Validate a received RADIUS packet and hand it to what is waiting for it.
+        Args:
+            packed_message (bytes): as received.
+            socket_index (int): the RADIUS socket it was received on.
+        """
+        radius_lifecycle = self.radius_lifecycle
+        secret = radius_lifecycle.reply_secret(socket_index, packed_message)
+        try:
+            radius = MessageParser.radius_parse(
+                packed_message, secret, radius_lifecycle, socket_index
+            )
+        except MessageParseError as exception:
+            radius_lifecycle.reply_invalid(socket_index, packed_message)
+            self.logger.warning(
+                "MessageParser.radius_parse threw exception.\n"
+                " packed_message: '%s'.\n"
+                " exception: '%s'.",
+                packed_message,
+                exception,
+            )
+            return
+        self.logger.info("Received RADIUS message: %s", str(radius))
+
+        request_id = radius_lifecycle.request_id(socket_index, radius.packet_id)
+        request = radius_lifecycle.in_flight.get(request_id)
+        if request is not None and request.is_probe:
+            self.logger.info("RADIUS server %s answered Status-Server", request.port_id)
+            radius_lifecycle.complete_request(request_id)
+            return
+        if request is not None and request.reply_event is not None:
+            # answered, so the id can be reused (and duplicate replies are dropped).
+            radius_lifecycle.complete_request(request_id)
+            request.reply_event.send(radius)
+            request.reply_event = None
+            return
+        if self.reply_handler is None:
+            self.logger.warning(
+                "no reply_handler, dropping RADIUS reply %d", request_id
+            )
+            radius_lifecycle.complete_request(request_id)
+            return
+        self.reply_handler(radius, socket_index)
+
+    def receive_from(self, radius_socket, socket_index=0):
+        """Receive and handle RADIUS packets from a RADIUS socket forever.
+        Args:
+            radius_socket (RadiusSocket): the socket socket_index.
+            socket_index (int):
+        """
+        while True:
+            sleep(0)
+            for packed_message in radius_socket.receive_batch():
+                self.receive(packed_message, socket_index)
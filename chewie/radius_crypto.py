@@ -0,0 +1,80 @@
+"""MD5 and HMAC-MD5 keyed with a RADIUS shared secret, set up once per secret"""
+import functools
+import hashlib
+import hmac
+
+
+class RadiusCrypto:
+    """The hashes a RADIUS shared secret keys.
+
+    HMAC-MD5 (Message-Authenticator, RFC 3579) is keyed once: the hmac object holding
+    the secret's inner and outer pads is copied for each packet rather than rebuilt.
+    MD5 over the secret followed by data (User-Password hiding, RFC 2865 5.2) copies the
+    MD5 state after the secret. The Response Authenticator hashes the secret last, so it
+    only reuses the encoded secret.
+    """
+
+    __slots__ = ("secret", "secret_bytes", "hmac_md5", "md5_secret")
+
+    def __init__(self, secret):
+        """
+        Args:
+            secret (str or bytes): secret shared between RADIUS and chewie.
+        """
+        self.secret = secret
+        if isinstance(secret, str):
+            secret = secret.encode()
+        self.secret_bytes = bytes(secret)
+        self.hmac_md5 = hmac.new(self.secret_bytes, digestmod="md5")
+        self.md5_secret = hashlib.md5(self.secret_bytes)
+
+    def message_authenticator(self, *chunks):
+        """
+        Returns:
+            HMAC-MD5 of the concatenated chunks (bytes)
+        """
+        mac = self.hmac_md5.copy()
+        for chunk in chunks:
+            mac.update(chunk)
+        return mac.digest()
+
+    def response_authenticator(self, *chunks):
+        """
+        Returns:
+            MD5 of the concatenated chunks followed by the secret (bytes)
+        """
+        md5 = hashlib.md5()
+        for chunk in chunks:
+            md5.update(chunk)
+        md5.update(self.secret_bytes)
+        return md5.digest()
+
+    def secret_md5(self, data):
+        """
+        Returns:
+            MD5 of the secret followed by data (bytes)
+        """
+        md5 = self.md5_secret.copy()
+        md5.update(data)
+        return md5.digest()
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_radius_crypto(secret):
+    return RadiusCrypto(secret)
+
+
+def radius_crypto(secret):
+    """The RadiusCrypto for secret, made on first use.
+    Args:
+        secret (str, bytes or RadiusCrypto):
+    Returns:
+        RadiusCrypto
+    Raises:
+        ValueError: if secret is None or empty.
+    """
+    if isinstance(secret, RadiusCrypto):
+        return secret
+    if not secret:
+        raise ValueError("secret cannot be None for hashing")
+    return _cached_radius_crypto(secret)
@@ -22,6 +22,21 @@ class DataType:
     def pack(self, attribute_type):
         return
 
+    def pack_into(self, buffer, offset, attribute_type):
+        """Write the whole attribute (type, length and value) into buffer.
+        Args:
+            buffer (bytearray): at least full_length() bytes from offset.
+            offset (int): where the attribute starts.
+            attribute_type (int): the attribute's type.
+        Returns:
+            offset just after the attribute.
+        """
+        value = self.pack(attribute_type)
+        length = self.full_length()
+        struct.pack_into("!BB", buffer, offset, attribute_type, length)
+        buffer[offset + self.AVP_HEADER_LEN : offset + length] = value
+        return offset + length
+
     def data(self):
         """Subclass should override this as needed.
         Returns:
@@ -191,7 +206,7 @@ class String(DataType):
 
 
 class Concat(DataType):
-    """AttributeTypes that use Concat must override their pack()"""
+    """Data longer than MAX_DATA_LENGTH, split over several AVPs of the same type"""
 
     DATA_TYPE_VALUE = 6
 
@@ -217,27 +232,20 @@ class Concat(DataType):
             ) from exception
 
     def pack(self, attribute_type):
-        def chunks(data):
-            length = self.MAX_DATA_LENGTH
-            list_length = len(data)
-            return_chunks = []
-            for i in range(0, list_length, self.MAX_DATA_LENGTH):
-                if i + self.MAX_DATA_LENGTH > list_length:
-                    length = list_length % self.MAX_DATA_LENGTH
-
-                chunk = data[i : i + length]
-                chunk_length = len(chunk)
-                packed = struct.pack(
-                    "!BB%ds" % chunk_length,
-                    attribute_type,
-                    chunk_length + self.AVP_HEADER_LEN,
-                    chunk,
-                )
-                return_chunks.append(packed)
-            return return_chunks
-
-        packed = b"".join(chunks(self.bytes_data))
-        return packed
+        packed = bytearray(self.full_length())
+        self.pack_into(packed, 0, attribute_type)
+        return bytes(packed)
+
+    def pack_into(self, buffer, offset, attribute_type):
+        """Writes one AVP for every MAX_DATA_LENGTH bytes of data"""
+        data = memoryview(self.bytes_data)
+        for i in range(0, len(data), self.MAX_DATA_LENGTH):
+            chunk = data[i : i + self.MAX_DATA_LENGTH]
+            chunk_end = offset + self.AVP_HEADER_LEN + len(chunk)
+            struct.pack_into("!BB", buffer, offset, attribute_type, chunk_end - offset)
+            buffer[offset + self.AVP_HEADER_LEN : chunk_end] = chunk
+            offset = chunk_end
+        return offset
 
     def data(self):
         return self.bytes_data
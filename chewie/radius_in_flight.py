@@ -0,0 +1,291 @@
+"""Table of the RADIUS requests waiting for a reply"""
+import time
+from collections import deque
+
+
+class RadiusIdsExhausted(Exception):
+    """Every (socket, RADIUS packet ID) pair is waiting for a reply"""
+
+    pass
+
+
+class RadiusRequestTimeout(Exception):
+    """A RADIUS request went unanswered through all its retransmissions"""
+
+    pass
+
+
+class RoundTripTimes:
+    """Round trip times smoothed as RFC 6298 does for TCP"""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self.min_rtt = None
+        self.max_rtt = None
+
+    def add_sample(self, rtt):
+        """Update the smoothed round trip time and its variation"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+            self.min_rtt = self.max_rtt = rtt
+            return
+        self.rttvar += self.BETA * (abs(self.srtt - rtt) - self.rttvar)
+        self.srtt += self.ALPHA * (rtt - self.srtt)
+        self.min_rtt = min(self.min_rtt, rtt)
+        self.max_rtt = max(self.max_rtt, rtt)
+
+    def stats(self):
+        """
+        Returns:
+            dict of round trip times (seconds, None until the first sample)
+        """
+        return {
+            "srtt": self.srtt,
+            "rttvar": self.rttvar,
+            "min_rtt": self.min_rtt,
+            "max_rtt": self.max_rtt,
+        }
+
+
+class InFlightRequest:  # pylint: disable=too-few-public-methods
+    """A RADIUS request waiting for its reply"""
+
+    __slots__ = (
+        "request_id",
+        "src_mac",
+        "port_id",
+        "request_authenticator",
+        "sent_at",
+        "server",
+        "message",
+        "servers_tried",
+        "socket_index",
+        "packed",
+        "retransmits",
+        "retransmit_job",
+        "reply_event",
+        "expired",
+    )
+
+    def __init__(
+        self, request_id, src_mac, port_id, request_authenticator, sent_at, server=None
+    ):  # pylint: disable=too-many-arguments
+        self.request_id = request_id
+        self.src_mac = src_mac
+        self.port_id = port_id
+        self.request_authenticator = request_authenticator
+        self.sent_at = sent_at
+        self.server = server
+        # what was packed, so it can be packed again for another server
+        self.message = None
+        self.servers_tried = (server,)
+        # the datagram as sent, so retransmissions are identical (RFC 5080 2.2.1)
+        self.socket_index = None
+        self.packed = None
+        self.retransmits = 0
+        self.retransmit_job = None
+        # sent the reply by RadiusClient.request(), None if a state machine waits on it
+        self.reply_event = None
+        # freed because it was sent timeout seconds ago, rather than answered.
+        self.expired = False
+
+    @property
+    def is_probe(self):
+        """True for a Status-Server request, which no session is waiting on"""
+        return self.src_mac is None
+
+
+class InFlightTable:
+    """The RADIUS requests waiting for a reply, keyed by request_id.
+
+    request_ids are taken from a free list (oldest freed first) and given back on the
+    first valid reply, when the request expires (timeout seconds after it was sent)
+    or when its session sends another request, as a session only waits on one reply.
+    Replies to freed request_ids are unknown, so late duplicates are dropped.
+    Round trip times are only sampled from requests that were not retransmitted
+    (Karn's algorithm). A request sent to a RadiusServer counts towards its outstanding
+    requests until it is freed. A request freed without a reply sends
+    RadiusRequestTimeout to its reply_event, if anything is waiting on that.
+    """
+
+    DEFAULT_TIMEOUT = 30  # seconds
+
+    def __init__(self, request_ids, timeout=None, clock=None):
+        """
+        Args:
+            request_ids (iterable): every request_id that can be used, in order of use.
+            timeout (float): seconds after which a request is given up on.
+            clock (callable): monotonic clock, defaults to time.monotonic
+        """
+        self.free_request_ids = deque(request_ids)
+        self.capacity = len(self.free_request_ids)
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self.clock = clock or time.monotonic
+
+        # request_id: InFlightRequest, in the order they were sent
+        self.requests = {}
+        self.session_to_request_id = {}  # (src_mac str, port_id str): request_id
+
+        self.answered = 0
+        self.expired = 0
+        self.superseded = 0
+        self.retransmits = 0
+        self.timed_out = 0
+        self.rtt = RoundTripTimes()
+
+    def __len__(self):
+        return len(self.requests)
+
+    def add(self, src_mac, port_id, request_authenticator, server=None):
+        """Take a free request_id for the session's next request.
+        Args:
+            server (RadiusServer): where the request is sent.
+        Returns:
+            InFlightRequest
+        Raises:
+            RadiusIdsExhausted: if every request_id is waiting for a reply.
+        """
+        now = self.clock()
+        self.expire(now)
+        session = (str(src_mac), str(port_id))
+        previous_request_id = self.session_to_request_id.get(session)
+        if previous_request_id is not None:
+            # the session has moved on, a reply to its last request is now stale.
+            self.superseded += 1
+            self.release(previous_request_id)
+        if not self.free_request_ids:
+            raise RadiusIdsExhausted(
+                "all %d RADIUS request ids are in use" % self.capacity
+            )
+
+        request_id = self.free_request_ids.popleft()
+        request = InFlightRequest(
+            request_id, src_mac, port_id, request_authenticator, now, server
+        )
+        if server is not None:
+            server.outstanding += 1
+        self.requests[request_id] = request
+        self.session_to_request_id[session] = request_id
+        return request
+
+    def for_session(self, src_mac, port_id):
+        """
+        Returns:
+            the InFlightRequest the session is waiting on, None if it is not waiting.
+        """
+        request_id = self.session_to_request_id.get((str(src_mac), str(port_id)))
+        if request_id is None:
+            return None
+        return self.requests[request_id]
+
+    def get(self, request_id):
+        """
+        Returns:
+            the InFlightRequest for request_id, None if it is unknown or has expired.
+        """
+        request = self.requests.get(request_id)
+        if request is not None and self.clock() - request.sent_at >= self.timeout:
+            self.expired += 1
+            self.release_expired(request)
+            return None
+        return request
+
+    def complete(self, request_id):
+        """Free request_id on its reply and sample the round trip time.
+        Returns:
+            the InFlightRequest, None if it is unknown or has expired. Its reply_event
+            is left for the caller to send the reply to.
+        """
+        request = self.get(request_id)
+        if request is None:
+            return None
+        self.answered += 1
+        if not request.retransmits:
+            self.rtt.add_sample(self.clock() - request.sent_at)
+        reply_event, request.reply_event = request.reply_event, None
+        self.release(request_id)
+        request.reply_event = reply_event
+        return request
+
+    def count_retransmit(self, request):
+        """Note that request is being sent again"""
+        request.retransmits += 1
+        self.retransmits += 1
+
+    def time_out(self, request_id):
+        """Free request_id, its retransmissions went unanswered"""
+        if request_id in self.requests:
+            self.timed_out += 1
+            self.release(request_id)
+
+    def release(self, request_id):
+        """Free request_id, without a reply"""
+        request = self.requests.pop(request_id, None)
+        if request is None:
+            return
+        if request.retransmit_job is not None:
+            request.retransmit_job.cancel()
+            request.retransmit_job = None
+        if request.server is not None:
+            request.server.outstanding -= 1
+        # the reply_event stays on the request, so it is known to have had one.
+        if request.reply_event is not None and not request.reply_event.ready():
+            request.reply_event.send_exception(
+                RadiusRequestTimeout(
+                    "RADIUS request %d freed without a reply" % request_id
+                )
+            )
+        session = (str(request.src_mac), str(request.port_id))
+        if self.session_to_request_id.get(session) == request_id:
+            del self.session_to_request_id[session]
+        self.free_request_ids.append(request_id)
+
+    def release_expired(self, request):
+        """Free request, it was sent timeout seconds ago. Its retransmission is left
+        scheduled, to find it expired and time its session out."""
+        request.expired = True
+        request.retransmit_job = None
+        self.release(request.request_id)
+
+    def expire(self, now=None):
+        """Free the requests sent timeout or more seconds ago.
+        Returns:
+            list of the expired InFlightRequests
+        """
+        if now is None:
+            now = self.clock()
+        expired = []
+        # requests are in the order they were sent, so the oldest are first.
+        for request in self.requests.values():
+            if now - request.sent_at < self.timeout:
+                break
+            expired.append(request)
+        for request in expired:
+            self.release_expired(request)
+        self.expired += len(expired)
+        return expired
+
+    def stats(self):
+        """
+        Returns:
+            dict of occupancy, counters and round trip times (seconds, None until the
+            first reply)
+        """
+        self.expire()
+        stats = {
+            "in_flight": len(self.requests),
+            "capacity": self.capacity,
+            "occupancy": len(self.requests) / self.capacity,
+            "answered": self.answered,
+            "expired": self.expired,
+            "superseded": self.superseded,
+            "retransmits": self.retransmits,
+            "timed_out": self.timed_out,
+        }
+        stats.update(self.rtt.stats())
+        return stats
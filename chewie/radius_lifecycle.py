@@ -1,47 +1,307 @@
 """A placeholder object for RADIUS logic extracted from Chewie"""
 
 import os
-import struct
 
 from chewie.event import EventRadiusMessageReceived
 from chewie.mac_address import MacAddress
 from chewie.message_parser import MessagePacker
+from chewie.radius_in_flight import (
+    InFlightTable,
+    RadiusIdsExhausted,
+    RadiusRequestTimeout,
+)
 from chewie.radius_attributes import State, CalledStationId, NASIdentifier, NASPortType
+from chewie.radius_servers import RadiusServer, RadiusServerPool
+from chewie.radius_templates import (  # pylint: disable=unused-import
+    AccessRequestTemplate,
+    port_id_to_int,
+)
 
 
-def port_id_to_int(port_id):
-    """ "Convert a port_id str '00:00:00:aa:00:01 to integer'"""
-    dp, port_half_1, port_half_2 = str(port_id).split(":")[3:]
-    port = port_half_1 + port_half_2
-    return int.from_bytes(
-        struct.pack(
-            "!HH", int(dp, 16), int(port, 16)  # pytype: disable=attribute-error
-        ),
-        "big",
-    )
+class RadiusLifecycle:
+    """A placeholder object for RADIUS logic extracted from Chewie
 
+    Each RADIUS source socket has its own 256 packet IDs, so a request is identified by
+    its request_id: socket_index * 256 + packet_id, whichever server it is sent to.
+    The requests waiting for a reply are kept in an InFlightTable. Each request goes to
+    a server chosen by a RadiusServerPool, and is packed with that server's secret.
+    """
 
-class RadiusLifecycle:
-    """A placeholder object for RADIUS logic extracted from Chewie"""
+    PACKET_IDS = 256
+
+    # seconds to the first retransmission of a request, doubled for each one after.
+    RETRANSMIT_TIMEOUT = 2
+    MAX_RETRANSMITS = 3
 
-    def __init__(self, radius_secret, server_id, logger):
+    def __init__(
+        self,
+        radius_secret,
+        server_id,
+        logger,
+        sockets=1,
+        request_timeout=None,
+        retransmit_timeout=None,
+        max_retransmits=None,
+        servers=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Args:
+            radius_secret (str): secret shared with the RADIUS server.
+            server_id (str): used in Called-Station-Id and NAS-Identifier.
+            logger (Logger):
+            sockets (int): number of RADIUS source sockets.
+            request_timeout (float): seconds to wait for a reply before giving up on it,
+                defaults to a retransmit_timeout past the last retransmission's wait.
+            retransmit_timeout (float): seconds to the first retransmission.
+            max_retransmits (int): retransmissions before the request fails over to
+                another server, or times out.
+            servers (RadiusServerPool): defaults to one server (address unknown here)
+                sharing radius_secret.
+        """
         self.radius_secret = radius_secret
         self.server_id = server_id
         self.logger = logger
+        self.sockets = sockets
+        self.retransmit_timeout = retransmit_timeout or self.RETRANSMIT_TIMEOUT
+        if max_retransmits is None:
+            max_retransmits = self.MAX_RETRANSMITS
+        self.max_retransmits = max_retransmits
+        if request_timeout is None:
+            # a request must outlive its retransmissions, or it expires before the
+            # last one finds it unanswered, and its session never hears it timed out.
+            request_timeout = (
+                self.retransmit_timeout * (2 ** (max_retransmits + 1) - 1)
+                + self.retransmit_timeout
+            )
+        if servers is None:
+            servers = RadiusServerPool([RadiusServer(None, None, radius_secret)])
+        self.servers = servers
+        # (src_mac str, port_id str): the server that answered the session's last
+        # request, which has the EAP conversation's State.
+        self.session_servers = {}
 
-        self.next_radius_id = 0
         self.extra_radius_request_attributes = self.prepare_extra_radius_attributes()
+        self.request_template = AccessRequestTemplate(
+            self.extra_radius_request_attributes
+        )
 
-        self.packet_id_to_mac = {}  # radius_packet_id: mac
-        self.packet_id_to_request_authenticator = {}
+        # consecutive requests use different sockets.
+        self.in_flight = InFlightTable(
+            (
+                self.request_id(socket_index, packet_id)
+                for packet_id in range(self.PACKET_IDS)
+                for socket_index in range(sockets)
+            ),
+            timeout=request_timeout,
+        )
 
-    def process_outbound(self, radius_output_bits):
-        """Placeholder method extracted from Chewie.send_radius_messages()"""
+    @classmethod
+    def request_id(cls, socket_index, packet_id):
+        """
+        Returns:
+            the request_id of packet_id sent on the socket socket_index.
+        """
+        return socket_index * cls.PACKET_IDS + packet_id
+
+    @classmethod
+    def split_request_id(cls, request_id):
+        """
+        Returns:
+            (socket_index, packet_id)
+        """
+        return divmod(request_id, cls.PACKET_IDS)
+
+    def outstanding_requests(self):
+        """
+        Returns:
+            the number of requests waiting for a reply.
+        """
+        return len(self.in_flight)
+
+    def request_authenticator(self, request_id):
+        """
+        Returns:
+            the Request Authenticator of the request waiting for a reply on request_id
+        Raises:
+            KeyError: if no request is waiting on request_id
+        """
+        request = self.in_flight.get(request_id)
+        if request is None:
+            raise KeyError(request_id)
+        return request.request_authenticator
+
+    def complete_request(self, request_id):
+        """Free request_id on a valid reply, sampling the round trip time.
+        Returns:
+            InFlightRequest, None if no request was waiting on request_id
+        """
+        request = self.in_flight.complete(request_id)
+        if request is not None and request.server is not None:
+            rtt = None
+            if not request.retransmits:
+                rtt = self.in_flight.clock() - request.sent_at
+            self.servers.reply_received(request.server, rtt)
+            if request.message is not None and len(self.servers) > 1:
+                self.session_servers[
+                    (str(request.src_mac), str(request.port_id))
+                ] = request.server
+        return request
+
+    def choose_server(self, src_mac, port_id, state):
+        """A request continuing an EAP conversation (with a State) goes back to the
+        server that sent the State, unless it is dead. Others are balanced.
+        Returns:
+            RadiusServer
+        """
+        if state:
+            server = self.session_servers.get((str(src_mac), str(port_id)))
+            if server is not None and not server.dead:
+                return server
+        return self.servers.choose()
+
+    def reply_request(self, socket_index, packed_message):
+        """
+        Returns:
+            the InFlightRequest the packed reply received on socket_index is to,
+            None if there is none.
+        """
+        if len(packed_message) < 2:
+            return None
+        return self.in_flight.get(self.request_id(socket_index, packed_message[1]))
+
+    def reply_secret(self, socket_index, packed_message):
+        """
+        Returns:
+            the secret to validate the packed reply received on socket_index with, that
+            of the server its request was sent to.
+        """
+        request = self.reply_request(socket_index, packed_message)
+        if request is None or request.server is None:
+            return self.radius_secret
+        return request.server.secret
+
+    def reply_invalid(self, socket_index, packed_message):
+        """Count a reply that failed to parse or validate against its server"""
+        request = self.reply_request(socket_index, packed_message)
+        if request is not None and request.server is not None:
+            self.servers.reply_invalid(request.server)
+
+    def in_flight_request(self, src_mac, port_id):
+        """
+        Returns:
+            InFlightRequest the session is waiting on, None if it is not waiting.
+        """
+        return self.in_flight.for_session(src_mac, port_id)
+
+    def retransmit_delay(self, request):
+        """
+        Returns:
+            seconds to wait for a reply before sending request again (or giving up)
+        """
+        return self.retransmit_timeout * 2**request.retransmits
+
+    def retransmit(self, request):
+        """Decide what to do now request's reply is late. It is sent again to the same
+        server, until its retransmissions are used up or the server is marked dead; then
+        it fails over to a server it has not been sent to, as a new request.
+        Returns:
+            InFlightRequest to send: request itself (its packed bytes unchanged) or the
+            new request that replaces it. None if request is no longer waiting for a reply
+            (answered or superseded)
+        Raises:
+            RadiusRequestTimeout: if no server is left to try, request is freed, or if
+                request expired before its retransmissions were used up.
+        """
+        if self.in_flight.get(request.request_id) is not request:
+            if request.expired:
+                raise RadiusRequestTimeout(
+                    "RADIUS request %d expired after %d retransmissions"
+                    % (request.request_id, request.retransmits)
+                )
+            return None
+        server = request.server
+        if server is not None:
+            self.servers.transmission_unanswered(server)
+        if request.retransmits < self.max_retransmits and not (
+            server is not None and server.dead
+        ):
+            self.in_flight.count_retransmit(request)
+            return request
+
+        failover = None
+        if request.message is not None and server is not None:
+            failover = self.servers.choose(exclude=request.servers_tried)
+        if failover is None:
+            self.in_flight.time_out(request.request_id)
+            raise RadiusRequestTimeout(
+                "no reply to RADIUS request %d after %d retransmissions"
+                % (request.request_id, request.retransmits)
+            )
+        self.logger.info(
+            "RADIUS request %d failing over from %s to %s",
+            request.request_id,
+            server.name,
+            failover.name,
+        )
+        server.failovers += 1
+        reply_event, request.reply_event = request.reply_event, None
+        self.in_flight.release(request.request_id)
+        self.process_outbound(request.message, failover)
+        new_request = self.in_flight_request(request.src_mac, request.port_id)
+        new_request.servers_tried = request.servers_tried + (failover,)
+        new_request.reply_event = reply_event
+        return new_request
+
+    def status_server_request(self, server):
+        """Pack a Status-Server probe for server. If its last probe is still
+        unanswered, that is freed and counted against the server.
+        Returns:
+            (socket_index, packed Status-Server)
+        Raises:
+            RadiusIdsExhausted: if no request_id is free.
+        """
+        last_probe = self.in_flight.for_session(None, server.name)
+        if last_probe is not None:
+            self.servers.probe_unanswered(server)
+            self.in_flight.release(last_probe.request_id)
+        request = self.in_flight.add(
+            None, server.name, self.generate_request_authenticator(), server
+        )
+        self.servers.request_sent(server, probe=True)
+        socket_index, radius_packet_id = self.split_request_id(request.request_id)
+        packed = MessagePacker.radius_status_server_pack(
+            radius_packet_id,
+            request.request_authenticator,
+            server.secret,
+            self.server_id,
+        )
+        return self.remember_packed(request.request_id, socket_index, packed)
+
+    def stats(self):
+        """
+        Returns:
+            dict of in flight request table occupancy and RADIUS round trip times
+        """
+        stats = self.in_flight.stats()
+        stats["servers"] = self.servers.stats()
+        return stats
+
+    def process_outbound(self, radius_output_bits, server=None):
+        """Placeholder method extracted from Chewie.send_radius_messages()
+        Args:
+            server (RadiusServer): where to send the request, defaults to the pool's choice.
+        Returns:
+            (socket_index, packed RADIUS request) the request must be sent from socket_index
+        Raises:
+            RadiusIdsExhausted: if no request_id is free.
+        """
         radius_payload = radius_output_bits.message
         src_mac = radius_output_bits.src_mac
         username = radius_output_bits.identity
         state = radius_output_bits.state
         port_id = radius_output_bits.port_mac
+        if server is None:
+            server = self.choose_server(src_mac, port_id, state)
         self.logger.info(
             "Sending Radius Packet. Mac %s %s, Username: %s ",
             type(src_mac),
@@ -53,8 +313,7 @@ class RadiusLifecycle:
             isinstance(radius_payload, MacAddress)
             and radius_payload == src_mac == username
         ):
-            print("Enterting outbound mab request")
-            return self.process_outbound_mab_request(radius_output_bits)
+            return self.process_outbound_mab_request(radius_output_bits, server)
 
         state_dict = None
         if state:
@@ -65,71 +324,116 @@ class RadiusLifecycle:
             state_dict,
         )
 
-        radius_packet_id = self.get_next_radius_packet_id()
-        self.packet_id_to_mac[radius_packet_id] = {
-            "src_mac": src_mac,
-            "port_id": port_id,
-        }
-
-        request_authenticator = self.generate_request_authenticator()
-        self.packet_id_to_request_authenticator[
-            radius_packet_id
-        ] = request_authenticator
+        request_id, request_authenticator = self.allocate_request_id(
+            src_mac, port_id, server
+        )
+        socket_index, radius_packet_id = self.split_request_id(request_id)
 
-        return MessagePacker.radius_pack(
+        packed = MessagePacker.radius_pack(
             radius_payload,
             src_mac,
             username,
             radius_packet_id,
             request_authenticator,
             state,
-            self.radius_secret,
-            port_id_to_int(port_id),
-            self.extra_radius_request_attributes,
+            server.secret,
+            self.request_template.nas_port(port_id),
+            self.request_template.extra_attributes,
+            self.request_template.calling_station_id(src_mac),
+        )
+        return self.remember_packed(
+            request_id, socket_index, packed, radius_output_bits
         )
 
+    def process_outbound_packet(self, packet, src_mac, port_id, server=None):
+        """Take a request_id for a RadiusPacket built by the caller, and pack it.
+        Its packet_id and authenticator are set, and its Message-Authenticator (if it
+        has one) signed, for the server. It is not packed again for another server, so
+        it does not fail over.
+        Args:
+            packet (RadiusPacket): the request, e.g. a RadiusAccessRequest.
+            src_mac, port_id: the session the request belongs to.
+            server (RadiusServer): where to send the request, defaults to the pool's choice.
+        Returns:
+            (socket_index, packed RADIUS request) the request must be sent from socket_index
+        Raises:
+            RadiusIdsExhausted: if no request_id is free.
+        """
+        if server is None:
+            server = self.servers.choose()
+        request_id, request_authenticator = self.allocate_request_id(
+            src_mac, port_id, server
+        )
+        socket_index, packet.packet_id = self.split_request_id(request_id)
+        packet.authenticator = request_authenticator
+        packet.packed = None
+        packed = packet.build(server.secret)
+        self.servers.request_sent(server)
+        return self.remember_packed(request_id, socket_index, packed)
+
     def build_event_radius_message_received(self, radius):
         """Build a EventRadiusMessageReceived from a radius message"""
         self.logger.info("Radius packet event being built: %s", radius)
         state = radius.attributes.find(State.DESCRIPTION)
         return EventRadiusMessageReceived(radius, state, radius.attributes.to_dict())
 
-    def process_outbound_mab_request(self, radius_output_bits):
+    def process_outbound_mab_request(self, radius_output_bits, server):
         """Placeholder method extracted from Chewie.send_radius_messages()"""
         src_mac = radius_output_bits.src_mac
         port_id = radius_output_bits.port_mac
         self.logger.info("Sending MAB to RADIUS: %s", src_mac)
 
-        radius_packet_id = self.get_next_radius_packet_id()
-        self.packet_id_to_mac[radius_packet_id] = {
-            "src_mac": src_mac,
-            "port_id": port_id,
-        }
-        request_authenticator = self.generate_request_authenticator()
-        self.packet_id_to_request_authenticator[
-            radius_packet_id
-        ] = request_authenticator
-        return MessagePacker.radius_mab_pack(
+        request_id, request_authenticator = self.allocate_request_id(
+            src_mac, port_id, server
+        )
+        socket_index, radius_packet_id = self.split_request_id(request_id)
+        packed = MessagePacker.radius_mab_pack(
             src_mac,
             radius_packet_id,
             request_authenticator,
-            self.radius_secret,
-            port_id_to_int(port_id),
+            server.secret,
+            self.request_template.nas_port(port_id),
+            self.request_template.calling_station_id(src_mac, "-"),
+        )
+        return self.remember_packed(
+            request_id, socket_index, packed, radius_output_bits
         )
 
+    def remember_packed(self, request_id, socket_index, packed, message=None):
+        """Keep the packed request, it is resent as is if the reply is late, and what
+        it was packed from, to pack it again for another server.
+        Returns:
+            (socket_index, packed)
+        """
+        request = self.in_flight.requests[request_id]
+        request.socket_index = socket_index
+        request.packed = packed
+        request.message = message
+        if request.server is not None and message is not None:
+            self.servers.request_sent(request.server)
+        return socket_index, packed
+
     def generate_request_authenticator(self):
         """Workaround until we get this extracted for easy mocking"""
         return os.urandom(16)
 
-    def get_next_radius_packet_id(self):
-        """Calulate the next RADIUS Packet ID
+    def allocate_request_id(self, src_mac, port_id, server=None):
+        """Take a free request_id for the session's next request, freeing its last one.
+        Args:
+            server (RadiusServer): where the request is sent.
         Returns:
-            int
+            (request_id, request authenticator)
+        Raises:
+            RadiusIdsExhausted: if every request_id is waiting for a reply.
         """
-        radius_id = self.next_radius_id
-        self.next_radius_id = (self.next_radius_id + 1) % 256
+        request = self.in_flight.add(
+            src_mac, port_id, self.generate_request_authenticator(), server
+        )
+        return request.request_id, request.request_authenticator
 
-        return radius_id
+    def release_request_id(self, request_id):
+        """Free request_id without a reply"""
+        self.in_flight.release(request_id)
 
     def prepare_extra_radius_attributes(self):
         """Create RADIUS Attirbutes to be sent with every RADIUS request"""
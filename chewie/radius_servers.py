@@ -0,0 +1,179 @@
+"""The RADIUS servers requests are balanced across, and their health"""
+from chewie.radius_in_flight import RoundTripTimes
+
+
+class RadiusServer:  # pylint: disable=too-many-instance-attributes
+    """A RADIUS server, with its own secret and weight, and its counters"""
+
+    def __init__(self, ip, port, secret, weight=1):
+        """
+        Args:
+            ip (str): address of the server.
+            port (int): UDP port of the server.
+            secret (str): secret shared with this server.
+            weight (int): share of the requests relative to the other servers.
+        """
+        if weight <= 0:
+            raise ValueError("weight must be positive, was %s" % weight)
+        self.ip = ip  # pylint: disable=invalid-name
+        self.port = port
+        self.secret = secret
+        self.weight = weight
+
+        self.outstanding = 0  # kept by InFlightTable
+        self.requests = 0
+        self.replies = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.failovers = 0
+        self.probes = 0
+        self.rtt = RoundTripTimes()
+
+        self.dead = False
+        self.times_marked_dead = 0
+        self.consecutive_timeouts = 0
+        self.consecutive_replies = 0
+        self.probe_job = None
+
+    @property
+    def address(self):
+        """(ip, port) to send to"""
+        return (self.ip, self.port)
+
+    @property
+    def name(self):  # pylint: disable=missing-docstring
+        if ":" in str(self.ip):
+            return "[%s]:%s" % (self.ip, self.port)
+        return "%s:%s" % (self.ip, self.port)
+
+    def load(self):
+        """
+        Returns:
+            outstanding requests relative to weight, the server with the least gets the next.
+        """
+        return (self.outstanding + 1) / self.weight
+
+    def stats(self):
+        """
+        Returns:
+            dict of health, counters and round trip times
+        """
+        stats = {
+            "dead": self.dead,
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "replies": self.replies,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "failovers": self.failovers,
+            "probes": self.probes,
+            "times_marked_dead": self.times_marked_dead,
+        }
+        stats.update(self.rtt.stats())
+        return stats
+
+
+class RadiusServerPool:
+    """Chooses which RadiusServer a request goes to, and decides when one is dead.
+
+    Requests go to the live server with the fewest outstanding requests for its weight
+    (earlier servers win ties). A server is marked dead after dead_after_timeouts
+    transmissions to it in a row go unanswered. Dead servers get no requests while any
+    server is alive; they are probed with Status-Server (RFC 5997) every probe_interval
+    seconds, and revived once revive_after_replies valid replies (to probes or to late
+    requests) arrive in a row. An unanswered probe starts the count again.
+    """
+
+    DEAD_AFTER_TIMEOUTS = 4
+    REVIVE_AFTER_REPLIES = 2
+    PROBE_INTERVAL = 10  # seconds
+
+    def __init__(
+        self,
+        servers,
+        dead_after_timeouts=None,
+        revive_after_replies=None,
+        probe_interval=None,
+    ):
+        """
+        Args:
+            servers (list): RadiusServers, in order of preference.
+            dead_after_timeouts (int): unanswered transmissions in a row to mark a
+                server dead.
+            revive_after_replies (int): valid replies in a row to revive a dead server.
+            probe_interval (float): seconds between Status-Server probes of a dead server.
+        """
+        if not servers:
+            raise ValueError("at least one RADIUS server is needed")
+        self.servers = list(servers)
+        self.dead_after_timeouts = dead_after_timeouts or self.DEAD_AFTER_TIMEOUTS
+        self.revive_after_replies = revive_after_replies or self.REVIVE_AFTER_REPLIES
+        self.probe_interval = probe_interval or self.PROBE_INTERVAL
+
+    def __len__(self):
+        return len(self.servers)
+
+    def __iter__(self):
+        return iter(self.servers)
+
+    def choose(self, exclude=()):
+        """Pick the server for the next request.
+        Args:
+            exclude (iterable): servers the request has already been sent to.
+        Returns:
+            RadiusServer, None if every server is excluded. Dead servers are only chosen
+            when no live one is left.
+        """
+        candidates = [server for server in self.servers if server not in exclude]
+        live = [server for server in candidates if not server.dead]
+        if live:
+            candidates = live
+        if not candidates:
+            return None
+        return min(candidates, key=RadiusServer.load)
+
+    def request_sent(self, server, probe=False):
+        """Count a request (or Status-Server probe) sent to server"""
+        if probe:
+            server.probes += 1
+        else:
+            server.requests += 1
+
+    def reply_received(self, server, rtt=None):
+        """Count a valid reply from server, reviving it if it was dead.
+        Args:
+            rtt (float): round trip time, None if it cannot be sampled.
+        """
+        server.replies += 1
+        server.consecutive_timeouts = 0
+        server.consecutive_replies += 1
+        if rtt is not None:
+            server.rtt.add_sample(rtt)
+        if server.dead and server.consecutive_replies >= self.revive_after_replies:
+            server.dead = False
+
+    def reply_invalid(self, server):
+        """Count a reply from server that could not be parsed or validated"""
+        server.errors += 1
+
+    def transmission_unanswered(self, server):
+        """Count a request to server whose reply is late, marking it dead if too many
+        in a row have been"""
+        server.timeouts += 1
+        server.consecutive_replies = 0
+        server.consecutive_timeouts += 1
+        if not server.dead and server.consecutive_timeouts >= self.dead_after_timeouts:
+            server.dead = True
+            server.times_marked_dead += 1
+
+    def probe_unanswered(self, server):
+        """A Status-Server probe of server went unanswered"""
+        server.consecutive_replies = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict of server name: server stats
+        """
+        return {server.name: server.stats() for server in self.servers}
@@ -1,6 +1,7 @@
 """Handle the RADIUS socket
 """
 from eventlet.green import socket
+from chewie.batch_socket import BatchReceiver
 from chewie.utils import get_logger
 
 
@@ -16,6 +17,7 @@ class RadiusSocket:
         log_prefix,
     ):
         self.socket = None
+        self.batch_receiver = None
         self.listen_ip = listen_ip
         self.listen_port = listen_port
         self.server_ip = server_ip
@@ -32,11 +34,23 @@ class RadiusSocket:
             self.logger.error("Unable to setup socket: %s", str(err))
             raise err
 
-    def send(self, data):
+    def send(self, data, address=None):
         """Sends on the radius socket
-        data (bytes): what to send"""
-        self.socket.sendto(data, (self.server_ip, self.server_port))
+        data (bytes): what to send
+        address (tuple): (ip, port) to send to, defaults to the server's"""
+        if address is None:
+            address = (self.server_ip, self.server_port)
+        self.socket.sendto(data, address)
 
     def receive(self):
         """Receives from the radius socket"""
         return self.socket.recv(4096)
+
+    def receive_batch(self):
+        """Receive all the packets waiting on the radius socket (at least one), up to a batch.
+        Returns:
+            list of packets (bytes)
+        """
+        if self.batch_receiver is None:
+            self.batch_receiver = BatchReceiver(self.socket)
+        return self.batch_receiver.receive()
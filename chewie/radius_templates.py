@@ -0,0 +1,68 @@
+"""The attributes Access-Requests share, packed once rather than per request"""
+import functools
+import struct
+
+from chewie.radius_attributes import CallingStationId, NASPort, PackedAttribute
+
+
+def port_id_to_int(port_id):
+    """ "Convert a port_id str '00:00:00:aa:00:01 to integer'"""
+    dp, port_half_1, port_half_2 = str(port_id).split(":")[3:]
+    port = port_half_1 + port_half_2
+    return int.from_bytes(
+        struct.pack(
+            "!HH", int(dp, 16), int(port, 16)  # pytype: disable=attribute-error
+        ),
+        "big",
+    )
+
+
+class AccessRequestTemplate:
+    """The attributes of an Access-Request that do not change between requests.
+
+    extra_attributes go in every request. NAS-Port is cached per port and
+    Calling-Station-Id per MAC address (cache_size of each, least recently used
+    dropped), so building a request only packs User-Name, User-Password,
+    EAP-Message and State.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, extra_attributes, cache_size=None):
+        """
+        Args:
+            extra_attributes (list): Attributes to send with every request.
+            cache_size (int): ports and MAC addresses to keep packed attributes for.
+        """
+        self.extra_attributes = [
+            PackedAttribute(attribute) for attribute in extra_attributes
+        ]
+        cache = functools.lru_cache(maxsize=cache_size or self.CACHE_SIZE)
+        self.nas_port = cache(self.pack_nas_port)
+        self.calling_station_id = cache(self.pack_calling_station_id)
+
+    @staticmethod
+    def pack_nas_port(port_id):
+        """
+        Args:
+            port_id (MacAddress or str): the port's id.
+        Returns:
+            NAS-Port PackedAttribute, None if the port's number is 0.
+        """
+        nas_port = port_id_to_int(port_id)
+        if not nas_port:
+            return None
+        return PackedAttribute(NASPort.create(nas_port))
+
+    @staticmethod
+    def pack_calling_station_id(src_mac, separator=":"):
+        """
+        Args:
+            src_mac (MacAddress): the supplicant's MAC address.
+            separator (str): between the MAC address's octets.
+        Returns:
+            Calling-Station-Id PackedAttribute
+        """
+        return PackedAttribute(
+            CallingStationId.create(str(src_mac).replace(":", separator))
+        )
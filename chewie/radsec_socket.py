@@ -0,0 +1,296 @@
+"""RADIUS over TLS (RadSec, RFC 6614), behind the same interface as RadiusSocket"""
+import ssl
+import struct
+
+import eventlet
+from eventlet.green import socket
+from eventlet.green import ssl as green_ssl
+from eventlet.queue import LightQueue
+
+from chewie.utils import get_logger
+
+RADSEC_PORT = 2083
+# RFC 6614 2.3: the RADIUS shared secret is "radsec", TLS protects the packets.
+RADSEC_SECRET = "radsec"
+
+RADIUS_MIN_LENGTH = 20
+RADIUS_MAX_LENGTH = 4096
+
+
+def radsec_ssl_context(
+    ca_certs=None, certfile=None, keyfile=None, password=None, check_hostname=True
+):  # pylint: disable=too-many-arguments
+    """TLS client context for RadSec, RFC 6614 needs both ends to authenticate.
+    Args:
+        ca_certs (str): file of the CAs the RADIUS servers' certificates are checked
+            against, the system's CAs if None.
+        certfile (str): file of chewie's certificate.
+        keyfile (str): file of chewie's private key, in certfile if None.
+        password (str): of the private key.
+        check_hostname (bool): check the server certificate matches its address.
+    Returns:
+        SSLContext
+    """
+    context = green_ssl.create_default_context(cafile=ca_certs)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.check_hostname = check_hostname
+    if certfile:
+        context.load_cert_chain(certfile, keyfile, password)
+    return context
+
+
+class RadSecConnection:  # pylint: disable=too-many-instance-attributes
+    """A persistent TLS connection to one RADIUS server.
+
+    Requests are pipelined: any number of packet ids can be waiting for replies on the
+    connection, and replies are read as they come. TCP makes the connection reliable, so
+    a request already sent on it is not sent again (RFC 6613 2.6.1); a retransmission
+    goes out only once the connection has been replaced. A lost connection is reopened,
+    waiting reconnect_min seconds after the first failure and doubling up to
+    reconnect_max.
+    """
+
+    CONNECT_TIMEOUT = 5
+    RECONNECT_MIN = 1
+    RECONNECT_MAX = 60
+
+    def __init__(
+        self,
+        address,
+        ssl_context,
+        received,
+        logger,
+        reconnect_min=None,
+        reconnect_max=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Args:
+            address (tuple): (ip, port) of the RADIUS server.
+            ssl_context (SSLContext): see radsec_ssl_context().
+            received (LightQueue): where received packets are put.
+            logger (Logger):
+            reconnect_min (float): seconds to wait before the first reconnection.
+            reconnect_max (float): most seconds to wait between reconnections.
+        """
+        self.address = address
+        self.ssl_context = ssl_context
+        self.received = received
+        self.logger = logger
+        self.reconnect_min = reconnect_min or self.RECONNECT_MIN
+        self.reconnect_max = reconnect_max or self.RECONNECT_MAX
+        self.backoff = self.reconnect_min
+        self.sock = None
+        self.thread = None
+        # packet id: request authenticator of the requests sent on this connection
+        # that are waiting for a reply.
+        self.outstanding = {}
+        self.connects = 0
+        self.failures = 0
+
+    @property
+    def connected(self):  # pylint: disable=missing-docstring
+        return self.sock is not None
+
+    def start(self):
+        """Connect, and keep the connection open, in its own green thread"""
+        if self.thread is None:
+            self.thread = eventlet.spawn(self.run)
+
+    def stop(self):
+        """Close the connection for good"""
+        if self.thread is not None:
+            self.thread.kill()
+            self.thread = None
+        self.close()
+
+    def run(self):
+        """Connect and read replies, reconnecting with backoff, forever"""
+        while True:
+            try:
+                self.connect()
+                self.read_packets()
+            except (OSError, ValueError) as err:
+                self.logger.warning(
+                    "RadSec connection to %s:%s failed: %s",
+                    self.address[0],
+                    self.address[1],
+                    err,
+                )
+            self.close()
+            self.failures += 1
+            eventlet.sleep(self.backoff)
+            self.backoff = min(self.backoff * 2, self.reconnect_max)
+
+    def connect(self):
+        """Open the TLS connection"""
+        sock = socket.create_connection(self.address, timeout=self.CONNECT_TIMEOUT)
+        try:
+            tls_sock = self.ssl_context.wrap_socket(
+                sock, server_hostname=self.address[0]
+            )
+        except (OSError, ValueError):
+            sock.close()
+            raise
+        tls_sock.settimeout(None)
+        self.sock = tls_sock
+        self.connects += 1
+        self.backoff = self.reconnect_min
+        self.logger.info("RadSec connected to %s:%s", self.address[0], self.address[1])
+
+    def recv_exactly(self, length):
+        """
+        Returns:
+            the next length bytes read from the connection
+        Raises:
+            ConnectionError: if the server closed the connection.
+        """
+        data = bytearray()
+        while len(data) < length:
+            chunk = self.sock.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("closed by the server")
+            data += chunk
+        return data
+
+    def read_packets(self):
+        """Read RADIUS packets from the connection until it fails.
+        Raises:
+            ValueError: if a packet's Length is out of range, the stream cannot be
+                followed after that.
+        """
+        while True:
+            header = self.recv_exactly(4)
+            length = struct.unpack("!H", header[2:4])[0]
+            if not RADIUS_MIN_LENGTH <= length <= RADIUS_MAX_LENGTH:
+                raise ValueError("RADIUS packet with invalid Length %d" % length)
+            packet = bytes(header + self.recv_exactly(length - 4))
+            self.outstanding.pop(packet[1], None)
+            self.received.put(packet)
+
+    def send(self, data):
+        """Send a packed request, unless it has already been sent on this connection.
+        Args:
+            data (bytes): packed RADIUS request.
+        Returns:
+            True if the request is on the connection, False if it is not connected.
+        """
+        if self.sock is None:
+            return False
+        packet_id = data[1]
+        request_authenticator = bytes(data[4:20])
+        if self.outstanding.get(packet_id) == request_authenticator:
+            return True
+        try:
+            self.sock.sendall(data)
+        except OSError as err:
+            self.logger.warning(
+                "RadSec send to %s:%s failed: %s", self.address[0], self.address[1], err
+            )
+            # the reader sees the connection fail, and reconnects.
+            self.sock.close()
+            return False
+        self.outstanding[packet_id] = request_authenticator
+        return True
+
+    def close(self):
+        """Close the TLS connection, requests waiting on it have to be sent again"""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        self.outstanding.clear()
+
+
+class RadSecSocket:
+    """Sends RADIUS packets over persistent TLS connections instead of UDP.
+
+    One connection is kept open to each RADIUS server. Like a RadiusSocket, a
+    RadSecSocket has 256 packet ids, all of which may be outstanding at once; more
+    RadSecSockets (radius_sockets) make a pool of connections to each server.
+    """
+
+    BATCH_SIZE = 32
+
+    def __init__(
+        self,
+        server_addresses,
+        log_prefix,
+        ssl_context,
+        reconnect_min=None,
+        reconnect_max=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Args:
+            server_addresses (list): (ip, port) of each RADIUS server, the first is
+                sent to by default.
+            log_prefix (str):
+            ssl_context (SSLContext): see radsec_ssl_context().
+            reconnect_min (float): seconds to wait before the first reconnection.
+            reconnect_max (float): most seconds to wait between reconnections.
+        """
+        self.server_addresses = list(server_addresses)
+        self.ssl_context = ssl_context
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.logger = get_logger(log_prefix)
+        self.received = LightQueue()
+        self.connections = {}  # (ip, port): RadSecConnection
+
+    def setup(self):
+        """Start connecting to each server"""
+        self.logger.info("Setting up RadSec socket.")
+        for address in self.server_addresses:
+            self.connection(address)
+
+    def connection(self, address):
+        """
+        Args:
+            address (tuple): (ip, port) of a RADIUS server.
+        Returns:
+            RadSecConnection to address, started on first use.
+        """
+        connection = self.connections.get(address)
+        if connection is None:
+            connection = RadSecConnection(
+                address,
+                self.ssl_context,
+                self.received,
+                self.logger,
+                self.reconnect_min,
+                self.reconnect_max,
+            )
+            self.connections[address] = connection
+            connection.start()
+        return connection
+
+    def send(self, data, address=None):
+        """Sends over the connection to a RADIUS server.
+        data (bytes): what to send
+        address (tuple): (ip, port) to send to, defaults to the first server's"""
+        if address is None:
+            address = self.server_addresses[0]
+        if not self.connection(address).send(data):
+            self.logger.warning(
+                "RadSec not connected to %s:%s, request will be retransmitted",
+                address[0],
+                address[1],
+            )
+
+    def receive(self):
+        """Receives a packet from any of the connections"""
+        return self.received.get()
+
+    def receive_batch(self):
+        """Receive all the packets waiting (at least one), up to a batch.
+        Returns:
+            list of packets (bytes)
+        """
+        packets = [self.received.get()]
+        while len(packets) < self.BATCH_SIZE and not self.received.empty():
+            packets.append(self.received.get_nowait())
+        return packets
+
+    def close(self):
+        """Close every connection"""
+        for connection in self.connections.values():
+            connection.stop()
+        self.connections = {}
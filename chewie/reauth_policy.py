@@ -0,0 +1,171 @@
+"""Spreads reauthentication and session timeout deadlines so they do not all land at once"""
+import functools
+import math
+import random
+import time
+
+
+class ReauthJob:
+    """Handle for a reauthentication scheduled through a ReauthPolicy,
+    same api as TimerJob (and asyncio.TimerHandle)"""
+
+    def __init__(self, policy, slot):
+        self.policy = policy
+        self.slot = slot
+        self.timer_job = None
+        self.finished = False
+
+    def cancel(self):
+        """Cancel the reauthentication."""
+        if self.timer_job:
+            self.timer_job.cancel()
+        self.policy.job_finished(self, executed=False)
+
+    def cancelled(self):
+        """
+        Returns:
+            True if the reauthentication was cancelled
+        """
+        return self.timer_job is not None and self.timer_job.cancelled()
+
+    def when(self):
+        """
+        Returns:
+            scheduled reauthentication time as float seconds
+        """
+        return self.timer_job.when()
+
+
+class ReauthPolicy:
+    """Schedules reauthentications with jitter, a global reauths-per-second cap and smoothing.
+
+    A deadline of 'period' seconds may be brought forward by up to jitter * period seconds
+    (so RADIUS Session-Timeout is never exceeded). Within that window the least loaded
+    second is chosen, which spreads a burst of authentications evenly across the window.
+    If every second in the window already holds max_per_second reauthentications, the
+    reauthentication is brought forward to the latest earlier second that has room,
+    as reauthenticating early never exceeds Session-Timeout. Only if every second from
+    now to the deadline is full does the cap give way: the least loaded second in the
+    window is used anyway, and counted as over_cap.
+    """
+
+    def __init__(self, jitter=0.0, max_per_second=None, clock=None, rand=None):
+        """
+        Args:
+            jitter (float): fraction (0 - 1) of the period the deadline may be brought forward.
+            max_per_second (int): global cap of reauthentications per second, None for no cap.
+            clock (callable): monotonic clock, defaults to time.monotonic
+            rand (callable): returns a float in [0, 1), defaults to random.random
+        """
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1, was %s" % jitter)
+        self.jitter = jitter
+        self.max_per_second = max_per_second
+        self.clock = clock or time.monotonic
+        self.rand = rand or random.random
+
+        self.slots = {}  # second: number of reauths due in that second
+        self.queued = 0
+        self.executed = 0
+        self.cancelled = 0
+        self.brought_forward = 0
+        self.over_cap = 0
+
+    def call_later(self, timer_scheduler, period, func, *args):
+        """Schedule func(*args) roughly period seconds from now.
+
+        Args:
+            timer_scheduler: TimerScheduler (or anything with its call_later api)
+            period (int): nominal number of seconds until reauthentication.
+            func: function to execute
+            *args: arguments for func
+
+        Returns:
+            ReauthJob - can be used for cancelling the reauthentication
+        """
+        now = self.clock()
+        delay, slot = self.choose_delay(now, period)
+        job = ReauthJob(self, slot)
+        self.slots[slot] = self.slots.get(slot, 0) + 1
+        self.queued += 1
+
+        @functools.wraps(func)
+        def run_reauth(*args):
+            self.job_finished(job, executed=True)
+            return func(*args)
+
+        job.timer_job = timer_scheduler.call_later(delay, run_reauth, *args)
+        return job
+
+    def choose_delay(self, now, period):
+        """Pick the delay for a reauthentication nominally due in period seconds.
+        Returns:
+            tuple (delay in seconds, the whole second the reauthentication is due in)
+        """
+        latest = now + period
+        earliest = latest - self.jitter * period
+        last_slot = int(math.floor(latest))
+
+        candidates = range(int(math.ceil(earliest)), last_slot + 1)
+        if candidates:
+            load = min(self.slots.get(slot, 0) for slot in candidates)
+            least_loaded = [
+                slot for slot in candidates if self.slots.get(slot, 0) == load
+            ]
+            slot = least_loaded[int(self.rand() * len(least_loaded))]
+            deadline = min(max(slot + self.rand(), earliest), latest)
+        else:
+            # no whole second in the window, the deadline stays at its end.
+            slot, deadline = last_slot, latest
+        if self.has_room(slot):
+            return max(deadline - now, 0), slot
+
+        # the window is full, the latest earlier second with room is used instead.
+        first_slot = min(candidates.start, last_slot)
+        for early_slot in range(first_slot - 1, int(math.floor(now)), -1):
+            if self.has_room(early_slot):
+                self.brought_forward += 1
+                return early_slot + self.rand() - now, early_slot
+        self.over_cap += 1
+        return max(deadline - now, 0), slot
+
+    def has_room(self, slot):
+        """
+        Returns:
+            True if another reauthentication may be due in slot.
+        """
+        if self.max_per_second is None:
+            return True
+        return self.slots.get(slot, 0) < self.max_per_second
+
+    def job_finished(self, job, executed):
+        """Account for a job that has run or been cancelled (only the first call counts)."""
+        if job.finished:
+            return
+        job.finished = True
+        self.queued -= 1
+        if executed:
+            self.executed += 1
+        else:
+            self.cancelled += 1
+
+        remaining = self.slots.get(job.slot, 0) - 1
+        if remaining > 0:
+            self.slots[job.slot] = remaining
+        else:
+            self.slots.pop(job.slot, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict of reauthentication counters, brought_forward is those moved before
+            their window to keep to max_per_second, over_cap those scheduled in a second
+            that already held max_per_second
+        """
+        return {
+            "queued": self.queued,
+            "executed": self.executed,
+            "cancelled": self.cancelled,
+            "brought_forward": self.brought_forward,
+            "over_cap": self.over_cap,
+        }
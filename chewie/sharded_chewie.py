@@ -0,0 +1,451 @@
+"""Runs Chewie across several worker processes, each owning a shard of the ports"""
+import multiprocessing
+import os
+import pickle
+import struct
+import zlib
+
+from eventlet import sleep, spawn, GreenPool
+from eventlet.hubs import trampoline
+
+from chewie.chewie import Chewie
+from chewie.mac_address import MacAddress
+from chewie.nfv_sockets import EapSocket, MabSocket
+from chewie.utils import get_logger
+
+# parent -> shard
+EAP_FRAME = "eap"
+MAB_FRAME = "mab"
+PORT_UP = "port_up"
+PORT_DOWN = "port_down"
+# shard -> parent
+SEND_EAP = "send_eap"
+AUTH_SUCCESS = "auth_success"
+AUTH_FAILURE = "auth_failure"
+AUTH_LOGOFF = "auth_logoff"
+
+
+def shard_for_port(port_id, shards):
+    """Pick the shard that owns a port. Stable across processes (unlike hash()).
+    Args:
+        port_id (str or MacAddress or bytes): the 'mac' identifier of the switch port
+        shards (int): number of shards
+    Returns:
+        int index of the shard
+    """
+    if isinstance(port_id, str):
+        port_id = MacAddress.from_string(port_id)
+    if isinstance(port_id, MacAddress):
+        port_id = port_id.address
+    return zlib.crc32(port_id) % shards
+
+
+class ShardChannel:
+    """eventlet friendly wrapper around one end of a multiprocessing Pipe.
+
+    The pipe is read and written without blocking, so the hub keeps running however
+    full it is: messages are pickled and length prefixed here (both ends must be
+    ShardChannels), sent messages are queued and written by a green thread as the
+    pipe drains, and only complete messages are unpickled.
+    """
+
+    HEADER = struct.Struct("!I")
+    READ_SIZE = 65536
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.fileno = connection.fileno()
+        os.set_blocking(self.fileno, False)
+        self.read_buffer = bytearray()
+        self.write_buffer = bytearray()
+        self.writer = None
+
+    def send(self, message):
+        """queue a (picklable) message tuple to send to the other end"""
+        payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        self.write_buffer += self.HEADER.pack(len(payload))
+        self.write_buffer += payload
+        if self.writer is None and self.write_some():
+            self.writer = spawn(self.write_queued)
+
+    def write_some(self):
+        """write as much of the queue as the pipe will take now
+        Returns:
+            True if some is left to write
+        """
+        try:
+            written = os.write(self.fileno, self.write_buffer)
+        except BlockingIOError:
+            return True
+        except OSError:
+            # the other end has gone, it will not read what is left.
+            self.write_buffer.clear()
+            return False
+        del self.write_buffer[:written]
+        return bool(self.write_buffer)
+
+    def write_queued(self):
+        """write the queue as the pipe drains"""
+        try:
+            while self.write_some():
+                trampoline(self.fileno, write=True)
+        finally:
+            self.writer = None
+
+    def receive(self):
+        """wait (without blocking the hub) for a message tuple from the other end
+        Raises:
+            EOFError: if the other end has closed.
+        """
+        header_size = self.HEADER.size
+        while True:
+            if len(self.read_buffer) >= header_size:
+                (size,) = self.HEADER.unpack_from(self.read_buffer)
+                if len(self.read_buffer) >= header_size + size:
+                    payload = self.read_buffer[header_size : header_size + size]
+                    del self.read_buffer[: header_size + size]
+                    return pickle.loads(payload)
+            try:
+                data = os.read(self.fileno, self.READ_SIZE)
+            except BlockingIOError:
+                trampoline(self.fileno, read=True)
+                continue
+            if not data:
+                raise EOFError
+            self.read_buffer += data
+
+    def close(self):
+        """close this end of the pipe"""
+        if self.writer is not None:
+            self.writer.kill()
+        self.connection.close()
+
+
+class ShardEapSocket:
+    """Stands in for EapSocket in a shard, frames are transmitted by the parent"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send(self, data):
+        """hand an ethernet frame to the parent to send
+        data (bytes): data to send"""
+        self.channel.send((SEND_EAP, data))
+
+    def close(self):
+        """nothing to close, the parent owns the socket"""
+
+
+class ChewieShard(Chewie):
+    """Chewie running in a worker process for the ports of one shard.
+
+    The parent owns the raw sockets, it hands this shard the frames for its ports and
+    sends the frames (and handler callbacks) this shard passes back. Each shard has its
+    own RADIUS sockets, and so its own RADIUS packet ID space.
+    """
+
+    def __init__(self, channel, shard_index, interface_name, logger=None, **kwargs):
+        super().__init__(interface_name, logger, **kwargs)
+        self.channel = channel
+        self.shard_index = shard_index
+        self.auth_handler = self.forward_auth_success
+        self.failure_handler = self.forward_auth_failure
+        self.logoff_handler = self.forward_auth_logoff
+
+    def run(self):
+        """setup the shard and start its eventlet threads"""
+        self.logger.info("Starting shard %d", self.shard_index)
+        self.eap_socket = ShardEapSocket(self.channel)
+        self.setup_radius_socket()
+        self.start_threads_and_wait()
+
+    def start_threads_and_wait(self):
+        """Start the thread and wait until they complete (hopefully never)"""
+        self.pool = GreenPool()
+
+        self.eventlets.append(self.pool.spawn(self.send_eap_messages))
+        self.eventlets.append(self.pool.spawn(self.receive_parent_messages))
+
+        self.eventlets.append(self.pool.spawn(self.send_radius_messages))
+        for socket_index in range(len(self.radius_sockets)):
+            self.eventlets.append(
+                self.pool.spawn(self.receive_radius_messages, socket_index)
+            )
+
+        self.eventlets.append(self.pool.spawn(self.timer_scheduler.run))
+
+        self.pool.waitall()
+
+    def receive_parent_messages(self):
+        """receive frames and port events from the parent until it goes away"""
+        while self.running():
+            sleep(0)
+            try:
+                message = self.channel.receive()
+            except EOFError:
+                self.logger.warning("parent has gone away, stopping shard")
+                self.shutdown()
+                return
+            self.handle_parent_message(message)
+
+    def handle_parent_message(self, message):
+        """Act on a message tuple from the parent"""
+        kind, value = message
+        if kind == EAP_FRAME:
+            self.process_eap_frame(value)
+        elif kind == MAB_FRAME:
+            self.send_eth_to_state_machine(value)
+        elif kind == PORT_UP:
+            self.port_up(value)
+        elif kind == PORT_DOWN:
+            self.port_down(value)
+        else:
+            self.logger.warning("unknown message from parent: %s", kind)
+
+    def forward_auth_success(self, src_mac, port_id, *args, **kwargs):
+        """pass an authentication success up to the parent's auth_handler"""
+        self.channel.send((AUTH_SUCCESS, src_mac, port_id, args, kwargs))
+
+    def forward_auth_failure(self, src_mac, port_id):
+        """pass an authentication failure up to the parent's failure_handler"""
+        self.channel.send((AUTH_FAILURE, src_mac, port_id))
+
+    def forward_auth_logoff(self, src_mac, port_id):
+        """pass a logoff up to the parent's logoff_handler"""
+        self.channel.send((AUTH_LOGOFF, src_mac, port_id))
+
+
+def run_shard(connection, shard_index, interface_name, log_name, chewie_kwargs):
+    """Entry point of a shard worker process"""
+    logger = get_logger(log_name)
+    shard = ChewieShard(
+        ShardChannel(connection), shard_index, interface_name, logger, **chewie_kwargs
+    )
+    shard.run()
+
+
+# pylint: disable=too-many-instance-attributes
+class ShardedChewie:
+    """Drop in replacement for Chewie that spreads ports over several worker processes.
+
+    The raw EAP and MAB sockets stay in this (parent) process, received frames are handed
+    to the worker that owns the port (the frame's destination MAC), and callbacks from the
+    workers are aggregated back into the handlers given here.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        interface_name,
+        logger=None,
+        auth_handler=None,
+        failure_handler=None,
+        logoff_handler=None,
+        radius_server_ip=None,
+        radius_server_port=None,
+        radius_server_secret=None,
+        chewie_id=None,
+        reauth_jitter=0.0,
+        max_reauths_per_second=None,
+        use_packet_ring=False,
+        radius_sockets=1,
+        radius_servers=None,
+        radsec=None,
+        mab_cache_ttl=None,
+        mab_cache_size=None,
+        mab_reject_backoff=None,
+        mab_reject_max_backoff=None,
+        mab_mac_rate=None,
+        mab_port_rate=None,
+        workers=None,
+    ):
+        self.interface_name = interface_name
+        self.use_packet_ring = use_packet_ring
+        self.log_name = ShardedChewie.__name__
+        if logger:
+            self.log_name = logger.name + "." + ShardedChewie.__name__
+
+        self.logger = get_logger(self.log_name)
+        self.auth_handler = auth_handler
+        self.failure_handler = failure_handler
+        self.logoff_handler = logoff_handler
+
+        self.workers = workers or os.cpu_count() or 1
+        self.chewie_kwargs = {
+            "radius_server_ip": radius_server_ip,
+            "radius_server_port": radius_server_port,
+            "radius_server_secret": radius_server_secret,
+            "chewie_id": chewie_id,
+            "reauth_jitter": reauth_jitter,
+            "max_reauths_per_second": max_reauths_per_second,
+            "radius_sockets": radius_sockets,
+            "radius_servers": radius_servers,
+            "radsec": radsec,
+            "mab_cache_ttl": mab_cache_ttl,
+            "mab_cache_size": mab_cache_size,
+            "mab_reject_backoff": mab_reject_backoff,
+            "mab_reject_max_backoff": mab_reject_max_backoff,
+            "mab_mac_rate": mab_mac_rate,
+            "mab_port_rate": mab_port_rate,
+        }
+
+        self.channels = []
+        self.processes = []
+        self.eap_socket = None
+        self.mab_socket = None
+        self.pool = None
+        self.eventlets = []
+
+    def run(self):
+        """start the workers, setup the raw sockets and start socket eventlet threads"""
+        self.logger.info("Starting %d shards", self.workers)
+        self.start_workers()
+        self.setup_eap_socket()
+        self.setup_mab_socket()
+        self.start_threads_and_wait()
+
+    def running(self):
+        """Used to nicely exit the event loops"""
+        return True
+
+    def start_workers(self):
+        """Start one worker process per shard (once)"""
+        if self.channels:
+            return
+        # spawn, the parent's eventlet hub must not be inherited by the workers.
+        context = multiprocessing.get_context("spawn")
+        for shard_index in range(self.workers):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=run_shard,
+                args=(
+                    child_connection,
+                    shard_index,
+                    self.interface_name,
+                    "%s.shard%d" % (self.log_name, shard_index),
+                    self.chewie_kwargs,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+            self.channels.append(ShardChannel(parent_connection))
+            self.processes.append(process)
+
+    def shutdown(self):
+        """kill eventlets and workers, close the sockets and quit"""
+        for eventlet in self.eventlets:
+            eventlet.kill()
+        for sock in (self.eap_socket, self.mab_socket):
+            if sock is not None:
+                sock.close()
+        for channel in self.channels:
+            channel.close()
+        for process in self.processes:
+            process.terminate()
+            process.join()
+
+    def start_threads_and_wait(self):
+        """Start the thread and wait until they complete (hopefully never)"""
+        self.pool = GreenPool()
+
+        self.eventlets.append(self.pool.spawn(self.receive_eap_messages))
+        self.eventlets.append(self.pool.spawn(self.receive_mab_messages))
+        for channel in self.channels:
+            self.eventlets.append(self.pool.spawn(self.receive_shard_messages, channel))
+
+        self.pool.waitall()
+
+    def setup_eap_socket(self):
+        """Setup EAP socket"""
+        log_prefix = "%s.EapSocket" % self.logger.name
+        self.eap_socket = EapSocket(
+            self.interface_name, log_prefix, use_packet_ring=self.use_packet_ring
+        )
+        self.eap_socket.setup()
+
+    def setup_mab_socket(self):
+        """Setup Mab socket"""
+        log_prefix = "%s.MabSocket" % self.logger.name
+        self.mab_socket = MabSocket(
+            self.interface_name, log_prefix, use_packet_ring=self.use_packet_ring
+        )
+        self.mab_socket.setup()
+
+    def channel_for_port(self, port_id):
+        """
+        Args:
+            port_id (str or MacAddress or bytes): the 'mac' identifier of the switch port
+        Returns:
+            ShardChannel of the worker that owns port_id
+        """
+        self.start_workers()
+        return self.channels[shard_for_port(port_id, len(self.channels))]
+
+    def port_up(self, port_id):
+        """
+        should be called by faucet when port has come up
+        Args:
+            port_id (str): id of port.
+        """
+        self.channel_for_port(port_id).send((PORT_UP, port_id))
+
+    def port_down(self, port_id):
+        """
+        should be called by faucet when port has gone down.
+        Args:
+            port_id (str): id of port.
+        """
+        self.channel_for_port(port_id).send((PORT_DOWN, port_id))
+
+    def dispatch_frame(self, kind, packed_message):
+        """hand a received ethernet frame to the shard that owns its port (dst mac)"""
+        if len(packed_message) < 6:
+            self.logger.warning("dropping runt frame: %s", packed_message)
+            return
+        self.channel_for_port(packed_message[0:6]).send((kind, packed_message))
+
+    def receive_eap_messages(self):
+        """receive eap messages from supplicant forever."""
+        while self.running():
+            sleep(0)
+            for packed_message in self.eap_socket.receive_batch():
+                self.dispatch_frame(EAP_FRAME, packed_message)
+
+    def receive_mab_messages(self):
+        """Receive DHCP request for MAB."""
+        while self.running():
+            sleep(0)
+            for packed_message in self.mab_socket.receive_batch():
+                self.dispatch_frame(MAB_FRAME, packed_message)
+
+    def receive_shard_messages(self, channel):
+        """receive frames to send and handler callbacks from a shard"""
+        while self.running():
+            sleep(0)
+            try:
+                message = channel.receive()
+            except EOFError:
+                self.logger.error("shard has gone away")
+                return
+            self.handle_shard_message(message)
+
+    def handle_shard_message(self, message):
+        """Act on a message tuple from a shard"""
+        kind = message[0]
+        if kind == SEND_EAP:
+            self.eap_socket.send(message[1])
+        elif kind == AUTH_SUCCESS:
+            _, src_mac, port_id, args, kwargs = message
+            if self.auth_handler:
+                self.auth_handler(src_mac, port_id, *args, **kwargs)
+        elif kind == AUTH_FAILURE:
+            _, src_mac, port_id = message
+            if self.failure_handler:
+                self.failure_handler(src_mac, port_id)
+        elif kind == AUTH_LOGOFF:
+            _, src_mac, port_id = message
+            if self.logoff_handler:
+                self.logoff_handler(src_mac, port_id)
+        else:
+            self.logger.warning("unknown message from shard: %s", kind)
@@ -1,10 +1,15 @@
 """This Module provides the Abstract Design Requirements for a State Machine in Chewie"""
 from transitions.extensions import GraphMachine
 
+from chewie.state_machines.transition_table import TransitionTable
+
 
 class AbstractStateMachine:
     """This Class provides the Abstract Design Requirements for a State Machine in Chewie"""
 
+    # no __dict__ here, so subclasses can be made compact with __slots__
+    __slots__ = ()
+
     PROGRESS_STATES = []
 
     SUCCESS_STATES = []
@@ -32,6 +37,30 @@ class AbstractStateMachine:
         """
         return self.port_enabled and self.state in self.SUCCESS_STATES
 
+    @classmethod
+    def transition_table(cls):
+        """
+        Returns:
+            the class's TransitionTable, compiled on first use and shared by all instances
+        """
+        table = cls.__dict__.get("_transition_table")
+        if table is None:
+            table = TransitionTable(cls.STATES, cls.TRANSITIONS)
+            cls._transition_table = table
+        return table
+
+    def process(self):
+        """Take the first transition out of the current state whose conditions pass.
+        Returns:
+            True if a transition was taken
+        """
+        return self.transition_table().process(self)
+
+    def cancel_retransmit_timer(self):
+        """
+        Cancel any outstanding retransmit timer, state machines without one do nothing
+        """
+
     @classmethod
     def build_state_graph(cls, filename):
         "Build a graphc representation of the state machine and store in 'filename'.png"
@@ -1,6 +1,6 @@
 """Loosely based on RFC4137 'EAP State Machines' with some interpretation"""
 
-from transitions import State, Machine
+from transitions import State
 
 from chewie.eap import Eap
 from chewie.event import (
@@ -10,6 +10,7 @@ from chewie.event import (
     EventPortStatusChange,
     EventSessionTimeout,
     EventPreemptiveEAPResponseMessageReceived,
+    EventRadiusTimeout,
 )
 from chewie.message_parser import (
     SuccessMessage,
@@ -24,6 +25,7 @@ from chewie.message_parser import (
 import chewie.radius_attributes as radius_attributes
 from chewie.utils import (
     get_logger,
+    PrefixLogger,
     log_method,
     RadiusQueueMessage,
     EapQueueMessage,
@@ -80,8 +82,11 @@ class MPassthrough:
     """M = Method, so if we wanted to do MD5 locally (not passthrough), we'd
     Have class MMD5 with it's own implementation of the methods below"""
 
-    done = False
-    src_mac = None
+    __slots__ = ("done", "src_mac")
+
+    def __init__(self):
+        self.done = False
+        self.src_mac = None
 
     def check(self, eap_resp_data):  # pylint: disable=unused-argument
         """
@@ -118,6 +123,46 @@ class MPassthrough:
 
 
 # pylint: disable=missing-docstring
+class SessionContext:
+    """The objects every FullEAPStateMachine of one Chewie shares, so a session only
+    holds its own RFC 4137 variables."""
+
+    def __init__(
+        self,
+        eap_output_queue,
+        radius_output_queue,
+        timer_scheduler,
+        auth_handler,
+        failure_handler,
+        logoff_handler,
+        logger=None,
+        reauth_policy=None,
+        radius_retransmits=False,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Args:
+            eap_output_queue (Queue): where to put Messages to send to supplicants
+            radius_output_queue (Queue): where to put Messages to send to AAA server
+            timer_scheduler (Scheduler): where to put timer events.
+            auth_handler (callable): called on EAP-Success.
+            failure_handler (callable): called on EAP-Failure.
+            logoff_handler (callable): called on EAP-Logoff.
+            logger (Logger): shared by the sessions, which prefix their messages.
+            reauth_policy (ReauthPolicy): spreads session timeouts, None to use exact timeouts.
+            radius_retransmits (bool): True if RADIUS requests are retransmitted below the
+                state machines, which then get EventRadiusTimeout instead of setting a timer.
+        """
+        self.eap_output_messages = eap_output_queue
+        self.radius_output_messages = radius_output_queue
+        self.timer_scheduler = timer_scheduler
+        self.auth_handler = auth_handler
+        self.failure_handler = failure_handler
+        self.logoff_handler = logoff_handler
+        self.logger = logger
+        self.reauth_policy = reauth_policy
+        self.radius_retransmits = radius_retransmits
+
+
 class FullEAPStateMachine(AbstractStateMachine):
     """Based on RFC 4137 section 7 (EAP Full Authenticator).
     Only acts in passthrough mode (no local method support).
@@ -129,21 +174,6 @@ class FullEAPStateMachine(AbstractStateMachine):
 
     RADIUS_RETRANSMIT_TIMEOUT = 5
 
-    state = None
-    eap_output_messages = None
-    src_mac = None
-    # TODO can use dst_mac to verify where packet came from more thoroughly
-    port_id_mac = None
-    radius_state_attribute = None  # the last state from radius server
-    sent_count = 0
-    session_timeout_job = None
-
-    session_timeout = DEFAULT_SESSION_TIMEOUT
-    radius_tunnel_private_group_id = None
-    filter_id = None
-
-    machine = None
-
     NO_STATE = "NO_STATE"
     DISABLED = "DISABLED"
     INITIALIZE = "INITIALIZE"
@@ -445,61 +475,75 @@ class FullEAPStateMachine(AbstractStateMachine):
     # RFC 4137
     MAX_RETRANS = 5  # Configurable  max for retransmissions before aborting.
 
-    # Variables (AAA Interface to Full Authenticator)
-    aaa_eap_req = None  # bool
-    aaa_eap_no_req = None  # bool
-    aaa_success = None  # bool
-    aaa_fail = None  # bool
-    aaa_eap_req_data = None  # EAP packet
-    aaa_eap_key_data = None  # EAP Key
+    # Per session variables, one slot each (all start as None) so that the one
+    # state machine held per supplicant stays small.
+    SESSION_VARIABLES = (
+        "state",
+        "src_mac",
+        # TODO can use dst_mac to verify where packet came from more thoroughly
+        "port_id_mac",
+        "radius_state_attribute",  # the last state from radius server
+        "sent_count",
+        "session_timeout_job",
+        "retransmit_timer_job",
+        "session_timeout",
+        "radius_tunnel_private_group_id",
+        "filter_id",
+        # Variables (AAA Interface to Full Authenticator)
+        "aaa_eap_req",  # bool
+        "aaa_eap_no_req",  # bool
+        "aaa_success",  # bool
+        "aaa_fail",  # bool
+        "aaa_eap_req_data",  # EAP packet
+        "aaa_eap_key_data",  # EAP Key
+        # Variables (Full Authenticator to AAA Interface)
+        "aaa_eap_resp",  # bool
+        "aaa_eap_resp_data",  # EAP Packet
+        "aaa_identity",  # EAP Packet
+        "aaa_timeout",  # bool
+        # Stand-Alone Authenticator State Machine Local Variables
+        "current_method",  # EAP type
+        "current_id",  # integer
+        "method_state",  # enum
+        "retrans_count",  # integer
+        "last_req_data",  # EAP packet
+        "method_timeout",  # integer
+        "logoff",  # bool
+        # Non RFC 4137
+        "override_current_id",
+        # Lower Later  to Stand-Alone Authenticator
+        "eap_resp",  # bool
+        "eap_resp_data",  # EAP Packet
+        "port_enabled",  # bool
+        "retrans_while",  # integer
+        "eap_restart",  # bool
+        # Stand-Alone authenticator to Lower Layer
+        "eap_req",  # bool
+        "eap_no_req",  # bool
+        "eap_success",  # bool
+        "eap_fail",  # bool
+        "eap_timeout",  # bool
+        "eap_req_data",  # EAP Packet
+        "eap_key_data",  # EAP Key
+        "eap_key_available",  # bool
+        # Non RFC 4137
+        "eap_logoff",  # bool
+        # short term local variables (not maintained between packets)
+        "rx_resp",
+        "resp_id",
+        "resp_method",
+        "ignore",
+        "decision",
+    )
+    # __dict__ is only created if something (e.g. a test) overrides a constant.
+    __slots__ = ("__dict__", "context", "logger", "m") + SESSION_VARIABLES
+
+    # Variables never set by the passthrough authenticator, shared by all sessions
     aaa_eap_key_available = None  # bool
     aaa_method_timeout = None  # integer or NONE
-
-    # Variables (Full Authenticator to AAA Interface)
-    aaa_eap_resp = None  # bool
-    aaa_eap_resp_data = None  # EAP Packet
-    aaa_identity = None  # EAP Packet
-    aaa_timeout = None  # bool
-
-    # Stand-Alone Authenticator State Machine Local Variables
-    current_method = None  # EAP type
-    current_id = None  # integer
-    method_state = None  # enum
-    retrans_count = None  # integer
-    last_req_data = None  # EAP packet
-    method_timeout = None  # integer
-    logoff = None  # bool
-    # Non RFC 4137
-    override_current_id = None
-
-    # Lower Later  to Stand-Alone Authenticator
-    eap_resp = None  # bool
-    eap_resp_data = None  # EAP Packet
-    port_enabled = None  # bool
-    retrans_while = None  # integer
-    eap_restart = None  # bool
     eap_srtt = None  # integer
     eap_rttvar = None  # integer
 
-    # Stand-Alone authenticator to Lower Layer
-    eap_req = None  # bool
-    eap_no_req = None  # bool
-    eap_success = None  # bool
-    eap_fail = None  # bool
-    eap_timeout = None  # bool
-    eap_req_data = None  # EAP Packet
-    eap_key_data = None  # EAP Key
-    eap_key_available = None  # bool
-    # Non RFC 4137
-    eap_logoff = None  # bool
-
-    # short term local variables (not maintained between packets)
-    rx_resp = None
-    resp_id = None
-    resp_method = None
-    ignore = None
-    decision = None
-
     def __init__(
         self,
         eap_output_queue,
@@ -510,6 +554,7 @@ class FullEAPStateMachine(AbstractStateMachine):
         failure_handler,
         logoff_handler,
         log_prefix,
+        reauth_policy=None,
     ):
         """
 
@@ -521,32 +566,83 @@ class FullEAPStateMachine(AbstractStateMachine):
             radius_output_queue (Queue): where to put Messages to send to AAA server
             src_mac (MacAddress): MAC address this statemachine (sm) belongs to.
             timer_scheduler (Scheduler): where to put timer events. (useful for Retransmits)
+            reauth_policy (ReauthPolicy): spreads session timeouts, None to use exact timeouts.
         """
-        self.eap_output_messages = eap_output_queue
-        self.radius_output_messages = radius_output_queue
-        self.src_mac = src_mac
-        self.timer_scheduler = timer_scheduler
-        self.auth_handler = auth_handler
-        self.failure_handler = failure_handler
-        self.logoff_handler = logoff_handler
+        context = SessionContext(
+            eap_output_queue,
+            radius_output_queue,
+            timer_scheduler,
+            auth_handler,
+            failure_handler,
+            logoff_handler,
+            reauth_policy=reauth_policy,
+        )
+        self.init_session(context, src_mac, get_logger(log_prefix))
 
-        self.machine = Machine(
-            model=self,
-            states=FullEAPStateMachine.STATES,
-            transitions=FullEAPStateMachine.TRANSITIONS,
-            queued=True,
-            initial=FullEAPStateMachine.NO_STATE,
+    @classmethod
+    def from_context(cls, context, src_mac, log_prefix):
+        """Create a state machine that shares context with the other sessions.
+        Args:
+            context (SessionContext): queues, scheduler, handlers and logger.
+            src_mac (MacAddress): MAC address this statemachine (sm) belongs to.
+            log_prefix (str): prepended to this session's messages on context.logger.
+        Returns:
+            FullEAPStateMachine
+        """
+        state_machine = cls.__new__(cls)
+        state_machine.init_session(
+            context, src_mac, PrefixLogger(context.logger, log_prefix)
         )
+        return state_machine
+
+    def init_session(self, context, src_mac, logger):
+        """Set the per session variables to their initial values"""
+        for name in self.SESSION_VARIABLES:
+            setattr(self, name, None)
+        self.context = context
+        self.logger = logger
+        self.src_mac = src_mac
+        self.sent_count = 0
+        self.session_timeout = self.DEFAULT_SESSION_TIMEOUT
+
+        self.state = FullEAPStateMachine.NO_STATE
 
         # TODO dynamically assign this or make a way to give it multiple methods
         # and self.m is the one currently in use.
         # if we want to deal with each method locally.
         self.m = MPassthrough()  # pylint: disable=invalid-name
-        self.logger = get_logger(log_prefix)
 
         self.eap_restart = True
         self.port_enabled = True
 
+    @property
+    def eap_output_messages(self):
+        return self.context.eap_output_messages
+
+    @property
+    def radius_output_messages(self):
+        return self.context.radius_output_messages
+
+    @property
+    def timer_scheduler(self):
+        return self.context.timer_scheduler
+
+    @property
+    def auth_handler(self):
+        return self.context.auth_handler
+
+    @property
+    def failure_handler(self):
+        return self.context.failure_handler
+
+    @property
+    def logoff_handler(self):
+        return self.context.logoff_handler
+
+    @property
+    def reauth_policy(self):
+        return self.context.reauth_policy
+
     def is_eap_restart(self):
         return self.eap_restart
 
@@ -887,7 +983,7 @@ class FullEAPStateMachine(AbstractStateMachine):
         last_state = None
         while self.state != last_state:
             last_state = self.state
-            self.process()  # pylint: disable=no-member # pytype: disable=attribute-error
+            self.process()
 
     def lower_layer_reset(self):
         """Sets variables that are meant to be set by the lower layer
@@ -951,6 +1047,9 @@ class FullEAPStateMachine(AbstractStateMachine):
             self.port_status_event_received(event)
         elif isinstance(event, EventSessionTimeout):
             self.session_timeout_event_received()
+        elif isinstance(event, EventRadiusTimeout):
+            if self.radius_timeout_event_received():
+                return
 
         self.handle_message_received()
         self.logger.info("end state: %s", self.state)
@@ -990,7 +1089,10 @@ class FullEAPStateMachine(AbstractStateMachine):
                 )
 
                 self.sent_count += 1
-                self.set_timer(self.RADIUS_RETRANSMIT_TIMEOUT)
+                if self.context.radius_retransmits:
+                    self.cancel_retransmit_timer()
+                else:
+                    self.set_timer(self.RADIUS_RETRANSMIT_TIMEOUT)
             self.aaa_eap_resp = False
         # not tested
         elif self.aaa_eap_resp:
@@ -1040,9 +1142,17 @@ class FullEAPStateMachine(AbstractStateMachine):
         if self.session_timeout_job:
             self.session_timeout_job.cancel()
 
-        self.session_timeout_job = self.timer_scheduler.call_later(
-            self.session_timeout, self.event, EventSessionTimeout(self)
-        )
+        if self.reauth_policy:
+            self.session_timeout_job = self.reauth_policy.call_later(
+                self.timer_scheduler,
+                self.session_timeout,
+                self.event,
+                EventSessionTimeout(self),
+            )
+        else:
+            self.session_timeout_job = self.timer_scheduler.call_later(
+                self.session_timeout, self.event, EventSessionTimeout(self)
+            )
 
     def session_timeout_event_received(self):
         """process session timeout event"""
@@ -1054,6 +1164,8 @@ class FullEAPStateMachine(AbstractStateMachine):
             event (EventPortStatusChange):
         """
         self.port_enabled = event.port_status
+        if not self.port_enabled:
+            self.cancel_retransmit_timer()
 
     def timer_expired_event_received(self, event):
         """Check if the event has been replied to. and set variables.
@@ -1082,6 +1194,18 @@ class FullEAPStateMachine(AbstractStateMachine):
         self.logger.debug("ignoring timer event, already received a reply.")
         return True
 
+    def radius_timeout_event_received(self):
+        """The RADIUS request has gone unanswered.
+        Returns:
+            True if this event is being ignored (no longer waiting for the AAA server).
+        """
+        if self.state != self.AAA_IDLE:
+            self.logger.debug("ignoring RADIUS timeout, not waiting for a reply.")
+            return True
+        self.logger.info("RADIUS request timed out")
+        self.aaa_timeout = True
+        return False
+
     def message_event_received(self, event):
         """Sets variables for the Eap message being received.
         Args:
@@ -1158,7 +1282,10 @@ class FullEAPStateMachine(AbstractStateMachine):
         # TODO could also set filter-id/vlans/acls here.
 
     def set_timer(self, timeout):
-        """Sets a timer to trigger a retransmit if no packet received."""
+        """Sets a timer to trigger a retransmit if no packet received.
+        Any previous retransmit timer has been superseded by this send, so it is cancelled.
+        """
+        self.cancel_retransmit_timer()
         # These messages should not expect a reply, so set the timer.
         if self.state not in [
             self.SUCCESS,
@@ -1168,11 +1295,15 @@ class FullEAPStateMachine(AbstractStateMachine):
             self.TIMEOUT_FAILURE,
             self.TIMEOUT_FAILURE2,
         ]:
-            self.timer_scheduler.call_later(
+            self.retransmit_timer_job = self.timer_scheduler.call_later(
                 timeout, self.event, EventTimerExpired(self, self.sent_count)
             )
-            # TODO could cancel the scheduled events when
-            # they're no longer needed (i.e. response received)
+
+    def cancel_retransmit_timer(self):
+        """Cancel the outstanding retransmit timer (if any)."""
+        if self.retransmit_timer_job:
+            self.retransmit_timer_job.cancel()
+            self.retransmit_timer_job = None
 
     def is_in_progress(self):
         return self.state not in [
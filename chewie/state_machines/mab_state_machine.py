@@ -1,10 +1,15 @@
 """This Module provides a Bare-bones Mac Authentication Bypass State Machine provide 802.1x
 MAB Support in Chewie"""
 
-from transitions import State, Machine
+from transitions import State
 
-from chewie.event import EventMessageReceived, EventRadiusMessageReceived
+from chewie.event import (
+    EventMessageReceived,
+    EventRadiusMessageReceived,
+    EventRadiusTimeout,
+)
 from chewie.radius import RadiusAccessAccept, RadiusAccessReject
+from chewie.radius_attributes import SessionTimeout
 from chewie.utils import get_logger, log_method, RadiusQueueMessage
 from chewie.state_machines.abstract_state_machine import AbstractStateMachine
 
@@ -110,6 +115,7 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
     aaa_response_data = None
     aaa_request_data = None
     aaa_response_attributes = None
+    aaa_cached = False
 
     eth_received = True
     eth_message_data = None
@@ -187,6 +193,8 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
         auth_handler,
         failure_handler,
         log_prefix,
+        mab_cache=None,
+        mab_reject_cache=None,
     ):
         """
 
@@ -197,21 +205,21 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
             src_mac (MacAddress): MAC address this statemachine (sm) belongs to.
             timer_scheduler (Scheduler): where to put timer events. (useful for Retransmits)
             log_prefix (String): the prefix used when outputting logs
+            mab_cache (MabResultCache): Access-Accepts to reuse instead of asking the
+                AAA server again, None to always ask.
+            mab_reject_cache (MabRejectCache): MACs rejected recently, that are not
+                asked about again until their backoff ends. None to always ask.
         """
         self.radius_output_messages = radius_output_queue
         self.src_mac = src_mac
         self.timer_scheduler = timer_scheduler
         self.auth_handler = auth_handler
         self.failure_handler = failure_handler
+        self.mab_cache = mab_cache
+        self.mab_reject_cache = mab_reject_cache
         self.aaa_sent_count = 0
         self.set_timer = None
-        self.machine = Machine(
-            model=self,
-            states=MacAuthenticationBypassStateMachine.STATES,
-            transitions=MacAuthenticationBypassStateMachine.TRANSITIONS,
-            queued=True,
-            initial=MacAuthenticationBypassStateMachine.DISABLED,
-        )
+        self.state = MacAuthenticationBypassStateMachine.DISABLED
 
         self.logger = get_logger(log_prefix)
 
@@ -233,6 +241,7 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
         self.eth_received = False
         self.eth_message_data = None
         self.aaa_response_attributes = None
+        self.aaa_cached = False
 
     def event(self, event):
         """Processes an event for the state machine"""
@@ -245,6 +254,8 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
         # Process Decisions
         if isinstance(event, EventMessageReceived):
             self.event_message_received(event)
+        elif isinstance(event, EventRadiusTimeout):
+            self.radius_timeout_event_received()
         else:
             self.logger.error(
                 "MAB State Machine error. Incorrect event received. %s", event.__dict__
@@ -256,6 +267,17 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
     def handle_success(self):
         """Handle a AAA_Success event"""
         self.logger.info("Successful MAB Authentication. Running Auth Handler")
+        if self.mab_cache is not None and not self.aaa_cached:
+            attributes = self.aaa_response_attributes or {}
+            self.mab_cache.add(
+                self.src_mac,
+                self.port_id_mac,
+                self.aaa_response_data,
+                self.aaa_response_attributes,
+                attributes.get(SessionTimeout.DESCRIPTION),
+            )
+        if self.mab_reject_cache is not None:
+            self.mab_reject_cache.remove(self.src_mac)
         self.auth_handler(
             self.src_mac,
             str(self.port_id_mac),
@@ -266,6 +288,13 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
     def handle_failure(self):
         """Handle a AAA_Failure event"""
         self.logger.info("Failed MAB Authentication. Running Failure Handler")
+        if self.mab_cache is not None:
+            self.mab_cache.remove(self.src_mac, self.port_id_mac)
+        if self.mab_reject_cache is not None and not self.aaa_cached:
+            hold_down = self.mab_reject_cache.add(self.src_mac, self.aaa_response_data)
+            self.logger.info(
+                "Not sending MAB requests for %s for %s seconds", self.src_mac, hold_down
+            )
         self.failure_handler(self.src_mac, str(self.port_id_mac))
 
     def handle_event_received(self):
@@ -273,7 +302,16 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
         last_state = None
         while self.state != last_state:
             last_state = self.state
-            self.process()  # pylint: disable=no-member # pytype: disable=attribute-error
+            self.process()
+
+    def radius_timeout_event_received(self):
+        """Handle the RADIUS server not answering the AAA request.
+        Goes back to DISABLED, so the client's next frame starts a new request."""
+        if self.state != self.AAA_IDLE:
+            self.logger.info("Ignoring RADIUS timeout in state: %s", self.state)
+            return
+        self.logger.warning("RADIUS server did not answer MAB request")
+        self.mab_restart = True
 
     def event_message_received(self, event):
         """Handle a message received event"""
@@ -313,6 +351,30 @@ class MacAuthenticationBypassStateMachine(AbstractStateMachine):
         ethernet_packet = self.eth_message_data
         src_mac = ethernet_packet.src_mac
 
+        if self.mab_cache is not None:
+            cached = self.mab_cache.get(src_mac, port_id)
+            if cached is not None:
+                self.logger.info("Reusing cached Access-Accept for MAB %s", src_mac)
+                self.aaa_cached = True
+                self.aaa_received = True
+                self.aaa_success = True
+                self.aaa_response_data = cached.reply
+                self.aaa_response_attributes = cached.attributes
+                return
+
+        if self.mab_reject_cache is not None:
+            rejected = self.mab_reject_cache.get(src_mac)
+            if rejected is not None:
+                self.logger.info("MAB %s was rejected recently, not asking", src_mac)
+                # answered, so the frame cannot restart authentication from
+                # AAA_FAILURE.
+                self.eth_received = False
+                self.aaa_cached = True
+                self.aaa_received = True
+                self.aaa_fail = True
+                self.aaa_response_data = rejected.reply
+                return
+
         # Build the RADIUS Packet and send
         self.radius_output_messages.put_nowait(
             RadiusQueueMessage(
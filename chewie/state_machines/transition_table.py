@@ -0,0 +1,72 @@
+"""Transition graph compiled once per state machine class and shared by every instance"""
+
+
+class TransitionTable:
+    """Precompiled equivalent of a queued transitions.Machine with a single trigger.
+
+    transitions.Machine builds its State/Transition/Event objects (and binds trigger and
+    convenience methods) per model, which is a lot of CPU and memory per supplicant.
+    The table keeps, per source state, the ordered candidate transitions and, per state,
+    the on_enter callback names. Evaluation follows transitions' semantics: candidates
+    are tried in declaration order ('*' sources expanded to every state), a candidate
+    is taken when all 'conditions' equal True and all 'unless' equal False, and taking
+    it (reflexive transitions included) sets model.state and runs the dest's on_enter
+    callbacks.
+    """
+
+    def __init__(self, states, transitions, trigger="process"):
+        """
+        Args:
+            states (list): transitions.State (or anything with name and on_enter)
+            transitions (list): transition dicts as given to transitions.Machine
+            trigger (str): only transitions with this trigger are compiled.
+        """
+        self.on_enter = {state.name: tuple(state.on_enter) for state in states}
+        self.transitions = {state.name: [] for state in states}
+        for transition in transitions:
+            if transition["trigger"] != trigger:
+                continue
+            candidate = (
+                transition["dest"],
+                tuple(transition.get("conditions", ())),
+                tuple(transition.get("unless", ())),
+            )
+            source = transition["source"]
+            if source == "*":
+                sources = list(self.transitions)
+            elif isinstance(source, str):
+                sources = [source]
+            else:
+                sources = source
+            for name in sources:
+                self.transitions[name].append(candidate)
+        # tuples are smaller and quicker to iterate than lists.
+        self.transitions = {
+            name: tuple(candidates) for name, candidates in self.transitions.items()
+        }
+
+    @staticmethod
+    def check(model, name, target):
+        """Evaluate a condition the way transitions.Condition does.
+        Returns:
+            True if the model's predicate (method or attribute) 'name' equals target
+        """
+        predicate = getattr(model, name)
+        if callable(predicate):
+            predicate = predicate()
+        return predicate == target
+
+    def process(self, model):
+        """Take the first transition out of model.state whose conditions pass.
+        Returns:
+            True if a transition was taken.
+        """
+        for dest, conditions, unless in self.transitions[model.state]:
+            if all(self.check(model, name, True) for name in conditions) and all(
+                self.check(model, name, False) for name in unless
+            ):
+                model.state = dest
+                for callback in self.on_enter[dest]:
+                    getattr(model, callback)()
+                return True
+        return False
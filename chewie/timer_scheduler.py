@@ -1,8 +1,10 @@
 """Homebrew Event scheduler, as sched.scheduler was not working outside of unittests"""
 import heapq
+import itertools
 import time
 
 import eventlet
+from eventlet.event import Event
 
 
 class TimerJob:
@@ -12,6 +14,7 @@ class TimerJob:
     is_cancelled = False
     func = None
     args = None
+    bucket = None
 
     def __init__(self, expiry_time, func, args):
         self.expiry_time = expiry_time
@@ -21,6 +24,8 @@ class TimerJob:
     def cancel(self):
         """Cancel the callback."""
         self.is_cancelled = True
+        if self.bucket is not None:
+            self.bucket.remove(self)
 
     def cancelled(self):
         """
@@ -37,16 +42,217 @@ class TimerJob:
         return self.expiry_time
 
 
+class TimerBucket:
+    """A slot of a TimingWheel, holds all jobs that expire within one tick of that wheel"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.expiration = None
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, job):
+        """Add job to this bucket"""
+        job.bucket = self
+        self.jobs[id(job)] = job
+
+    def remove(self, job):
+        """Remove job from this bucket (O(1))"""
+        if self.jobs.pop(id(job), None) is not None:
+            job.bucket = None
+        if not self.jobs:
+            self.expiration = None
+
+    def set_expiration(self, expiration):
+        """Bring the bucket's expiration forward to expiration.
+        A bucket never moves later while it holds jobs, anything flushed early is re-added.
+        Returns:
+            True if the expiration changed and the bucket needs (re)queueing.
+        """
+        if self.expiration is not None and self.expiration <= expiration:
+            return False
+        self.expiration = expiration
+        return True
+
+    def flush(self):
+        """Empty the bucket.
+        Returns:
+            list of the jobs that were in the bucket.
+        """
+        jobs = list(self.jobs.values())
+        for job in jobs:
+            job.bucket = None
+        self.jobs = {}
+        self.expiration = None
+        return jobs
+
+
+class TimingWheel:
+    """Hierarchical timing wheel (Varghese & Lauck).
+
+    Each wheel has `wheel_size` buckets of `tick` seconds. Jobs beyond the span of a wheel go to
+    an overflow wheel whose tick is the span of the wheel below it, so insert and cancel are
+    O(1) regardless of how many jobs are pending. Buckets (not jobs) that hold anything are
+    kept in a heap shared by all levels, which gives the next deadline to sleep until.
+    """
+
+    def __init__(self, tick, wheel_size, start_time, bucket_queue, level=0):
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.interval = tick * wheel_size
+        self.level = level
+        self.buckets = [TimerBucket() for _ in range(wheel_size)]
+        self.current_time = start_time - (start_time % tick)
+        self.bucket_queue = bucket_queue
+        self.overflow_wheel = None
+
+    def add(self, job):
+        """Add job to the wheel.
+        Returns:
+            False if the job is already due and should be run now, otherwise True.
+        """
+        expiry_time = job.expiry_time
+        if self.level == 0 and expiry_time < self.current_time:
+            return False
+
+        if expiry_time < self.current_time + self.interval:
+            virtual_id = int(expiry_time // self.tick)
+            bucket = self.buckets[virtual_id % self.wheel_size]
+            bucket.add(job)
+            # The lowest wheel fires at the end of the tick so jobs never run early,
+            # upper wheels fire at the start so their jobs can cascade down in time.
+            expiration = virtual_id * self.tick
+            if self.level == 0:
+                expiration += self.tick
+            if bucket.set_expiration(expiration):
+                self.bucket_queue.push(bucket)
+            return True
+
+        if self.overflow_wheel is None:
+            self.overflow_wheel = TimingWheel(
+                self.interval,
+                self.wheel_size,
+                self.current_time,
+                self.bucket_queue,
+                self.level + 1,
+            )
+        return self.overflow_wheel.add(job)
+
+    def pending_jobs(self):
+        """
+        Returns:
+            number of jobs held by this wheel and its overflow wheels
+        """
+        pending = sum(len(bucket) for bucket in self.buckets)
+        if self.overflow_wheel is not None:
+            pending += self.overflow_wheel.pending_jobs()
+        return pending
+
+    def advance_clock(self, now):
+        """Move the current time of this wheel (and all overflow wheels) up to now"""
+        if now >= self.current_time + self.tick:
+            self.current_time = now - (now % self.tick)
+            if self.overflow_wheel is not None:
+                self.overflow_wheel.advance_clock(self.current_time)
+
+
+class BucketQueue:
+    """Heap of TimerBuckets ordered by expiration"""
+
+    COMPACT_MIN_SIZE = 64
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.compact_size = self.COMPACT_MIN_SIZE
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, bucket):
+        """Queue a bucket by its current expiration"""
+        heapq.heappush(self.heap, (bucket.expiration, next(self.counter), bucket))
+        if len(self.heap) > self.compact_size:
+            self.compact()
+
+    @staticmethod
+    def is_live(entry):
+        """
+        Returns:
+            True if the heap entry still refers to a queued, non-empty bucket.
+        """
+        expiration, _, bucket = entry
+        return bucket.expiration == expiration and bucket.jobs
+
+    def compact(self):
+        """Drop entries for buckets that have been emptied by cancellation or requeued,
+        so the heap size tracks live buckets (amortised O(1) per push)"""
+        self.heap = [entry for entry in self.heap if self.is_live(entry)]
+        heapq.heapify(self.heap)
+        self.compact_size = max(2 * len(self.heap), self.COMPACT_MIN_SIZE)
+
+    def peek_expiration(self):
+        """
+        Returns:
+            Earliest bucket expiration, or None if there are no buckets.
+        """
+        while self.heap:
+            # Entries for buckets that were flushed, emptied or requeued are stale.
+            if self.is_live(self.heap[0]):
+                return self.heap[0][0]
+            heapq.heappop(self.heap)
+        return None
+
+    def pop(self):
+        """Remove and return the bucket with the earliest expiration"""
+        _, _, bucket = heapq.heappop(self.heap)
+        return bucket
+
+
 class TimerScheduler:
-    """wraps a heapbased queue with a similar api to asyncio.loop"""
+    """wraps a hierarchical timing wheel with a similar api to asyncio.loop"""
+
+    DEFAULT_TICK = 0.01  # seconds
+    DEFAULT_WHEEL_SIZE = 256
 
-    def __init__(self, logger, sleep=None):
+    def __init__(
+        self, logger, sleep=None, clock=None, tick=None, wheel_size=None
+    ):  # pylint: disable=too-many-arguments
         self.logger = logger
-        self.timer_heap = []
 
         self.sleep = eventlet.sleep
         if sleep:
             self.sleep = sleep
+        self.clock = time.monotonic
+        if clock:
+            self.clock = clock
+
+        self.bucket_queue = BucketQueue()
+        self.timing_wheel = TimingWheel(
+            tick or self.DEFAULT_TICK,
+            wheel_size or self.DEFAULT_WHEEL_SIZE,
+            self.clock(),
+            self.bucket_queue,
+        )
+        self.ready_jobs = []
+        self.wakeup = Event()
+        self.next_deadline = None
+
+    def time(self):
+        """
+        Returns:
+            current time of the scheduler's (monotonic) clock, same api as asyncio.loop.time()
+        """
+        return self.clock()
+
+    def pending_jobs(self):
+        """
+        Returns:
+            number of live (not yet run and not cancelled) jobs
+        """
+        ready = sum(1 for job in self.ready_jobs if not job.cancelled())
+        return ready + self.timing_wheel.pending_jobs()
 
     def call_later(self, timeout, func, *args):
         """Scheduler callback.
@@ -57,39 +263,78 @@ class TimerScheduler:
             *args: arguments for func
 
         Returns:
-            tuple (expiry_time, dict) - can be used for cancelling the job
+            TimerJob - can be used for cancelling the job
         """
         if not args:
             args = []
         self.logger.debug(
             "submitted job %s expire in %d, args: %s", func.__name__, timeout, args
         )
-        expiry_time = time.time() + timeout
+        now = self.clock()
+        job = TimerJob(now + timeout, func, args)
 
-        job = TimerJob(expiry_time, func, args)
-        heapq.heappush(self.timer_heap, (expiry_time, job))
+        self.timing_wheel.advance_clock(now)
+        if not self.timing_wheel.add(job):
+            self.ready_jobs.append(job)
+            self._wake(now)
+        elif self.next_deadline is None or job.bucket.expiration < self.next_deadline:
+            self._wake(job.bucket.expiration)
         return job
 
+    def _wake(self, deadline):
+        """Wake the run loop early, it is sleeping past deadline"""
+        self.next_deadline = deadline
+        if not self.wakeup.ready():
+            self.wakeup.send()
+
+    def expire_due_jobs(self, now):
+        """Move every job that is due at 'now' onto the ready list.
+        Returns:
+            list of due TimerJob, ordered by expiry_time
+        """
+        while True:
+            expiration = self.bucket_queue.peek_expiration()
+            if expiration is None or expiration > now:
+                break
+            bucket = self.bucket_queue.pop()
+            self.timing_wheel.advance_clock(now)
+            for job in bucket.flush():
+                if job.expiry_time <= now or not self.timing_wheel.add(job):
+                    self.ready_jobs.append(job)
+
+        ready_jobs = self.ready_jobs
+        self.ready_jobs = []
+        ready_jobs.sort(key=lambda job: job.expiry_time)
+        return ready_jobs
+
+    def run_job(self, job):
+        """Run a single job unless it was cancelled after being expired"""
+        if job.cancelled():
+            self.logger.debug("job %s has been cancelled", job.func.__name__)
+            return
+        self.logger.info("running job %s %s", job.func.__name__, job.args)
+        try:
+            job.func(*job.args)
+        except Exception as e:  # pylint: disable=broad-except
+            self.logger.exception(e)
+
     def run(self):
         """Main loop. should run forever"""
         while True:
-            try:
-                if self.timer_heap:
-                    if self.timer_heap[0][0] < time.time():
-                        _, job = heapq.heappop(self.timer_heap)
-                        if not job.cancelled():
-                            self.logger.info(
-                                "running job %s %s", job.func.__name__, job.args
-                            )
-                            job.func(*job.args)
-                        else:
-                            self.logger.debug(
-                                "job %s has been cancelled", job.func.__name__
-                            )
-                    else:
-                        self.sleep(1)
-                else:
-                    self.sleep(1)
-            except Exception as e:
-                self.logger.exception(e)
-        self.logger.warning("timer_scheduler finished quuee")
+            for job in self.expire_due_jobs(self.clock()):
+                self.run_job(job)
+            # let other greenthreads in between bursts of jobs.
+            self.sleep(0)
+            if self.ready_jobs:
+                continue
+
+            self.next_deadline = self.bucket_queue.peek_expiration()
+            timeout = None
+            if self.next_deadline is not None:
+                timeout = max(self.next_deadline - self.clock(), 0)
+            if self.wakeup.ready():
+                self.wakeup = Event()
+                continue
+            self.wakeup.wait(timeout)
+            if self.wakeup.ready():
+                self.wakeup = Event()
@@ -10,6 +10,49 @@ def get_logger(logname):
     return logger
 
 
+class PrefixLogger:
+    """Prefixes messages logged to a shared logger.
+
+    logging.getLogger() keeps every logger it creates, so a logger per client would
+    never be freed; many objects can share one logger through these instead.
+    """
+
+    __slots__ = ("logger", "prefix")
+
+    def __init__(self, logger, prefix):
+        self.logger = logger
+        self.prefix = prefix
+
+    def log(self, level, msg, *args, **kwargs):
+        """Log msg % args with the prefix, if level is enabled"""
+        if not self.logger.isEnabledFor(level):
+            return
+        kwargs.setdefault("stacklevel", 3)
+        if args:
+            self.logger.log(level, "%s " + str(msg), self.prefix, *args, **kwargs)
+        else:
+            self.logger.log(level, "%s %s", self.prefix, msg, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):  # pylint: disable=missing-docstring
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):  # pylint: disable=missing-docstring
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):  # pylint: disable=missing-docstring
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):  # pylint: disable=missing-docstring
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def exception(self, msg, *args, **kwargs):  # pylint: disable=missing-docstring
+        kwargs.setdefault("exc_info", True)
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def isEnabledFor(self, level):  # pylint: disable=invalid-name,missing-docstring
+        return self.logger.isEnabledFor(level)
+
+
 def log_method(method):
     """Generate method for logging"""
 
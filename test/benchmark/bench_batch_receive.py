@@ -0,0 +1,67 @@
+"""Compares syscalls and time per frame for recv, the recv fallback and recvmmsg.
+
+    python3 test/benchmark/bench_batch_receive.py [frames]
+"""
+
+import socket
+import sys
+import time
+
+from chewie.batch_socket import BatchReceiver, RECVMMSG
+
+FRAME = bytes(64)
+
+
+def fill(sending, frames):
+    for _ in range(frames):
+        sending.send(FRAME)
+
+
+def bench_recv(receiving, sending, frames):
+    """one recv per frame, as the receive() loops did"""
+    fill(sending, frames)
+    start = time.perf_counter()
+    for _ in range(frames):
+        receiving.recv(4096)
+    return frames, time.perf_counter() - start
+
+
+def bench_batch(receiving, sending, frames, use_recvmmsg):
+    receiver = BatchReceiver(receiving, use_recvmmsg=use_recvmmsg)
+    fill(sending, frames)
+    start = time.perf_counter()
+    received = 0
+    while received < frames:
+        received += len(receiver.receive(wait=False))
+    elapsed = time.perf_counter() - start
+    receiver.close()
+    return receiver.syscalls, elapsed
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    receiving, sending = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    # enough buffer to queue every frame up front.
+    for sock in (receiving, sending):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024 * 1024)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024 * 1024)
+
+    results = [("recv", bench_recv(receiving, sending, frames))]
+    results.append(
+        ("batch (recv fallback)", bench_batch(receiving, sending, frames, False))
+    )
+    if RECVMMSG:
+        results.append(
+            ("batch (recvmmsg)", bench_batch(receiving, sending, frames, True))
+        )
+
+    print("%d frames" % frames)
+    for name, (syscalls, elapsed) in results:
+        print(
+            "%-24s %8.3f syscalls/frame %8.2f us/frame"
+            % (name, syscalls / frames, elapsed * 1e6 / frames)
+        )
+
+
+if __name__ == "__main__":
+    main()
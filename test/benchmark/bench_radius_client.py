@@ -0,0 +1,118 @@
+"""RADIUS requests per second through RadiusClient, against a local stand-in server.
+
+    python3 test/benchmark/bench_radius_client.py [requests] [concurrency] [sockets]
+
+Sends MAB Access-Requests over real UDP RadiusSockets to a green thread that answers
+each with an Access-Reject (lost datagrams are retransmitted), keeping concurrency
+requests waiting at once (at most 256 per socket). Defaults to 20000 requests, 1000
+at once, over 8 sockets.
+"""
+
+import hashlib
+import logging
+import struct
+import sys
+import time
+
+import eventlet
+from eventlet.green import socket
+
+from chewie.mac_address import MacAddress
+from chewie.radius import Radius
+from chewie.radius_client import RadiusClient
+from chewie.radius_lifecycle import RadiusLifecycle, RadiusRequestTimeout
+from chewie.radius_servers import RadiusServer, RadiusServerPool
+from chewie.radius_socket import RadiusSocket
+from chewie.timer_scheduler import TimerScheduler
+from chewie.utils import RadiusQueueMessage
+
+SECRET = "SECRET"
+PORT_ID = MacAddress.from_string("00:00:00:00:00:01")
+
+
+def serve(server_socket):
+    """Answer every request with an Access-Reject"""
+    secret = SECRET.encode()
+    while True:
+        request, address = server_socket.recvfrom(4096)
+        header = struct.pack("!BBH", Radius.ACCESS_REJECT, request[1], 20)
+        authenticator = hashlib.md5(header + request[4:20] + secret).digest()
+        server_socket.sendto(header + authenticator, address)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    sockets = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.WARNING)
+
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024 * 1024)
+    server_socket.bind(("127.0.0.1", 0))
+    server = RadiusServer(*server_socket.getsockname(), SECRET)
+    lifecycle = RadiusLifecycle(
+        SECRET,
+        "44-44-44-44-44-44:",
+        logger,
+        sockets=sockets,
+        servers=RadiusServerPool([server]),
+    )
+    radius_sockets = []
+    for _ in range(sockets):
+        radius_socket = RadiusSocket("127.0.0.1", 0, None, None, "bench")
+        radius_socket.setup()
+        radius_sockets.append(radius_socket)
+
+    def send_datagram(socket_index, packed_message, radius_server):
+        radius_sockets[socket_index].send(packed_message, radius_server.address)
+
+    timer_scheduler = TimerScheduler(logger)
+    client = RadiusClient(lifecycle, send_datagram, timer_scheduler, logger)
+    threads = [
+        eventlet.spawn(serve, server_socket),
+        eventlet.spawn(timer_scheduler.run),
+    ]
+    threads.extend(
+        eventlet.spawn(client.receive_from, radius_socket, socket_index)
+        for socket_index, radius_socket in enumerate(radius_sockets)
+    )
+
+    latencies = []
+    timeouts = []
+
+    def one_request(i):
+        src_mac = MacAddress(i.to_bytes(6, "big"))
+        started = time.perf_counter()
+        try:
+            client.request(
+                RadiusQueueMessage(src_mac, src_mac, src_mac, None, PORT_ID)
+            ).wait()
+            latencies.append(time.perf_counter() - started)
+        except RadiusRequestTimeout:
+            timeouts.append(i)
+
+    pool = eventlet.GreenPool(concurrency)
+    start = time.perf_counter()
+    for i in range(requests):
+        pool.spawn_n(one_request, i)
+    pool.waitall()
+    elapsed = time.perf_counter() - start
+
+    for thread in threads:
+        thread.kill()
+    latencies.sort()
+    print("%d requests, %d at once over %d sockets" % (requests, concurrency, sockets))
+    print("%d timed out" % len(timeouts))
+    print(
+        "%10.0f requests/s %8.2f ms median %8.2f ms 99th percentile"
+        % (
+            len(latencies) / elapsed,
+            latencies[len(latencies) // 2] * 1e3,
+            latencies[len(latencies) * 99 // 100] * 1e3,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
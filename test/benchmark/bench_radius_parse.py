@@ -0,0 +1,85 @@
+"""Time to parse and validate a received RADIUS reply.
+
+    python3 test/benchmark/bench_radius_parse.py [iterations]
+
+Parses an Access-Challenge carrying a 1000 byte EAP-TTLS fragment (split over four
+EAP-Message attributes), a State and a Message-Authenticator, the reply a supplicant
+in the middle of a TLS handshake causes, and a small Access-Accept. Each parse also
+reads the attributes the state machines use.
+"""
+
+import hashlib
+import hmac
+import struct
+import sys
+import time
+
+from chewie.radius import Radius
+from chewie.radius_lifecycle import RadiusLifecycle
+
+SECRET = "SECRET"
+REQUEST_AUTHENTICATOR = bytes(range(16))
+
+
+class FakeRadiusLifecycle:  # pylint: disable=too-few-public-methods
+    request_id = RadiusLifecycle.request_id
+
+    def request_authenticator(self, request_id):  # pylint: disable=unused-argument
+        return REQUEST_AUTHENTICATOR
+
+
+def attribute(type_, value):
+    return struct.pack("!BB", type_, len(value) + 2) + value
+
+
+def reply(code, eap_message, state=None):
+    """A signed reply (Response Authenticator and Message-Authenticator)"""
+    attributes = b""
+    for i in range(0, len(eap_message), 253):
+        attributes += attribute(79, eap_message[i : i + 253])
+    if state:
+        attributes += attribute(24, state)
+    position = len(attributes) + 2
+    attributes += attribute(80, bytes(16))
+    header = struct.pack("!BBH", code, 1, 20 + len(attributes))
+    unsigned = bytearray(header + REQUEST_AUTHENTICATOR + attributes)
+    unsigned[20 + position : 20 + position + 16] = hmac.new(
+        SECRET.encode(), unsigned, "md5"
+    ).digest()
+    response_authenticator = hashlib.md5(bytes(unsigned) + SECRET.encode()).digest()
+    return header + response_authenticator + bytes(unsigned[20:])
+
+
+def read_attributes(radius):
+    """What FullEAPStateMachine reads from a reply"""
+    radius.attributes.find("EAP-Message").data()
+    radius.attributes.find("State")
+    attributes = radius.attributes.to_dict()
+    for description in ("Session-Timeout", "Tunnel-Private-Group-ID", "Filter-Id"):
+        attributes.get(description)
+
+
+def bench(packed, iterations):
+    lifecycle = FakeRadiusLifecycle()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        read_attributes(Radius.parse(packed, SECRET, lifecycle))
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ttls = struct.pack("!BBHBB", 1, 6, 1006, 21, 0) + bytes(1000)
+    packets = [
+        ("Access-Challenge (TTLS)", reply(Radius.ACCESS_CHALLENGE, ttls, b"S" * 18)),
+        ("Access-Accept", reply(Radius.ACCESS_ACCEPT, bytes.fromhex("03020004"))),
+    ]
+    for name, packed in packets:
+        print(
+            "%-24s %5d bytes %8.1f us/parse"
+            % (name, len(packed), bench(packed, iterations) * 1e6)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Memory held per FullEAPStateMachine session.
+
+    python3 test/benchmark/bench_sessions.py [sessions ...]
+
+Each session gets an EAPOL-Start, so it holds a live set of RFC 4137 variables.
+'standalone' sessions are built with their own queues, scheduler, handlers and logger
+(named per client, as Chewie used to), 'shared context' sessions the way Chewie
+builds them now. Defaults to 10k, 100k and 1M sessions.
+"""
+
+import logging
+import sys
+import time
+import tracemalloc
+
+from chewie.event import EventMessageReceived
+from chewie.mac_address import MacAddress
+from chewie.message_parser import EapolStartMessage
+from chewie.state_machines.eap_state_machine import FullEAPStateMachine
+
+try:
+    from chewie.state_machines.eap_state_machine import SessionContext
+except ImportError:  # older trees, to compare against
+    SessionContext = None
+
+PORT_ID = MacAddress.from_string("00:00:00:00:00:01")
+
+
+class NullQueue:  # pylint: disable=too-few-public-methods
+    def put_nowait(self, item):
+        pass
+
+
+class NullScheduler:  # pylint: disable=too-few-public-methods
+    def call_later(self, timeout, func, *args):
+        pass
+
+
+def handler(*args, **kwargs):
+    pass
+
+
+def standalone(src_mac):
+    return FullEAPStateMachine(
+        NullQueue(),
+        NullQueue(),
+        src_mac,
+        NullScheduler(),
+        handler,
+        handler,
+        handler,
+        "bench.SM - port: %s, client: %s" % (PORT_ID, src_mac),
+    )
+
+
+def shared_context():
+    context = SessionContext(
+        NullQueue(),
+        NullQueue(),
+        NullScheduler(),
+        handler,
+        handler,
+        handler,
+        logger=logging.getLogger("bench.SM"),
+    )
+
+    def build(src_mac):
+        return FullEAPStateMachine.from_context(
+            context, src_mac, "port: %s, client: %s" % (PORT_ID, src_mac)
+        )
+
+    return build
+
+
+def bench(build, sessions):
+    src_macs = [MacAddress(i.to_bytes(6, "big")) for i in range(sessions)]
+    messages = [EapolStartMessage(src_mac) for src_mac in src_macs]
+    state_machines = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for src_mac, message in zip(src_macs, messages):
+        state_machine = build(src_mac)
+        state_machine.event(EventMessageReceived(message, PORT_ID))
+        state_machines.append(state_machine)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    modes = [("standalone", lambda: standalone)]
+    if SessionContext is not None:
+        modes.append(("shared context", shared_context))
+
+    for sessions in counts:
+        for mode, builder in modes:
+            elapsed, size = bench(builder(), sessions)
+            print(
+                "%8d sessions %-15s %8.1f us/session %8d bytes/session"
+                % (sessions, mode, elapsed * 1e6 / sessions, size / sessions)
+            )
+
+
+if __name__ == "__main__":
+    main()
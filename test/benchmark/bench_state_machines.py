@@ -0,0 +1,97 @@
+"""Time and memory to create state machines, one per MAC.
+
+    python3 test/benchmark/bench_state_machines.py [macs] [--transitions]
+
+--transitions also attaches a per-instance transitions.Machine to each state machine,
+as every constructor used to, for comparison.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from transitions import Machine
+
+from chewie.mac_address import MacAddress
+from chewie.state_machines.eap_state_machine import FullEAPStateMachine
+from chewie.state_machines.mab_state_machine import MacAuthenticationBypassStateMachine
+
+
+class NullQueue:  # pylint: disable=too-few-public-methods
+    def put_nowait(self, item):
+        pass
+
+
+class NullScheduler:  # pylint: disable=too-few-public-methods
+    def call_later(self, timeout, func, *args):
+        pass
+
+
+def handler(*args, **kwargs):
+    pass
+
+
+def full_eap(src_mac):
+    return FullEAPStateMachine(
+        NullQueue(),
+        NullQueue(),
+        src_mac,
+        NullScheduler(),
+        handler,
+        handler,
+        handler,
+        "bench",
+    )
+
+
+def mab(src_mac):
+    return MacAuthenticationBypassStateMachine(
+        NullQueue(), src_mac, NullScheduler(), handler, handler, "bench"
+    )
+
+
+def per_instance_machine(state_machine):
+    state_machine.machine = Machine(
+        model=state_machine,
+        states=state_machine.STATES,
+        transitions=state_machine.TRANSITIONS,
+        queued=True,
+        initial=state_machine.state,
+    )
+
+
+def bench(build, macs, with_transitions):
+    src_macs = [MacAddress(i.to_bytes(6, "big")) for i in range(macs)]
+    state_machines = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for src_mac in src_macs:
+        state_machine = build(src_mac)
+        if with_transitions:
+            per_instance_machine(state_machine)
+        state_machines.append(state_machine)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    macs = int(args[0]) if args else 100000
+    modes = [("shared table", False)]
+    if "--transitions" in sys.argv:
+        modes.append(("machine per instance", True))
+
+    print("%d MACs" % macs)
+    for name, build in (("FullEAPStateMachine", full_eap), ("MAB", mab)):
+        for mode, with_transitions in modes:
+            elapsed, size = bench(build, macs, with_transitions)
+            print(
+                "%-20s %-21s %8.1f us/sm %8d bytes/sm"
+                % (name, mode, elapsed * 1e6 / macs, size / macs)
+            )
+
+
+if __name__ == "__main__":
+    main()
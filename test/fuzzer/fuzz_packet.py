@@ -2,14 +2,20 @@
 
 """Run AFL repeatedly with externally supplied generated packet from STDIN."""
 
-from collections import namedtuple
-
+import os
 import sys
 import afl  # pylint: disable=import-error
 from chewie.mac_address import MacAddress
 from chewie.message_parser import MessageParser
 from chewie.utils import MessageParseError
 
+# the fakes the unit tests use
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "unit")
+)
+# pylint: disable-next=import-error,wrong-import-position
+from helpers import FakeRadiusLifecycle
+
 ROUNDS = 1
 
 
@@ -59,9 +65,7 @@ def test_radius_parse(data):
         MessageParser.radius_parse(
             data,
             "SECRET",
-            radius_lifecycle=namedtuple(
-                "RadiusLifecycle", "packet_id_to_request_authenticator"
-            )(NoneDict()),
+            radius_lifecycle=FakeRadiusLifecycle(NoneDict()),
         )
     except MessageParseError:
         # Ignore exceptions the parser intentionally throws, and are caught by the caller.
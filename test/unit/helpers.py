@@ -1,5 +1,22 @@
-"""Mock TimerScheduler
-"""
+"""Mock TimerScheduler, RadiusLifecycle and clock, and test MAC addresses"""
+
+from chewie.mac_address import MacAddress
+from chewie.radius_lifecycle import RadiusLifecycle
+
+
+def client_mac(i):
+    """MacAddress numbered i"""
+    return MacAddress(i.to_bytes(6, "big"))
+
+
+class FakeClock:  # pylint: disable=too-few-public-methods
+    """Manually advanced monotonic clock"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
 
 
 class FakeTimerJob:
@@ -62,3 +79,18 @@ class FakeTimerScheduler:
     def run(self):
         """Clones TimerScheduler.run()"""
         pass
+
+
+class FakeRadiusLifecycle:  # pylint: disable=too-few-public-methods
+    """Looks up Request Authenticators like RadiusLifecycle, from a dict"""
+
+    def __init__(self, request_authenticators):
+        self.request_authenticators = request_authenticators
+
+    def request_id(self, socket_index, packet_id):
+        """Clones RadiusLifecycle.request_id()"""
+        return RadiusLifecycle.request_id(socket_index, packet_id)
+
+    def request_authenticator(self, request_id):
+        """Clones RadiusLifecycle.request_authenticator()"""
+        return self.request_authenticators[request_id]
@@ -0,0 +1,97 @@
+"""Unittests for chewie/asyncio_chewie.py"""
+
+# pylint: disable=missing-docstring
+
+import asyncio
+import socket
+import unittest
+from unittest.mock import patch
+
+from chewie.asyncio_chewie import AsyncioChewie, AsyncioEapSocket, AsyncioMabSocket
+from chewie.state_machines.eap_state_machine import FullEAPStateMachine
+
+EAPOL_START = bytes.fromhex("0000000000010242ac17006f888e01010000")
+DHCP_REQUEST = bytes.fromhex(
+    "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010044004300080155"
+)
+
+
+class RecordingProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.received = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.received.put_nowait(data)
+
+
+def fake_raw_socket(socket_class):
+    """The socket class with one end of a socketpair in place of the PF_PACKET socket"""
+    sock = socket_class("lo", "test_asyncio_chewie")
+    sock.socket, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.socket.setblocking(False)
+    peer.settimeout(1)
+    return sock, peer
+
+
+class AsyncioChewieTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        loop = asyncio.get_running_loop()
+        self.radius_transport, self.radius_server = await loop.create_datagram_endpoint(
+            RecordingProtocol, local_addr=("127.0.0.1", 0)
+        )
+        self.eap_socket, self.eap_peer = fake_raw_socket(AsyncioEapSocket)
+        self.mab_socket, self.mab_peer = fake_raw_socket(AsyncioMabSocket)
+
+        self.chewie = AsyncioChewie(
+            "lo",
+            radius_server_ip="127.0.0.1",
+            radius_server_port=self.radius_transport.get_extra_info("sockname")[1],
+            radius_server_secret="SECRET",
+        )
+        with patch.object(
+            AsyncioChewie, "setup_eap_socket", self.install_eap_socket
+        ), patch.object(AsyncioChewie, "setup_mab_socket", self.install_mab_socket):
+            await self.chewie.start()
+
+    def install_eap_socket(self):
+        self.chewie.eap_socket = self.eap_socket
+
+    def install_mab_socket(self):
+        self.chewie.mab_socket = self.mab_socket
+
+    async def asyncTearDown(self):
+        self.chewie.shutdown()
+        self.radius_transport.close()
+        self.eap_peer.close()
+        self.mab_peer.close()
+
+    async def test_timers_use_the_loop(self):
+        self.chewie.port_up("00:00:00:00:00:01")
+        job = self.chewie.port_to_identity_job["00:00:00:00:00:01"]
+        self.assertIsInstance(job, asyncio.TimerHandle)
+        self.chewie.port_down("00:00:00:00:00:01")
+        self.assertTrue(job.cancelled())
+
+    async def test_eapol_start_gets_identity_request(self):
+        self.eap_peer.send(EAPOL_START)
+        reply = await asyncio.get_running_loop().run_in_executor(
+            None, self.eap_peer.recv, 4096
+        )
+        self.assertEqual(reply[0:6], bytes.fromhex("0242ac17006f"))
+        self.assertEqual(reply[12:14], b"\x88\x8e")
+        state_machine = self.chewie.get_state_machine(
+            "02:42:ac:17:00:6f", "00:00:00:00:00:01"
+        )
+        self.assertEqual(state_machine.state, FullEAPStateMachine.IDLE)
+
+    async def test_mab_request_goes_to_radius(self):
+        self.mab_peer.send(b"\x00" * 40)  # not DHCP, skipped
+        self.mab_peer.send(DHCP_REQUEST)
+        request = await asyncio.wait_for(self.radius_server.received.get(), 1)
+        self.assertEqual(request[0], 1)  # Access-Request
+        self.assertEqual(self.mab_socket.dhcp_requests, 1)
+        self.assertEqual(self.mab_socket.python_dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
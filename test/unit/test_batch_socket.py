@@ -0,0 +1,75 @@
+"""Unittests for chewie/batch_socket.py"""
+
+# pylint: disable=missing-docstring
+
+import socket
+import unittest
+
+import eventlet
+
+from chewie.batch_socket import BatchReceiver, RECVMMSG
+from chewie.nfv_sockets import MabSocket
+
+DHCP_REQUEST = bytes.fromhex(
+    "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010044004300080155"
+)
+
+
+class BatchReceiverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.receiving, self.sending = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_DGRAM
+        )
+
+    def tearDown(self):
+        self.receiving.close()
+        self.sending.close()
+
+    def send(self, count):
+        for i in range(count):
+            self.sending.send(b"datagram %d" % i)
+
+    def check_batches(self, receiver):
+        self.send(40)
+        first = receiver.receive()
+        second = receiver.receive()
+        self.assertEqual(len(first), 32)
+        self.assertEqual(first[0], b"datagram 0")
+        self.assertEqual(second[-1], b"datagram 39")
+        self.assertEqual(len(second), 8)
+        self.assertEqual(receiver.receive(wait=False), [])
+        self.assertEqual(receiver.datagrams, 40)
+
+    @unittest.skipUnless(RECVMMSG, "recvmmsg not available")
+    def test_recvmmsg_one_syscall_per_batch(self):
+        receiver = BatchReceiver(self.receiving)
+        self.check_batches(receiver)
+        self.assertEqual(receiver.syscalls, 3)
+
+    def test_recv_fallback(self):
+        receiver = BatchReceiver(self.receiving, use_recvmmsg=False)
+        self.check_batches(receiver)
+        receiver.close()
+
+    def test_long_datagrams_truncated(self):
+        receiver = BatchReceiver(self.receiving, buffer_size=8)
+        self.sending.send(b"0123456789")
+        self.assertEqual(receiver.receive(), [b"01234567"])
+
+    def test_wait_yields_to_other_greenthreads(self):
+        receiver = BatchReceiver(self.receiving)
+        thread = eventlet.spawn(receiver.receive)
+        eventlet.sleep(0.01)
+        self.send(3)
+        self.assertEqual(len(thread.wait()), 3)
+
+    def test_mab_socket_batch_keeps_only_dhcp(self):
+        mab_socket = MabSocket("lo", "test_batch_socket")
+        mab_socket.socket = self.receiving
+        self.sending.send(b"\x00" * 40)
+        self.sending.send(DHCP_REQUEST)
+        self.assertEqual(mab_socket.receive_batch(), [DHCP_REQUEST])
+
+
+if __name__ == "__main__":
+    unittest.main()
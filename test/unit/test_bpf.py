@@ -0,0 +1,104 @@
+"""Unittests for chewie/bpf.py"""
+
+# pylint: disable=missing-docstring
+
+import socket
+import struct
+import unittest
+
+import eventlet
+
+from chewie.bpf import (
+    JEQ_K,
+    JSET_K,
+    LD_B_ABS,
+    LD_H_ABS,
+    RET_K,
+    assemble,
+    dhcp_request_filter,
+)
+from chewie.nfv_sockets import MabSocket
+
+DHCP_REQUEST = bytes.fromhex(
+    "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010044004300080155"
+)
+DNS = bytes.fromhex(
+    "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010035003500080155"
+)
+TAGGED_DHCP_REQUEST = DHCP_REQUEST[:12] + b"\x81\x00\x00\x05" + DHCP_REQUEST[12:]
+WITH_IP_OPTIONS = DHCP_REQUEST[:14] + b"\x46" + DHCP_REQUEST[15:]
+FRAGMENT = DHCP_REQUEST[:20] + b"\x00\x10" + DHCP_REQUEST[22:]
+
+
+def run_filter(program, frame):
+    """Just enough of a classic BPF interpreter for the dhcp request filter"""
+    index = 0
+    accumulator = 0
+    while True:
+        code, jump_true, jump_false, k = program[index]
+        if code == LD_H_ABS:
+            accumulator = struct.unpack_from(">H", frame, k)[0]
+        elif code == LD_B_ABS:
+            accumulator = frame[k]
+        elif code in (JEQ_K, JSET_K):
+            if code == JEQ_K:
+                taken = accumulator == k
+            else:
+                taken = accumulator & k
+            index += jump_true if taken else jump_false
+        elif code == RET_K:
+            return k
+        index += 1
+
+
+class BpfTestCase(unittest.TestCase):
+    def test_assemble_resolves_labels(self):
+        program = assemble(
+            [
+                (LD_H_ABS, 0, 0, 12),
+                (JEQ_K, "yes", "no", 1),
+                ("label", "yes"),
+                (RET_K, 0, 0, 1),
+                ("label", "no"),
+                (RET_K, 0, 0, 0),
+            ]
+        )
+        self.assertEqual(program[1], (JEQ_K, 0, 1, 1))
+
+    def test_dhcp_filter(self):
+        program = dhcp_request_filter()
+        self.assertTrue(run_filter(program, DHCP_REQUEST))
+        for frame in (DNS, TAGGED_DHCP_REQUEST, WITH_IP_OPTIONS, FRAGMENT):
+            self.assertFalse(run_filter(program, frame))
+
+    def test_python_fallback_counts_drops(self):
+        mab_socket = MabSocket("lo", "test_bpf")
+        self.assertTrue(mab_socket.keep_frame(DHCP_REQUEST))
+        self.assertFalse(mab_socket.keep_frame(DNS))
+        self.assertFalse(mab_socket.keep_frame(b"\x00" * 40))
+        stats = mab_socket.stats()
+        self.assertEqual(stats["dhcp_requests"], 1)
+        self.assertEqual(stats["python_dropped"], 2)
+
+    def test_kernel_filter_on_loopback(self):
+        try:
+            sender = socket.socket(socket.PF_PACKET, socket.SOCK_RAW)
+            sender.bind(("lo", 0))
+        except (PermissionError, OSError) as err:
+            self.skipTest("cannot open packet socket: %s" % err)
+        mab_socket = MabSocket("lo", "test_bpf")
+        mab_socket.setup()
+        self.assertTrue(mab_socket.bpf_attached)
+        for frame in (DNS, WITH_IP_OPTIONS, DHCP_REQUEST):
+            sender.send(frame)
+        self.assertEqual(
+            eventlet.with_timeout(2, mab_socket.receive_batch), [DHCP_REQUEST]
+        )
+        stats = mab_socket.stats()
+        self.assertEqual(stats["python_dropped"], 0)
+        self.assertEqual(stats["kernel_packets"], 1)
+        sender.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
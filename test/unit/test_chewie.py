@@ -115,13 +115,16 @@ RADIUS_REPLY_GENERATOR = None  # radius_replies()
 
 
 class FakeEapSocket:
-    def __init__(self, _interface_name, _log_prefix):
+    def __init__(self, _interface_name, _log_prefix, use_packet_ring=False):
         # TODO inject queues in constructor instead of using globals
         pass
 
     def setup(self):
         pass
 
+    def close(self):
+        pass
+
     def receive(self):  # pylint: disable=unused-argument
         global FROM_SUPPLICANT
 
@@ -129,6 +132,9 @@ class FakeEapSocket:
         got = FROM_SUPPLICANT.get()
         return got
 
+    def receive_batch(self):
+        return [self.receive()]
+
     def send(self, data=None):  # pylint: disable=unused-argument
         global TO_SUPPLICANT
         global FROM_SUPPLICANT
@@ -146,13 +152,16 @@ class FakeEapSocket:
 
 
 class FakeMabSocket:
-    def __init__(self, _interface_name, _log_prefix):
+    def __init__(self, _interface_name, _log_prefix, use_packet_ring=False):
         # TODO inject queues in constructor instead of using globals
         pass
 
     def setup(self):
         pass
 
+    def close(self):
+        pass
+
     def receive(self):  # pylint: disable=unused-argument
         global FROM_SUPPLICANT_ACTIVITY
 
@@ -160,6 +169,9 @@ class FakeMabSocket:
         got = FROM_SUPPLICANT_ACTIVITY.get()
         return got
 
+    def receive_batch(self):
+        return [self.receive()]
+
     def send(self, data=None):  # pylint: disable=unused-argument
         raise NotImplementedError("Attempted to send data on activity watching socket")
 
@@ -180,7 +192,10 @@ class FakeRadiusSocket:
         print("got RADIUS", got)
         return got
 
-    def send(self, data):  # pylint: disable=unused-argument
+    def receive_batch(self):
+        return [self.receive()]
+
+    def send(self, data, address=None):  # pylint: disable=unused-argument
         global TO_RADIUS
         global FROM_RADIUS
         global RADIUS_REPLY_GENERATOR
@@ -259,7 +274,7 @@ class ChewieTestCase(unittest.TestCase):
 
     radius_replies_failure_mab = [
         bytes.fromhex(
-            "030000340b0a0f4ec71ebd0573180eb45161c2b7010e303234326163313730303666"
+            "030000220b0a0f4ec71ebd0573180eb45161c2b7010e303234326163313730303666"
         )
     ]
 
@@ -355,10 +370,9 @@ class ChewieTestCase(unittest.TestCase):
 
     def test_get_state_machine_by_packet_id(self):
         """Tests Chewie.get_state_machine_by_packet_id()"""
-        self.chewie.radius_lifecycle.packet_id_to_mac[56] = {
-            "src_mac": "12:34:56:78:9a:bc",
-            "port_id": "00:00:00:00:00:01",
-        }
+        packet_id, _ = self.chewie.radius_lifecycle.allocate_request_id(
+            "12:34:56:78:9a:bc", "00:00:00:00:00:01"
+        )
         state_machine = self.chewie.get_state_machine(
             "12:34:56:78:9a:bc",
             # pylint: disable=invalid-name
@@ -366,7 +380,8 @@ class ChewieTestCase(unittest.TestCase):
         )
 
         self.assertIs(
-            self.chewie.get_state_machine_from_radius_packet_id(56), state_machine
+            self.chewie.get_state_machine_from_radius_packet_id(packet_id),
+            state_machine,
         )
         with self.assertRaises(KeyError):
             self.chewie.get_state_machine_from_radius_packet_id(20)
@@ -580,6 +595,38 @@ class ChewieTestCase(unittest.TestCase):
             MacAuthenticationBypassStateMachine.AAA_IDLE,
         )
 
+    def test_stats(self):
+        """Test reauthentication scheduling is counted in Chewie's stats"""
+        self.chewie.auth_success(
+            MacAddress.from_string("02:42:ac:17:00:6f"), "00:00:00:00:00:01", 3600
+        )
+        stats = self.chewie.stats()
+        self.assertEqual(stats["reauth"]["queued"], 1)
+        self.assertEqual(stats["reauth"]["over_cap"], 0)
+        self.assertEqual(stats["radius"]["in_flight"], 0)
+        self.assertEqual(stats["mab_rate_limiter"]["allowed"], 0)
+        self.assertNotIn("mab_cache", stats)
+
+    def test_mab_in_flight_frames_dropped(self):
+        """Test DHCP frames are dropped while their MAC's MAB request is in flight"""
+        packed_message = bytes.fromhex(
+            "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010044004300080155"
+        )
+        self.chewie.send_eth_to_state_machine(packed_message)
+        self.assertEqual(
+            self.chewie.get_state_machine(
+                "02:42:ac:17:00:6f", "00:00:00:00:00:01"
+            ).state,
+            MacAuthenticationBypassStateMachine.AAA_IDLE,
+        )
+        self.assertEqual(self.chewie.radius_output_messages.qsize(), 1)
+
+        self.chewie.send_eth_to_state_machine(packed_message)
+        self.assertEqual(self.chewie.radius_output_messages.qsize(), 1)
+        stats = self.chewie.mab_rate_limiter.stats()
+        self.assertEqual(stats["allowed"], 1)
+        self.assertEqual(stats["in_flight_dropped"], 1)
+
     @patch_things
     @setup_generators(None, radius_replies_success_mab)
     def test_mab_success_auth(self):
@@ -25,6 +25,9 @@ FakeLogger = namedtuple("FakeLogger", ("name",))  # pylint: disable=invalid-name
 FakeEapMessage = namedtuple(
     "FakeEapMessage", ("src_mac",)
 )  # pylint: disable=invalid-name
+FakeRadiusOutput = namedtuple(
+    "FakeRadiusOutput", ("src_mac", "port_mac")
+)  # pylint: disable=invalid-name
 
 
 class ChewieWithMocksTestCase(unittest.TestCase):
@@ -51,12 +54,14 @@ class ChewieWithMocksTestCase(unittest.TestCase):
         self, state_machine, ethernet_parse
     ):  # pylint: disable=invalid-name
         """test EAP packet creates a new state machine and is sent on"""
-        self.chewie.eap_socket = Mock(**{"receive.return_value": "message from socket"})
+        self.chewie.eap_socket = Mock(
+            **{"receive_batch.return_value": ["message from socket"]}
+        )
         ethernet_parse.side_effect = return_if(
             ("message from socket",), (FakeEapMessage("fake src mac"), "fake dst mac")
         )
         self.chewie.receive_eap_messages()
-        state_machine().event.assert_called_with(
+        state_machine.from_context().event.assert_called_with(
             EventMessageReceived(FakeEapMessage("fake src mac"), "fake dst mac")
         )
 
@@ -85,18 +90,21 @@ class ChewieWithMocksTestCase(unittest.TestCase):
         """test radius packet goes to a state machine"""
         # note that the state machine has to exist already - if not then we blow up
         fake_radius = namedtuple("Radius", ("packet_id",))("fake packet id")
-        self.chewie.radius_socket = Mock(
-            **{"receive.return_value": "message from socket"}
-        )
+        self.chewie.radius_sockets = [
+            Mock(**{"receive_batch.return_value": ["message from socket"]})
+        ]
         self.chewie.radius_lifecycle = Mock(
             **{
                 "build_event_radius_message_received.side_effect": return_if(
                     (fake_radius,), "fake event"
-                )
+                ),
+                "reply_secret.return_value": "SECRET",
+                "in_flight.get.return_value": None,
             }
         )
         radius_parse.side_effect = return_if(
-            ("message from socket", "SECRET", self.chewie.radius_lifecycle), fake_radius
+            ("message from socket", "SECRET", self.chewie.radius_lifecycle, 0),
+            fake_radius,
         )
         # not checking args as we can't mock the callback
         self.chewie.receive_radius_messages()
@@ -104,19 +112,24 @@ class ChewieWithMocksTestCase(unittest.TestCase):
 
     @patch("chewie.chewie.Chewie.running", Mock(side_effect=[True, False]))
     @patch("chewie.chewie.sleep", Mock())
+    @patch("chewie.radius_client.RadiusClient.schedule_retransmit", Mock())
     def test_radius_output_packet_gets_packed_and_sent(
         self,
     ):  # pylint: disable=invalid-name
         """test EAP packet creates a new state machine and is sent on"""
-        self.chewie.radius_socket = Mock()
+        self.chewie.radius_sockets = [Mock()]
 
-        self.chewie.radius_output_messages.put_nowait("fake radius output bits")
+        radius_output_bits = FakeRadiusOutput("fake src mac", "fake port mac")
+        self.chewie.radius_output_messages.put_nowait(radius_output_bits)
         self.chewie.radius_lifecycle = Mock(
             **{
                 "process_outbound.side_effect": return_if(
-                    ("fake radius output bits",), "packed radius"
-                )
+                    (radius_output_bits, None), (0, "packed radius")
+                ),
+                "in_flight_request.return_value.server.address": "server address",
             }
         )
         self.chewie.send_radius_messages()
-        self.chewie.radius_socket.send.assert_called_with("packed radius")
+        self.chewie.radius_sockets[0].send.assert_called_with(
+            "packed radius", "server address"
+        )
@@ -11,6 +11,7 @@ from chewie.event import (
     EventMessageReceived,
     EventRadiusMessageReceived,
     EventPortStatusChange,
+    EventRadiusTimeout,
 )
 from chewie.mac_address import MacAddress
 from chewie.message_parser import (
@@ -24,7 +25,7 @@ from chewie.message_parser import (
     EapolLogoffMessage,
 )
 from chewie.radius_attributes import State
-from chewie.state_machines.eap_state_machine import FullEAPStateMachine
+from chewie.state_machines.eap_state_machine import FullEAPStateMachine, SessionContext
 
 from helpers import FakeTimerScheduler
 
@@ -292,6 +293,18 @@ class FullStateMachineStartTestCase(unittest.TestCase):
         self.assertEqual(self.radius_output_queue.qsize(), 1)
         self.assertIsInstance(self.radius_output_queue.get_nowait()[0], IdentityMessage)
 
+    @check_counters
+    def test_superseded_retransmit_timer_cancelled(self):
+        self.test_eap_start()
+        eap_timer = self.sm.retransmit_timer_job
+        self.assertFalse(eap_timer.cancelled())
+
+        self.test_identity_response()
+        self.assertTrue(eap_timer.cancelled())
+        self.assertFalse(self.sm.retransmit_timer_job.cancelled())
+        live_jobs = [job for job in self.timer_scheduler.jobs if not job.cancelled()]
+        self.assertEqual(live_jobs, [self.sm.retransmit_timer_job])
+
     @check_counters
     def test_md5_challenge_request(self):
         self.test_identity_response()
@@ -509,3 +522,57 @@ class FullStateMachineStartTestCase(unittest.TestCase):
         self.assertEqual(self.radius_output_queue.qsize(), 0)
 
         self.test_success2()
+
+
+class SharedContextStateMachineTestCase(FullStateMachineStartTestCase):
+    """The same tests, with the state machine built the way Chewie does"""
+
+    def setUp(self):
+        super().setUp()
+        self.context = SessionContext(
+            self.eap_output_queue,
+            self.radius_output_queue,
+            self.timer_scheduler,
+            self.auth_handler,
+            self.failure_handler,
+            self.logoff_handler,
+            logger=logging.getLogger("chewie.SM"),
+        )
+        self.sm = FullEAPStateMachine.from_context(
+            self.context, self.src_mac, "port: %s" % self.PORT_ID_MAC
+        )
+        self.sm.MAX_RETRANS = self.MAX_RETRANSMITS
+        self.sm.DEFAULT_TIMEOUT = 0.1
+
+    @check_counters(expected_auth_counter=1)
+    def test_session_has_no_instance_dict(self):
+        self.sm = FullEAPStateMachine.from_context(
+            self.context, self.src_mac, "port: %s" % self.PORT_ID_MAC
+        )
+        self.test_success2()
+        self.assertEqual(vars(self.sm), {})
+        self.assertIs(self.sm.eap_output_messages, self.eap_output_queue)
+
+    def test_messages_are_prefixed(self):
+        self.test_eap_start()
+        with open(self.log_file.name) as log:
+            self.assertIn("port: 00:00:00:00:00:01 Entering idle_state", log.read())
+
+    @check_counters
+    def test_radius_timeout_event(self):
+        """With RADIUS retransmitted by Chewie, the session waits for EventRadiusTimeout"""
+        self.context.radius_retransmits = True
+        self.test_md5_challenge_response()
+        self.assertEqual(self.sm.state, self.sm.AAA_IDLE)
+        self.timer_scheduler.run_jobs()
+        self.assertEqual(self.sm.state, self.sm.AAA_IDLE)
+
+        self.sm.event(EventRadiusTimeout())
+        self.assertEqual(self.sm.state, self.sm.TIMEOUT_FAILURE2)
+
+    def test_radius_timeout_event_when_not_waiting(self):
+        self.context.radius_retransmits = True
+        self.test_md5_challenge_request()
+        state = self.sm.state
+        self.sm.event(EventRadiusTimeout())
+        self.assertEqual(self.sm.state, state)
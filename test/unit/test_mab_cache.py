@@ -0,0 +1,110 @@
+"""Unittests for chewie/mab_cache.py"""
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from chewie.mab_cache import MabRejectCache, MabResultCache
+from chewie.mac_address import MacAddress
+
+from helpers import FakeClock, client_mac
+
+PORT_ID = MacAddress.from_string("00:00:00:00:00:01")
+
+
+class MabResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = MabResultCache(ttl=60, max_entries=3, clock=self.clock)
+
+    def test_hit_until_ttl(self):
+        self.cache.add(client_mac(1), PORT_ID, "accept", {"Filter-Id": "x"})
+        entry = self.cache.get(client_mac(1), PORT_ID)
+        self.assertEqual(entry.reply, "accept")
+        self.assertEqual(entry.attributes, {"Filter-Id": "x"})
+        self.assertIsNone(self.cache.get(client_mac(1), client_mac(2)))
+
+        self.clock.now = 60
+        self.assertIsNone(self.cache.get(client_mac(1), PORT_ID))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(
+            self.cache.stats(),
+            {
+                "entries": 0,
+                "max_entries": 3,
+                "hits": 1,
+                "misses": 2,
+                "expired": 1,
+                "evicted": 0,
+            },
+        )
+
+    def test_session_timeout_bounds_ttl(self):
+        self.cache.add(client_mac(1), PORT_ID, "accept", {}, session_timeout=10)
+        self.cache.add(client_mac(2), PORT_ID, "accept", {}, session_timeout=600)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get(client_mac(1), PORT_ID))
+        self.assertIsNotNone(self.cache.get(client_mac(2), PORT_ID))
+
+    def test_least_recently_used_is_evicted(self):
+        for i in range(3):
+            self.cache.add(client_mac(i), PORT_ID, "accept", {})
+        self.cache.get(client_mac(0), PORT_ID)
+        self.cache.add(client_mac(3), PORT_ID, "accept", {})
+        self.assertIsNone(self.cache.get(client_mac(1), PORT_ID))
+        for i in (0, 2, 3):
+            self.assertIsNotNone(self.cache.get(client_mac(i), PORT_ID))
+        self.assertEqual(self.cache.evicted, 1)
+
+    def test_remove(self):
+        self.cache.add(client_mac(1), PORT_ID, "accept", {})
+        self.cache.remove(client_mac(1), PORT_ID)
+        self.cache.remove(client_mac(1), PORT_ID)
+        self.assertIsNone(self.cache.get(client_mac(1), PORT_ID))
+
+
+class MabRejectCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = MabRejectCache(
+            backoff=5, max_backoff=30, max_entries=2, clock=self.clock
+        )
+
+    def test_backoff_doubles_up_to_max(self):
+        hold_downs = []
+        for _ in range(5):
+            hold_downs.append(self.cache.add(client_mac(1), "reject"))
+            self.clock.now += hold_downs[-1]
+        self.assertEqual(hold_downs, [5, 10, 20, 30, 30])
+
+        # quiet for max_backoff after the hold down, so it starts over
+        self.clock.now += 30
+        self.assertEqual(self.cache.add(client_mac(1), "reject"), 5)
+
+    def test_requests_suppressed_while_held_down(self):
+        self.cache.add(client_mac(1), "reject")
+        self.assertEqual(self.cache.get(client_mac(1)).reply, "reject")
+        self.assertEqual(self.cache.get(client_mac(1)).rejects, 1)
+        self.assertIsNone(self.cache.get(client_mac(2)))
+        self.clock.now = 5
+        self.assertIsNone(self.cache.get(client_mac(1)))
+        stats = self.cache.stats()
+        self.assertEqual(stats["suppressed"], 2)
+        self.assertEqual(stats["held_down"], 0)
+        self.assertEqual(stats["rejects"], 1)
+
+    def test_global_cap(self):
+        for i in range(3):
+            self.cache.add(client_mac(i), "reject")
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(client_mac(0)))
+        self.assertEqual(self.cache.evicted, 1)
+
+    def test_remove(self):
+        self.cache.add(client_mac(1), "reject")
+        self.cache.remove(client_mac(1))
+        self.assertIsNone(self.cache.get(client_mac(1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Unittests for chewie/mab_rate_limiter.py"""
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from chewie.mab_rate_limiter import MabRateLimiter
+
+from helpers import FakeClock, client_mac
+
+PORT_1 = bytes.fromhex("000000000001")
+PORT_2 = bytes.fromhex("000000000002")
+
+
+class MabRateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_no_limit(self):
+        limiter = MabRateLimiter(clock=self.clock)
+        for _ in range(100):
+            self.assertTrue(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertEqual(limiter.stats()["allowed"], 100)
+        self.assertEqual(limiter.stats()["mac_buckets"], 0)
+
+    def test_in_flight_dropped(self):
+        limiter = MabRateLimiter(clock=self.clock)
+        in_flight = {(client_mac(1).address, PORT_1)}
+
+        def request_in_flight(src_mac, port_id):
+            return (src_mac, port_id) in in_flight
+
+        self.assertFalse(
+            limiter.allow(client_mac(1).address, PORT_1, request_in_flight)
+        )
+        self.assertTrue(limiter.allow(client_mac(2).address, PORT_1, request_in_flight))
+        self.assertEqual(limiter.stats()["in_flight_dropped"], 1)
+
+    def test_mac_bucket_refills(self):
+        limiter = MabRateLimiter(mac_rate=1, mac_burst=2, clock=self.clock)
+        self.assertTrue(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertTrue(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertFalse(limiter.allow(client_mac(1).address, PORT_1))
+        # another MAC has its own bucket
+        self.assertTrue(limiter.allow(client_mac(2).address, PORT_1))
+
+        self.clock.now = 0.5
+        self.assertFalse(limiter.allow(client_mac(1).address, PORT_1))
+        self.clock.now = 1
+        self.assertTrue(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertFalse(limiter.allow(client_mac(1).address, PORT_1))
+
+        # never refills past the burst
+        self.clock.now = 100
+        for _ in range(2):
+            self.assertTrue(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertFalse(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertEqual(limiter.stats()["mac_dropped"], 4)
+
+    def test_port_bucket(self):
+        limiter = MabRateLimiter(port_rate=3, clock=self.clock)
+        for i in range(3):
+            self.assertTrue(limiter.allow(client_mac(i).address, PORT_1))
+        self.assertFalse(limiter.allow(client_mac(3).address, PORT_1))
+        self.assertTrue(limiter.allow(client_mac(3).address, PORT_2))
+        self.assertEqual(
+            limiter.stats(),
+            {
+                "allowed": 4,
+                "in_flight_dropped": 0,
+                "mac_dropped": 0,
+                "port_dropped": 1,
+                "mac_buckets": 0,
+                "port_buckets": 2,
+            },
+        )
+
+    def test_mac_dropped_does_not_take_from_port(self):
+        limiter = MabRateLimiter(mac_rate=1, port_rate=2, clock=self.clock)
+        for _ in range(5):
+            limiter.allow(client_mac(1).address, PORT_1)
+        self.assertTrue(limiter.allow(client_mac(2).address, PORT_1))
+        self.assertEqual(limiter.stats()["mac_dropped"], 4)
+
+    def test_least_recently_used_bucket_is_forgotten(self):
+        limiter = MabRateLimiter(mac_rate=1, max_buckets=2, clock=self.clock)
+        limiter.allow(client_mac(1).address, PORT_1)
+        limiter.allow(client_mac(2).address, PORT_1)
+        limiter.allow(client_mac(1).address, PORT_1)
+        limiter.allow(client_mac(3).address, PORT_1)
+        self.assertEqual(
+            list(limiter.mac_buckets), [client_mac(1).address, client_mac(3).address]
+        )
+        # client 1 is still limited, its bucket was kept
+        self.assertFalse(limiter.allow(client_mac(1).address, PORT_1))
+        self.assertTrue(limiter.allow(client_mac(2).address, PORT_1))
+        self.assertEqual(limiter.stats()["mac_buckets"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,16 @@
 import logging
 import tempfile
+import time
 import unittest
 from queue import Queue
 
 from chewie.ethernet_packet import EthernetPacket
-from chewie.event import EventMessageReceived, EventRadiusMessageReceived
+from chewie.mab_cache import MabRejectCache, MabResultCache
+from chewie.event import (
+    EventMessageReceived,
+    EventRadiusMessageReceived,
+    EventRadiusTimeout,
+)
 from chewie.mac_address import MacAddress
 from chewie.radius import RadiusAccessReject, RadiusAccessAccept
 from chewie.state_machines.mab_state_machine import MacAuthenticationBypassStateMachine
@@ -139,3 +145,83 @@ class MABStateMachineTest(unittest.TestCase):
         self.sm.port_enabled = True
         self.test_smoke_test_fail_radius()
         self.test_smoke_test_success_radius()
+
+    @check_counters(expected_auth_counter=1)
+    def test_radius_timeout_then_success(self):
+        """Unanswered RADIUS Request lets the next DHCP Activity start again"""
+        self.sm.port_enabled = True
+        self.receive_eth_packet()
+        self.radius_output_queue.get_nowait()
+
+        self.sm.event(EventRadiusTimeout())
+        self.assertEqual(self.sm.DISABLED, self.sm.state)
+
+        self.test_smoke_test_success_radius()
+
+
+class MABStateMachineCacheTest(MABStateMachineTest):
+    """MAB with Access-Accepts cached across state machines"""
+
+    def setUp(self):
+        super().setUp()
+        self.mab_cache = MabResultCache(ttl=60)
+        self.sm.mab_cache = self.mab_cache
+
+    def new_state_machine(self):
+        """The port flapped, so its state machines were deleted"""
+        self.sm = MacAuthenticationBypassStateMachine(
+            self.radius_output_queue,
+            self.src_mac,
+            self.timer_scheduler,
+            self.auth_handler,
+            self.failure_handler,
+            "chewie.SM",
+            mab_cache=self.mab_cache,
+        )
+
+    @check_counters(expected_auth_counter=2)
+    def test_accept_is_reused_after_flap(self):
+        self.test_smoke_test_success_radius()
+        self.new_state_machine()
+        message = EthernetPacket(self.PORT_ID_MAC, str(self.src_mac), 0x888E, "")
+        self.sm.event(EventMessageReceived(message, self.PORT_ID_MAC))
+        self.assertEqual(self.sm.AAA_SUCCESS, self.sm.state)
+        self.assertTrue(self.radius_output_queue.empty())
+        self.assertEqual(self.mab_cache.hits, 1)
+
+    @check_counters(expected_auth_counter=1, expected_failure_counter=1)
+    def test_reject_is_not_cached(self):
+        self.test_smoke_test_fail_radius()
+        self.assertEqual(len(self.mab_cache), 0)
+        self.test_smoke_test_success_radius()
+        self.assertEqual(len(self.mab_cache), 1)
+
+
+class MABStateMachineRejectCacheTest(MABStateMachineTest):
+    """MAB with rejected MACs held down"""
+
+    def setUp(self):
+        super().setUp()
+        self.mab_reject_cache = MabRejectCache(backoff=60)
+        self.sm.mab_reject_cache = self.mab_reject_cache
+
+
+    @check_counters(expected_failure_counter=2)
+    def test_rejected_mac_is_not_asked_about_again(self):
+        self.test_smoke_test_fail_radius()
+        message = EthernetPacket(self.PORT_ID_MAC, str(self.src_mac), 0x888E, "")
+        self.sm.event(EventMessageReceived(message, self.PORT_ID_MAC))
+        self.assertEqual(self.sm.AAA_FAILURE, self.sm.state)
+        self.assertTrue(self.radius_output_queue.empty())
+        self.assertEqual(self.mab_reject_cache.suppressed, 1)
+        # a local reject does not lengthen the hold down
+        self.assertEqual(self.mab_reject_cache.rejects, 1)
+
+    @check_counters(expected_failure_counter=1, expected_auth_counter=1)
+    def test_fail_first_attempt_then_success(self):
+        """Once its hold down is over the MAC is asked about again, and the accept
+        forgets its rejects"""
+        self.test_smoke_test_fail_radius()
+        self.mab_reject_cache.clock = lambda: time.monotonic() + 60
+        self.test_smoke_test_success_radius()
+        self.assertEqual(len(self.mab_reject_cache), 0)
@@ -0,0 +1,46 @@
+"""Unittests for chewie/__main__.py"""
+
+# pylint: disable=missing-docstring
+
+import argparse
+import unittest
+
+from chewie.__main__ import radius_server
+
+
+class RadiusServerArgumentTestCase(unittest.TestCase):
+    def test_ipv4(self):
+        self.assertEqual(radius_server("10.0.0.1"), {"ip": "10.0.0.1"})
+        self.assertEqual(
+            radius_server("10.0.0.1:1812:SECRET:2"),
+            {"ip": "10.0.0.1", "port": 1812, "secret": "SECRET", "weight": 2},
+        )
+        self.assertEqual(
+            radius_server("10.0.0.1::SECRET"), {"ip": "10.0.0.1", "secret": "SECRET"}
+        )
+
+    def test_ipv6(self):
+        self.assertEqual(radius_server("[2001:db8::1]"), {"ip": "2001:db8::1"})
+        self.assertEqual(
+            radius_server("[2001:db8::1]:1812:SECRET:2"),
+            {"ip": "2001:db8::1", "port": 1812, "secret": "SECRET", "weight": 2},
+        )
+
+    def test_secret_with_colons(self):
+        self.assertEqual(
+            radius_server("10.0.0.1:1812:se:cr:et:3"),
+            {"ip": "10.0.0.1", "port": 1812, "secret": "se:cr:et", "weight": 3},
+        )
+        self.assertEqual(
+            radius_server("[::1]:1812:se:cret:"),
+            {"ip": "::1", "port": 1812, "secret": "se:cret"},
+        )
+
+    def test_invalid(self):
+        for value in ("10.0.0.1:port", "[2001:db8::1", "[::1]1812", "10.0.0.1:1:s:w"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                radius_server(value)
+
+
+if __name__ == "__main__":
+    unittest.main()
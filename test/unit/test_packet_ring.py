@@ -0,0 +1,80 @@
+"""Unittests for chewie/packet_ring.py"""
+
+# pylint: disable=missing-docstring
+
+import socket
+import unittest
+
+import eventlet
+
+from chewie.nfv_sockets import EapSocket, MabSocket
+
+PORT_MAC = bytes.fromhex("000000000001")
+SUPPLICANT_MAC = bytes.fromhex("0242ac17006f")
+DHCP_REQUEST = bytes.fromhex(
+    "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010044004300080155"
+)
+NOT_DHCP = bytes.fromhex(
+    "0000000000010242ac17006f08004500001c0001000040117cce7f0000017f0000010035003500080155"
+)
+
+
+def eapol_frame(payload):
+    return PORT_MAC + SUPPLICANT_MAC + b"\x88\x8e" + payload
+
+
+class PacketRingTestCase(unittest.TestCase):
+    """Needs CAP_NET_RAW, sends and receives frames on the loopback interface"""
+
+    def setUp(self):
+        try:
+            self.sender = socket.socket(socket.PF_PACKET, socket.SOCK_RAW)
+            self.sender.bind(("lo", 0))
+        except (PermissionError, OSError) as err:
+            self.skipTest("cannot open packet socket: %s" % err)
+
+    def tearDown(self):
+        self.sender.close()
+
+    def test_eap_socket_reads_ring(self):
+        eap_socket = EapSocket("lo", "test_packet_ring", use_packet_ring=True)
+        eap_socket.setup()
+        self.assertIsNotNone(eap_socket.packet_ring)
+
+        payloads = [b"\x01\x01\x00\x00" + bytes([i]) * 10 for i in range(5)]
+        for payload in payloads:
+            self.sender.send(eapol_frame(payload))
+        frames = eventlet.with_timeout(2, eap_socket.receive_frames)
+        self.assertIsInstance(frames[0], memoryview)
+        self.assertEqual([bytes(frame[14:28]) for frame in frames][:5], payloads)
+        self.assertEqual(eap_socket.packet_ring.frames, len(frames))
+
+        self.sender.send(eapol_frame(b"\x01\x02\x00\x00"))
+        self.assertEqual(
+            eventlet.with_timeout(2, eap_socket.receive)[14:18], b"\x01\x02\x00\x00"
+        )
+
+    def test_close_unmaps_ring(self):
+        eap_socket = EapSocket("lo", "test_packet_ring", use_packet_ring=True)
+        eap_socket.setup()
+        packet_ring = eap_socket.packet_ring
+        # setting up again replaces the ring
+        eap_socket.setup()
+        self.assertTrue(packet_ring.ring.closed)
+        packet_ring = eap_socket.packet_ring
+        eap_socket.close()
+        self.assertTrue(packet_ring.ring.closed)
+        self.assertIsNone(eap_socket.packet_ring)
+        self.assertIsNone(eap_socket.socket)
+
+    def test_mab_socket_copies_only_dhcp(self):
+        mab_socket = MabSocket("lo", "test_packet_ring", use_packet_ring=True)
+        mab_socket.setup()
+        self.sender.send(NOT_DHCP)
+        self.sender.send(DHCP_REQUEST)
+        frames = eventlet.with_timeout(2, mab_socket.receive_batch)
+        self.assertEqual(frames, [DHCP_REQUEST])
+
+
+if __name__ == "__main__":
+    unittest.main()
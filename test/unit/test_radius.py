@@ -2,8 +2,8 @@
 # pylint: disable=missing-docstring
 
 import binascii
+import pickle
 import unittest
-from collections import namedtuple
 
 from chewie.message_parser import SuccessMessage
 from chewie.radius import (
@@ -28,10 +28,14 @@ from chewie.radius_attributes import (
     VendorSpecific,
     CallingStationId,
     UserPassword,
+    ReplyMessage,
+    SessionTimeout,
 )
 from chewie.radius_datatypes import Vsa, String, Enum, Text, Integer, Concat
 from chewie.utils import MessageParseError
 
+from helpers import FakeRadiusLifecycle
+
 
 class RadiusTestCase(unittest.TestCase):
     def test_radius_access_request_parses(self):
@@ -42,9 +46,7 @@ class RadiusTestCase(unittest.TestCase):
         message = Radius.parse(
             packed_message,
             secret="SECRET",
-            radius_lifecycle=namedtuple(
-                "RadiusLifecycle", "packet_id_to_request_authenticator"
-            )({0: None}),
+            radius_lifecycle=FakeRadiusLifecycle({0: None}),
         )
         self.assertEqual(message.packet_id, 0)
         self.assertEqual(
@@ -82,9 +84,9 @@ class RadiusTestCase(unittest.TestCase):
         message = Radius.parse(
             packed_message,
             secret="SECRET",
-            radius_lifecycle=namedtuple(
-                "RadiusLifecycle", "packet_id_to_request_authenticator"
-            )({1: bytes.fromhex("a0b4ace0b367114b1a16d76e2bfed5d8")}),
+            radius_lifecycle=FakeRadiusLifecycle(
+                {1: bytes.fromhex("a0b4ace0b367114b1a16d76e2bfed5d8")}
+            ),
         )
         self.assertEqual(message.packet_id, 1)
         self.assertEqual(
@@ -140,9 +142,9 @@ class RadiusTestCase(unittest.TestCase):
             Radius.parse(
                 packed_message,
                 secret="SECRET",
-                radius_lifecycle=namedtuple(
-                    "RadiusLifecycle", "packet_id_to_request_authenticator"
-                )({0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}),
+                radius_lifecycle=FakeRadiusLifecycle(
+                    {0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}
+                ),
             )
             self.fail()
         except MessageParseError as exception:
@@ -160,9 +162,9 @@ class RadiusTestCase(unittest.TestCase):
             Radius.parse(
                 packed_message,
                 secret="SECRET",
-                radius_lifecycle=namedtuple(
-                    "RadiusLifecycle", "packet_id_to_request_authenticator"
-                )({0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}),
+                radius_lifecycle=FakeRadiusLifecycle(
+                    {0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}
+                ),
             )
             self.fail()
         except MessageParseError as exception:
@@ -185,10 +187,45 @@ class RadiusTestCase(unittest.TestCase):
             Radius.parse,
             packed_message,
             secret="",
-            radius_lifecycle=namedtuple(
-                "RadiusLifecycle", "packet_id_to_request_authenticator"
-            )({0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}),
+            radius_lifecycle=FakeRadiusLifecycle(
+                {0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}
+            ),
+        )
+
+    ACCESS_CHALLENGE = bytes.fromhex(
+        "0b00005056d9280d3e4fed327eb31cf1823f8c244f1801020016041074d3db089b727d9cc5774599e4a32a295012ecc840b316217c851bd6708afb554b24181219ddf6d119dff272fa2fe16c34990c7d"
+    )
+
+    def parse_access_challenge(self, packed_message):
+        return Radius.parse(
+            packed_message,
+            secret="SECRET",
+            radius_lifecycle=FakeRadiusLifecycle(
+                {0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}
+            ),
+        )
+
+    def test_padding_is_ignored(self):
+        message = self.parse_access_challenge(self.ACCESS_CHALLENGE + bytes(8))
+        self.assertEqual(len(message.attributes.attributes), 3)
+
+    def test_shorter_than_length_fails(self):
+        with self.assertRaises(MessageParseError):
+            self.parse_access_challenge(self.ACCESS_CHALLENGE[:-1])
+
+    def test_message_authenticator_mismatch_fails(self):
+        # an Access-Request has no Response Authenticator, only its
+        # Message-Authenticator covers the attributes.
+        packed_message = bytearray.fromhex(
+            "010000a3982a0ba06d3557f0dbc8ba6e823822f1010b686f737431757365721e1434342d34342d34342d34342d34342d34343a3d06000000130606000000021f1330302d30302d30302d31312d31312d30314d17434f4e4e45435420304d627073203830322e3131622c12433634383030344139433930353537390c06000005784f100201000e01686f73743175736572501273f82750f6f261a95a7cc7d318b9f573"
         )
+        packed_message[22] ^= 1
+        with self.assertRaises(MessageParseError):
+            Radius.parse(
+                packed_message,
+                secret="SECRET",
+                radius_lifecycle=FakeRadiusLifecycle({}),
+            )
 
     def test_radius_access_challenge_parses(self):
         packed_message = bytes.fromhex(
@@ -197,9 +234,9 @@ class RadiusTestCase(unittest.TestCase):
         message = Radius.parse(
             packed_message,
             secret="SECRET",
-            radius_lifecycle=namedtuple(
-                "RadiusLifecycle", "packet_id_to_request_authenticator"
-            )({0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}),
+            radius_lifecycle=FakeRadiusLifecycle(
+                {0: bytes.fromhex("982a0ba06d3557f0dbc8ba6e823822f1")}
+            ),
         )
         self.assertEqual(message.packet_id, 0)
         self.assertEqual(
@@ -229,9 +266,9 @@ class RadiusTestCase(unittest.TestCase):
         message = Radius.parse(
             packed_message,
             secret="SECRET",
-            radius_lifecycle=namedtuple(
-                "RadiusLifecycle", "packet_id_to_request_authenticator"
-            )({6: bytes.fromhex("0d64ffb8bc76d457d337e5f5692534aa")}),
+            radius_lifecycle=FakeRadiusLifecycle(
+                {6: bytes.fromhex("0d64ffb8bc76d457d337e5f5692534aa")}
+            ),
         )
         self.assertEqual(message.packet_id, 6)
         self.assertEqual(
@@ -454,34 +491,114 @@ class RadiusTestCase(unittest.TestCase):
         # Cannot test Concat datatype, it does not check length
         # Cannot test VSA datatype, Nothing is using it at the moment.
 
-    def test_radius_extract_attributes(self):
-        # This list of radius AVP, contains multiple VSA attributes.
-        attributes = []
-        attributes_data = bytes.fromhex(
-            "1a3a000001371134904a76cd1ffff59a3e1365e09441c41d83454aedafc1d9099d32ade23714a4d2c0898ff23997c89f59f1149bcb709fb889dc1a3a0000013710349e92efe66d278d977e3fe87faa650b391c43103d3d8e662bb3881807f1b3313ed975d3cfa85d45a6f3b83f6b98364a99135e4f06032a0004501256aef88d10224c30e6b3563acf963758010b686f73743175736572"
-        )
-        attributes_to_concat = {}
-        RadiusAttributesList.extract_attributes(
-            attributes_data, attributes, attributes_to_concat
-        )
-        self.assertEqual(len(attributes), 5)
-        self.assertEqual(len(attributes_to_concat), 1)
-        self.assertEqual(list(attributes_to_concat.values())[0][0][1], 2)
-        # check that the concated EAPMessage is marked position 2
-
-        # This list of radius AVP contains multiple EAPMessages.
-        attributes = []
-        attributes_data = bytes.fromhex(
-            "4fff012802bc158000000a76130101ff040530030101ff30360603551d1f042f302d302ba029a0278625687474703a2f2f7777772e6578616d706c652e6f72672f6578616d706c655f63612e63726c300d06092a864886f70d01010b05000382010100139e9c2b1e9bf30c6567759ffb57af9f031a59b6a8adb1702a55de2e51f2286715ef1399ebdc593d38db3ad4794c3e78037d3de5612cba33cefc5b830c3a2118bfc0572d201c07105b7c0ef5bb64225d959afef6a4527a88d1e5fd552fd16775a5c90802d11ad793da157441f7a181f85a2908ebcb87a86960c6d3ae631019bc73f850bc5be494a97084ccaea1cc13c44a4fdf0ef123c067b688e47a4fff4d223c15fd56798051ff4912c721f15c96061ef683b1ade02b5449b06184f59d4218f2287d35cfa0a3a4f65e40c8750d0c70dc00d65a8981e0a2cf6961b1355c10d399ce583a426e211b0feef37da67a57bbbc81d912d5379668cfdc3666bacf5e9d9c7d160303014d0c0001490300174104b275c284c5c067b9c3104305ba6704b4b0e083f0e285d9b205a8d7307e503907478f314679d084a0f1ccbc3ceaa6b6d56c588654d223fd16514bba463c5f8d7006010100bca760ef9aab5f1cf9239bab7d0bbf585e12f9c6440b9dd36affc87ff8f334b0dbea94686edbcff9143bd40a5136b065d5599742665fa27d5ec5e86898b7c8cc2c375d190646c64fc444df7911f41a12a7219f667527cfc4ba99b684fb763a01f4dc361a891906e3ade0c6e787c096f868726a5aafafb76ce71ce896b50015c9db89e9c3d13c90e90b5d82a1327941404298c1e358cbc7bbbf8e4fe2e1ecafbcbddfbe0b1a7d3f0769306f16f3ed4972b14b8af0f51761053754ec73a1a41b294fe0d00a9281e3d9c0175651d2bbaf28df32a25bfbae85983a3935891f0a955b636b3540cde3aba4ec20d62988a81a608b450e87b3eefcb66f50cf3104a4b367122d16030300040e00000050125f3ac1f2c8e65dab1bf90b9604cd65aa1812cefe6083cad675dd64722c274ec35372"
-        )
-        attributes_to_concat = {}
-        RadiusAttributesList.extract_attributes(
-            attributes_data, attributes, attributes_to_concat
-        )
-        self.assertEqual(len(attributes), 5)
-        self.assertEqual(len(attributes_to_concat), 1)
-        # check that the concated EAPMessage is marked position 0
-        self.assertEqual(list(attributes_to_concat.values())[0][0][1], 0)
+    def test_attributes_list_index(self):
+        attributes = RadiusAttributesList(
+            [
+                UserName.create("host1user"),
+                ReplyMessage.create("first"),
+                State.create(b"state"),
+                ReplyMessage.create("second"),
+            ]
+        )
+        self.assertEqual(len(attributes), 11 + 7 + 7 + 8)
+        self.assertEqual(attributes.find(ReplyMessage.DESCRIPTION).data(), "first")
+        self.assertEqual(
+            [attr.data() for attr in attributes.find_all(ReplyMessage.DESCRIPTION)],
+            ["first", "second"],
+        )
+        self.assertEqual(attributes.indexof(State.DESCRIPTION), 18)
+        self.assertIsNone(attributes.find(MessageAuthenticator.DESCRIPTION))
+        self.assertEqual(attributes.find_all(MessageAuthenticator.DESCRIPTION), [])
+
+        attributes.append(MessageAuthenticator.create(bytes(16)))
+        self.assertEqual(len(attributes), 33 + 18)
+        self.assertEqual(attributes.indexof(MessageAuthenticator.DESCRIPTION), 33)
+
+        attributes.attributes = attributes.attributes[2:]
+        self.assertEqual(len(attributes), 7 + 8 + 18)
+        self.assertEqual(attributes.indexof(State.DESCRIPTION), 0)
+        self.assertEqual(attributes.find(ReplyMessage.DESCRIPTION).data(), "second")
+        self.assertRaises(ValueError, attributes.indexof, UserName.DESCRIPTION)
+
+    def test_attributes_pack_into(self):
+        attr_list = [
+            UserName.create("host1user"),
+            EAPMessage.create(bytes(600).hex()),
+            State.create(b"state"),
+        ]
+        attributes = RadiusAttributesList(attr_list)
+        packed = bytearray(b"\xff" * 3 + bytes(len(attributes)))
+        self.assertEqual(attributes.pack_into(packed, 3), len(packed))
+        self.assertEqual(packed[:3], b"\xff" * 3)
+        self.assertEqual(
+            packed[3:],
+            UserName.create("host1user").pack()
+            + bytes.fromhex("4fff")
+            + bytes(253)
+            + bytes.fromhex("4fff")
+            + bytes(253)
+            + bytes.fromhex("4f60")
+            + bytes(94)
+            + State.create(b"state").pack(),
+        )
+        self.assertEqual(attributes.pack(), bytes(packed[3:]))
+
+    def test_parse_attributes_lazily(self):
+        attributes_data = (
+            UserName.create("host1user").pack()
+            + bytes.fromhex("c8050a0b0c")  # unregistered type 200
+            + bytes.fromhex("4f0403024f040004")  # EAP-Success split over two
+            + ReplyMessage.create("first").pack()
+            + State.create(b"state").pack()
+            + ReplyMessage.create("second").pack()
+            + SessionTimeout.create(3600).pack()
+        )
+        attributes = RadiusAttributesList.parse(memoryview(attributes_data))
+        self.assertEqual(
+            attributes.find(EAPMessage.DESCRIPTION).bytes_data,
+            bytes.fromhex("03020004"),
+        )
+        self.assertEqual(attributes.find(ReplyMessage.DESCRIPTION).data(), "first")
+        self.assertIsNone(attributes.find(MessageAuthenticator.DESCRIPTION))
+        self.assertEqual(len(attributes), len(attributes_data))
+        self.assertEqual(attributes.pack(), attributes_data)
+        self.assertEqual(attributes.indexof(State.DESCRIPTION), 31)
+
+        attributes_dict = attributes.to_dict()
+        self.assertIsInstance(attributes_dict["EAP-Message"], SuccessMessage)
+        expected = {
+            "User-Name": "host1user",
+            "Reply-Message": "second",
+            "State": b"state",
+            "Session-Timeout": 3600,
+        }
+        unpickled = pickle.loads(pickle.dumps(attributes_dict))
+        self.assertIsInstance(unpickled.pop("EAP-Message"), SuccessMessage)
+        self.assertEqual(unpickled, expected)
+        self.assertEqual(attributes_dict.get("Filter-Id", "none"), "none")
+        self.assertNotIn("Filter-Id", attributes_dict)
+
+        self.assertEqual(
+            [attribute.DESCRIPTION for attribute in attributes.attributes],
+            [
+                "User-Name",
+                "EAP-Message",
+                "Reply-Message",
+                "State",
+                "Reply-Message",
+                "Session-Timeout",
+            ],
+        )
+
+    def test_parse_malformed_attributes(self):
+        for attributes_data in (
+            bytes.fromhex("01"),  # truncated header
+            bytes.fromhex("0100"),  # length shorter than the header
+            bytes.fromhex("010561"),  # longer than the packet
+            bytes.fromhex("1b050e1000"),  # 3 byte Session-Timeout
+        ):
+            with self.assertRaises(MessageParseError):
+                RadiusAttributesList.parse(attributes_data)
 
     def test_concat_when_length_multiple_of_max_data_length(self):
         expected_packed = bytes.fromhex(
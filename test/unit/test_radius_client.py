@@ -0,0 +1,166 @@
+"""Unittests for chewie/radius_client.py"""
+
+# pylint: disable=missing-docstring
+
+import hashlib
+import logging
+import random
+import struct
+import unittest
+from unittest.mock import Mock
+
+from chewie.mac_address import MacAddress
+from chewie.radius import (
+    Radius,
+    RadiusAccessReject,
+    RadiusAccessRequest,
+    RadiusAttributesList,
+)
+from chewie.radius_attributes import MessageAuthenticator, UserName
+from chewie.radius_client import RadiusClient
+from chewie.radius_lifecycle import RadiusLifecycle, RadiusRequestTimeout
+from chewie.radius_servers import RadiusServer, RadiusServerPool
+from chewie.utils import RadiusQueueMessage
+
+from helpers import FakeClock, FakeTimerScheduler, client_mac
+
+PORT_ID = MacAddress.from_string("00:00:00:00:00:01")
+
+
+def mab_request(src_mac):
+    return RadiusQueueMessage(src_mac, src_mac, src_mac, None, PORT_ID)
+
+
+def access_reject(request, secret):
+    packet_id = request[1]
+    header = struct.pack("!BBH", Radius.ACCESS_REJECT, packet_id, 20)
+    authenticator = hashlib.md5(header + request[4:20] + secret.encode()).digest()
+    return header + authenticator
+
+
+class RadiusClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lifecycle = RadiusLifecycle(
+            "SECRET",
+            "44-44-44-44-44-44:",
+            logging.getLogger("test"),
+            sockets=8,
+            servers=RadiusServerPool([RadiusServer("10.0.0.1", 1812, "SECRET")]),
+        )
+        self.sent = []  # (socket_index, packed, server)
+        self.reply_handler = Mock(side_effect=self.complete_request)
+        self.timeout_handler = Mock()
+        self.client = RadiusClient(
+            self.lifecycle,
+            lambda *datagram: self.sent.append(datagram),
+            FakeTimerScheduler(),
+            logging.getLogger("test"),
+            reply_handler=self.reply_handler,
+            timeout_handler=self.timeout_handler,
+        )
+
+    def complete_request(self, radius, socket_index):
+        self.lifecycle.complete_request(
+            self.lifecycle.request_id(socket_index, radius.packet_id)
+        )
+
+    def reply(self, datagram=None):
+        socket_index, packed, _ = datagram or self.sent[-1]
+        self.client.receive(access_reject(packed, "SECRET"), socket_index)
+
+    def test_request_is_answered(self):
+        reply_event = self.client.request(mab_request(client_mac(1)))
+        self.assertFalse(reply_event.ready())
+        self.reply()
+        reply = reply_event.wait()
+        self.assertIsInstance(reply, RadiusAccessReject)
+        self.assertEqual(reply.packet_id, self.sent[0][1][1])
+        self.reply_handler.assert_not_called()
+        self.assertEqual(self.lifecycle.outstanding_requests(), 0)
+
+        # a duplicate reply is dropped
+        self.reply()
+        self.reply_handler.assert_not_called()
+
+    def test_radius_packet_request(self):
+        packet = RadiusAccessRequest(
+            None,
+            None,
+            RadiusAttributesList(
+                [UserName.create("user"), MessageAuthenticator.create(bytes(16))]
+            ),
+        )
+        first = self.client.request(packet)
+        second = self.client.request(packet)
+        self.assertEqual(self.lifecycle.outstanding_requests(), 2)
+        self.assertEqual(self.sent[1][1][1], packet.packet_id)
+        self.assertEqual(self.sent[1][1][4:20], packet.authenticator)
+
+        self.reply(self.sent[1])
+        self.reply(self.sent[0])
+        self.assertEqual(first.wait().packet_id, self.sent[0][1][1])
+        self.assertEqual(second.wait().packet_id, self.sent[1][1][1])
+
+    def test_unanswered_request_times_out(self):
+        reply_event = self.client.request(mab_request(client_mac(1)))
+        self.client.timer_scheduler.run_jobs()
+        self.assertEqual(len(self.sent), 4)
+        with self.assertRaises(RadiusRequestTimeout):
+            reply_event.wait()
+        self.timeout_handler.assert_not_called()
+
+    def test_superseded_request_times_out(self):
+        first = self.client.request(mab_request(client_mac(1)))
+        second = self.client.request(mab_request(client_mac(1)))
+        with self.assertRaises(RadiusRequestTimeout):
+            first.wait()
+        self.reply()
+        self.assertIsInstance(second.wait(), RadiusAccessReject)
+
+    def test_sent_request_goes_to_reply_handler(self):
+        self.client.send(mab_request(client_mac(1)))
+        socket_index, _, _ = self.sent[-1]
+        self.reply()
+        radius, reply_socket_index = self.reply_handler.call_args.args
+        self.assertIsInstance(radius, RadiusAccessReject)
+        self.assertEqual(reply_socket_index, socket_index)
+
+        self.client.send(mab_request(client_mac(2)))
+        self.client.timer_scheduler.run_jobs()
+        self.timeout_handler.assert_called_once_with(client_mac(2), PORT_ID)
+
+    def test_expired_request_times_out(self):
+        clock = self.lifecycle.in_flight.clock = FakeClock()
+        reply_event = self.client.request(mab_request(client_mac(1)))
+        self.client.send(mab_request(client_mac(2)))
+        clock.now = self.lifecycle.in_flight.timeout
+        self.lifecycle.in_flight.expire()
+        with self.assertRaises(RadiusRequestTimeout):
+            reply_event.wait()
+        self.client.timer_scheduler.run_jobs()
+        # only the session waiting on its reply_handler is told
+        self.timeout_handler.assert_called_once_with(client_mac(2), PORT_ID)
+
+    def test_reply_without_reply_handler_is_dropped(self):
+        self.client.reply_handler = None
+        self.client.send(mab_request(client_mac(1)))
+        self.reply()
+        self.assertEqual(self.lifecycle.outstanding_requests(), 0)
+
+    def test_thousands_of_concurrent_requests(self):
+        clients = 2000
+        reply_events = [
+            self.client.request(mab_request(client_mac(i))) for i in range(clients)
+        ]
+        self.assertEqual(self.lifecycle.outstanding_requests(), clients)
+        datagrams = list(zip(self.sent, reply_events))
+        random.Random(1).shuffle(datagrams)
+        for datagram, _ in datagrams:
+            self.reply(datagram)
+        for (_, packed, _), reply_event in datagrams:
+            self.assertEqual(reply_event.wait().packet_id, packed[1])
+        self.assertEqual(self.lifecycle.outstanding_requests(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
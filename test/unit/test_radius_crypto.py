@@ -0,0 +1,48 @@
+"""Unittests for chewie/radius_crypto.py"""
+
+# pylint: disable=missing-docstring
+
+import hashlib
+import hmac
+import unittest
+
+from chewie.radius_crypto import RadiusCrypto, radius_crypto
+
+
+class RadiusCryptoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.crypto = radius_crypto("SECRET")
+
+    def test_message_authenticator(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.crypto.message_authenticator(b"abc", memoryview(b"def")),
+                hmac.new(b"SECRET", b"abcdef", "md5").digest(),
+            )
+
+    def test_response_authenticator(self):
+        self.assertEqual(
+            self.crypto.response_authenticator(b"abc", b"def"),
+            hashlib.md5(b"abcdefSECRET").digest(),
+        )
+
+    def test_secret_md5(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.crypto.secret_md5(b"abc"), hashlib.md5(b"SECRETabc").digest()
+            )
+
+    def test_made_once_per_secret(self):
+        self.assertIs(radius_crypto("SECRET"), self.crypto)
+        self.assertIs(radius_crypto(self.crypto), self.crypto)
+        self.assertIsNot(radius_crypto("OTHER"), self.crypto)
+        self.assertIsInstance(radius_crypto(b"SECRET"), RadiusCrypto)
+
+    def test_no_secret(self):
+        for secret in (None, ""):
+            with self.assertRaises(ValueError):
+                radius_crypto(secret)
+
+
+if __name__ == "__main__":
+    unittest.main()
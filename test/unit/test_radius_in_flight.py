@@ -0,0 +1,86 @@
+"""Unittests for chewie/radius_in_flight.py"""
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from chewie.radius_in_flight import InFlightTable, RadiusIdsExhausted
+
+from helpers import FakeClock
+
+
+class InFlightTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(now=100.0)
+        self.table = InFlightTable(range(4), timeout=10, clock=self.clock)
+
+    def test_add_and_complete(self):
+        request = self.table.add("mac1", "port1", b"auth1")
+        self.assertEqual(request.request_id, 0)
+        self.assertEqual(request.sent_at, 100.0)
+        self.assertIs(self.table.get(0), request)
+        self.assertEqual(len(self.table), 1)
+
+        self.clock.now += 0.5
+        self.assertIs(self.table.complete(0), request)
+        self.assertEqual(len(self.table), 0)
+        # a duplicate reply finds nothing
+        self.assertIsNone(self.table.complete(0))
+        self.assertEqual(self.table.answered, 1)
+        self.assertEqual(self.table.rtt.srtt, 0.5)
+
+    def test_exhausted(self):
+        for i in range(4):
+            self.table.add("mac%d" % i, "port1", b"auth")
+        with self.assertRaises(RadiusIdsExhausted):
+            self.table.add("mac5", "port1", b"auth")
+        self.assertEqual(self.table.stats()["occupancy"], 1.0)
+
+    def test_expiry(self):
+        self.table.add("mac1", "port1", b"auth")
+        self.clock.now += 5
+        self.table.add("mac2", "port1", b"auth")
+        self.clock.now += 5
+        self.assertEqual([request.src_mac for request in self.table.expire()], ["mac1"])
+        self.assertIsNone(self.table.get(0))
+        self.assertIsNotNone(self.table.get(1))
+        self.clock.now += 5
+        # expired on lookup, before expire() gets to it
+        self.assertIsNone(self.table.complete(1))
+        self.assertEqual(self.table.expired, 2)
+        self.assertEqual(self.table.answered, 0)
+        self.assertEqual(list(self.table.free_request_ids), [2, 3, 0, 1])
+
+    def test_add_expires_old_requests(self):
+        for i in range(4):
+            self.table.add("mac%d" % i, "port1", b"auth")
+        self.clock.now += 10
+        request = self.table.add("mac5", "port1", b"auth")
+        self.assertEqual(request.request_id, 0)
+        self.assertEqual(len(self.table), 1)
+
+    def test_session_supersedes_its_last_request(self):
+        self.table.add("mac1", "port1", b"auth")
+        self.table.add("mac1", "port2", b"auth")
+        self.table.add("mac1", "port1", b"auth")
+        self.assertEqual(sorted(self.table.requests), [1, 2])
+        self.assertEqual(self.table.superseded, 1)
+
+    def test_rtt_smoothing(self):
+        for rtt in (1.0, 2.0, 0.5):
+            request = self.table.add("mac1", "port1", b"auth")
+            self.clock.now += rtt
+            self.table.complete(request.request_id)
+        stats = self.table.stats()
+        # srtt = 1, rttvar = 0.5; then srtt = 1.125, rttvar = 0.625;
+        # then srtt = 1.046875, rttvar = 0.625
+        self.assertAlmostEqual(stats["srtt"], 1.046875)
+        self.assertAlmostEqual(stats["rttvar"], 0.625)
+        self.assertEqual(stats["min_rtt"], 0.5)
+        self.assertEqual(stats["max_rtt"], 2.0)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["capacity"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,351 @@
+"""Unittests for chewie/radius_lifecycle.py"""
+
+# pylint: disable=missing-docstring
+
+import hashlib
+import logging
+import random
+import struct
+import unittest
+from unittest.mock import Mock, patch
+
+from chewie.chewie import Chewie
+from chewie.event import EventRadiusTimeout
+from chewie.mac_address import MacAddress
+from chewie.radius import Radius
+from chewie.radius_lifecycle import (
+    RadiusLifecycle,
+    RadiusIdsExhausted,
+    RadiusRequestTimeout,
+)
+from chewie.radius_servers import RadiusServer, RadiusServerPool
+from chewie.utils import RadiusQueueMessage
+
+from helpers import FakeClock, FakeTimerScheduler, client_mac
+
+PORT_ID = MacAddress.from_string("00:00:00:00:00:01")
+
+
+def mab_request(src_mac):
+    return RadiusQueueMessage(src_mac, src_mac, src_mac, None, PORT_ID)
+
+
+def access_reject(request, secret, code=3):
+    """A valid Access-Reject (or code) for the packed request"""
+    packet_id = request[1]
+    header = struct.pack("!BBH", code, packet_id, 20)
+    authenticator = hashlib.md5(header + request[4:20] + secret.encode()).digest()
+    return header + authenticator
+
+
+class RadiusLifecycleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lifecycle = RadiusLifecycle(
+            "SECRET", "44-44-44-44-44-44:", logging.getLogger("test"), sockets=4
+        )
+
+    def test_request_ids_are_unique_until_exhausted(self):
+        request_ids = set()
+        for i in range(4 * 256):
+            request_id, _ = self.lifecycle.allocate_request_id(client_mac(i), PORT_ID)
+            request_ids.add(request_id)
+        self.assertEqual(request_ids, set(range(4 * 256)))
+        self.assertEqual(self.lifecycle.outstanding_requests(), 4 * 256)
+
+        with self.assertRaises(RadiusIdsExhausted):
+            self.lifecycle.allocate_request_id(client_mac(5000), PORT_ID)
+
+        self.lifecycle.release_request_id(700)
+        request_id, _ = self.lifecycle.allocate_request_id(client_mac(5000), PORT_ID)
+        self.assertEqual(request_id, 700)
+
+    def test_consecutive_requests_use_different_sockets(self):
+        sockets = [
+            self.lifecycle.process_outbound(mab_request(client_mac(i)))[0]
+            for i in range(8)
+        ]
+        self.assertEqual(sockets, [0, 1, 2, 3, 0, 1, 2, 3])
+
+    def test_next_request_frees_the_last(self):
+        first, _ = self.lifecycle.allocate_request_id(client_mac(1), PORT_ID)
+        second, _ = self.lifecycle.allocate_request_id(client_mac(1), PORT_ID)
+        self.assertNotEqual(first, second)
+        self.assertIsNone(self.lifecycle.in_flight.get(first))
+        with self.assertRaises(KeyError):
+            self.lifecycle.request_authenticator(first)
+        self.assertEqual(self.lifecycle.outstanding_requests(), 1)
+        # freed ids are reused last
+        self.assertEqual(self.lifecycle.in_flight.free_request_ids[-1], first)
+
+    def test_release_is_idempotent(self):
+        request_id, _ = self.lifecycle.allocate_request_id(client_mac(1), PORT_ID)
+        self.lifecycle.release_request_id(request_id)
+        self.lifecycle.release_request_id(request_id)
+        self.assertEqual(
+            list(self.lifecycle.in_flight.free_request_ids).count(request_id), 1
+        )
+
+
+class ConcurrentRequestsTestCase(unittest.TestCase):
+    """More than 1,000 Access-Requests in flight, answered in random order"""
+
+    CLIENTS = 1200
+
+    def setUp(self):
+        self.chewie = Chewie("lo", radius_server_secret="SECRET", radius_sockets=5)
+
+    def test_replies_reach_their_client(self):
+        requests = {}  # src_mac str: (socket_index, packed request)
+        for i in range(self.CLIENTS):
+            src_mac = client_mac(i)
+            requests[str(src_mac)] = self.chewie.radius_lifecycle.process_outbound(
+                mab_request(src_mac)
+            )
+        self.assertEqual(
+            self.chewie.radius_lifecycle.outstanding_requests(), self.CLIENTS
+        )
+        on_the_wire = {(index, packed[1]) for index, packed in requests.values()}
+        self.assertEqual(len(on_the_wire), self.CLIENTS)
+
+        replies = [
+            (src_mac, socket_index, access_reject(packed, "SECRET"))
+            for src_mac, (socket_index, packed) in requests.items()
+        ]
+        random.Random(1).shuffle(replies)
+
+        routed_to = []
+
+        def get_state_machine(src_mac, port_id, message_id=-1):
+            self.assertEqual(port_id, PORT_ID)
+            self.assertEqual(message_id, -1)
+            routed_to.append(str(src_mac))
+            return Mock()
+
+        with patch.object(self.chewie, "get_state_machine", get_state_machine):
+            for _, socket_index, reply in replies:
+                self.chewie.process_radius_datagram(reply, socket_index)
+
+        self.assertEqual(routed_to, [src_mac for src_mac, _, _ in replies])
+        self.assertEqual(self.chewie.radius_lifecycle.outstanding_requests(), 0)
+
+    def test_reply_on_the_wrong_socket_is_dropped(self):
+        socket_index, packed = self.chewie.radius_lifecycle.process_outbound(
+            mab_request(client_mac(1))
+        )
+        with patch.object(self.chewie, "get_state_machine") as get_state_machine:
+            self.chewie.process_radius_datagram(
+                access_reject(packed, "SECRET"), (socket_index + 1) % 5
+            )
+        get_state_machine.assert_not_called()
+        self.assertEqual(self.chewie.radius_lifecycle.outstanding_requests(), 1)
+
+
+class RetransmitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lifecycle = RadiusLifecycle(
+            "SECRET", "44-44-44-44-44-44:", logging.getLogger("test"), sockets=2
+        )
+        self.sent = self.lifecycle.process_outbound(mab_request(client_mac(1)))
+        self.request = self.lifecycle.in_flight_request(client_mac(1), PORT_ID)
+
+    def test_retransmissions_are_identical_with_backoff(self):
+        delays = []
+        for _ in range(3):
+            delays.append(self.lifecycle.retransmit_delay(self.request))
+            self.assertIs(self.lifecycle.retransmit(self.request), self.request)
+            self.assertEqual(
+                (self.request.socket_index, self.request.packed), self.sent
+            )
+        self.assertEqual(delays, [2, 4, 8])
+
+        with self.assertRaises(RadiusRequestTimeout):
+            self.lifecycle.retransmit(self.request)
+        self.assertEqual(self.lifecycle.outstanding_requests(), 0)
+        stats = self.lifecycle.stats()
+        self.assertEqual(stats["retransmits"], 3)
+        self.assertEqual(stats["timed_out"], 1)
+
+    def test_answered_request_is_not_retransmitted(self):
+        self.lifecycle.retransmit(self.request)
+        self.lifecycle.complete_request(self.request.request_id)
+        self.assertIsNone(self.lifecycle.retransmit(self.request))
+        # Karn's algorithm, the reply may be to either transmission
+        self.assertIsNone(self.lifecycle.stats()["srtt"])
+
+    def test_superseded_request_is_not_retransmitted(self):
+        self.lifecycle.process_outbound(mab_request(client_mac(1)))
+        self.assertIsNone(self.lifecycle.retransmit(self.request))
+
+    def test_requests_outlive_their_retransmissions(self):
+        budget = sum(self.lifecycle.retransmit_timeout * 2**i for i in range(4))
+        self.assertGreater(self.lifecycle.in_flight.timeout, budget)
+
+    def test_expired_request_times_out(self):
+        lifecycle = RadiusLifecycle(
+            "SECRET", "44-44-44-44-44-44:", logging.getLogger("test"), request_timeout=5
+        )
+        clock = FakeClock()
+        lifecycle.in_flight.clock = clock
+        lifecycle.process_outbound(mab_request(client_mac(1)))
+        request = lifecycle.in_flight_request(client_mac(1), PORT_ID)
+        clock.now = 5
+        # expired by another session's request, before its retransmission is due
+        lifecycle.process_outbound(mab_request(client_mac(2)))
+        with self.assertRaises(RadiusRequestTimeout):
+            lifecycle.retransmit(request)
+        self.assertEqual(lifecycle.stats()["expired"], 1)
+
+
+class ChewieRetransmitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.chewie = Chewie("lo", radius_server_secret="SECRET")
+        self.chewie.timer_scheduler = FakeTimerScheduler()
+        self.chewie.radius_sockets = [Mock()]
+        self.state_machine = Mock()
+        self.chewie.state_machines = {
+            str(PORT_ID): {str(client_mac(1)): self.state_machine}
+        }
+        self.chewie.send_radius_request(mab_request(client_mac(1)))
+        self.radius_socket = self.chewie.radius_sockets[0]
+
+    def test_unanswered_request_is_resent_then_times_out(self):
+        self.chewie.timer_scheduler.run_jobs()
+        sent = [call.args[0] for call in self.radius_socket.send.call_args_list]
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(len(set(map(bytes, sent))), 1)
+        self.state_machine.event.assert_called_once()
+        self.assertIsInstance(
+            self.state_machine.event.call_args.args[0], EventRadiusTimeout
+        )
+
+    def test_default_schedule_ends_in_timeout(self):
+        clock = FakeClock()
+        self.chewie.radius_lifecycle.in_flight.clock = clock
+        # sent again by the session, now on the fake clock
+        self.chewie.send_radius_request(mab_request(client_mac(1)))
+        jobs = self.chewie.timer_scheduler.jobs
+        while jobs:
+            job = jobs.pop(0)
+            if job.cancelled():
+                continue
+            clock.now += job.timeout
+            job.run()
+        self.assertEqual(clock.now, 30)
+        self.assertEqual(self.radius_socket.send.call_count, 5)
+        self.state_machine.event.assert_called_once()
+        self.assertIsInstance(
+            self.state_machine.event.call_args.args[0], EventRadiusTimeout
+        )
+
+    def test_reply_cancels_retransmission(self):
+        packed = self.radius_socket.send.call_args.args[0]
+        self.chewie.process_radius_datagram(access_reject(packed, "SECRET"))
+        self.chewie.timer_scheduler.run_jobs()
+        self.radius_socket.send.assert_called_once()
+        event = self.state_machine.event.call_args.args[0]
+        self.assertNotIsInstance(event, EventRadiusTimeout)
+
+
+class MultipleServersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.chewie = Chewie(
+            "lo",
+            radius_server_secret="SECRET",
+            radius_servers=[
+                {"ip": "10.0.0.1", "secret": "SECRET1"},
+                {"ip": "10.0.0.2", "port": 1645, "secret": "SECRET2"},
+            ],
+        )
+        self.chewie.timer_scheduler = FakeTimerScheduler()
+        self.chewie.radius_sockets = [Mock()]
+        self.state_machine = Mock()
+        self.chewie.state_machines = {
+            str(PORT_ID): {str(client_mac(1)): self.state_machine}
+        }
+        self.first, self.second = self.chewie.radius_lifecycle.servers
+
+    def sent(self):
+        """(packed, address) of the last datagram sent"""
+        return self.chewie.radius_sockets[0].send.call_args.args
+
+    def test_fails_over_to_the_next_server(self):
+        self.chewie.send_radius_request(mab_request(client_mac(1)))
+        self.assertEqual(self.sent()[1], ("10.0.0.1", 1812))
+        # three retransmissions, then the fourth timeout marks the server dead
+        self.chewie.timer_scheduler.run_jobs(4)
+        packed, address = self.sent()
+        self.assertEqual(address, ("10.0.0.2", 1645))
+        self.assertTrue(self.first.dead)
+
+        # the reply is validated with the second server's secret
+        self.chewie.process_radius_datagram(access_reject(packed, "SECRET2"))
+        self.state_machine.event.assert_called_once()
+        self.assertNotIsInstance(
+            self.state_machine.event.call_args.args[0], EventRadiusTimeout
+        )
+        stats = self.chewie.radius_lifecycle.stats()["servers"]
+        self.assertEqual(stats["10.0.0.1:1812"]["timeouts"], 4)
+        self.assertEqual(stats["10.0.0.1:1812"]["failovers"], 1)
+        self.assertEqual(stats["10.0.0.2:1645"]["replies"], 1)
+        self.assertEqual(stats["10.0.0.2:1645"]["outstanding"], 0)
+
+    def test_reply_with_the_wrong_secret_is_an_error(self):
+        self.chewie.send_radius_request(mab_request(client_mac(1)))
+        packed, _ = self.sent()
+        self.chewie.process_radius_datagram(access_reject(packed, "SECRET2"))
+        self.state_machine.event.assert_not_called()
+        self.assertEqual(self.first.errors, 1)
+
+    def test_dead_server_is_probed_until_revived(self):
+        self.chewie.send_radius_request(mab_request(client_mac(1)))
+        self.chewie.timer_scheduler.run_jobs(4)
+        self.assertTrue(self.first.dead)
+        self.chewie.process_radius_datagram(access_reject(self.sent()[0], "SECRET2"))
+
+        scheduler = self.chewie.timer_scheduler
+        for _ in range(2):
+            self.assertTrue(self.first.dead)
+            # the failed over request's retransmission was cancelled by its reply
+            scheduler.jobs = [job for job in scheduler.jobs if not job.cancelled()]
+            self.assertEqual(
+                [job.function for job in scheduler.jobs],
+                [self.chewie.get_radius_client().probe_server],
+            )
+            scheduler.run_jobs(1)
+            packed, address = self.sent()
+            self.assertEqual(packed[0], Radius.STATUS_SERVER)
+            self.assertEqual(address, ("10.0.0.1", 1812))
+            self.chewie.process_radius_datagram(
+                access_reject(packed, "SECRET1", Radius.ACCESS_ACCEPT)
+            )
+        self.assertFalse(self.first.dead)
+        self.assertEqual(self.first.probes, 2)
+        self.state_machine.event.assert_called_once()
+
+        scheduler.run_jobs()
+        self.assertEqual(scheduler.jobs, [])
+
+    def test_eap_conversation_stays_on_its_server(self):
+        lifecycle = RadiusLifecycle(
+            "SECRET",
+            "44-44-44-44-44-44:",
+            logging.getLogger("test"),
+            servers=RadiusServerPool(
+                [
+                    RadiusServer("10.0.0.1", 1812, "SECRET1"),
+                    RadiusServer("10.0.0.2", 1812, "SECRET2"),
+                ]
+            ),
+        )
+        first, second = lifecycle.servers
+        lifecycle.process_outbound(mab_request(client_mac(1)), second)
+        request = lifecycle.in_flight_request(client_mac(1), PORT_ID)
+        lifecycle.complete_request(request.request_id)
+
+        self.assertIs(lifecycle.choose_server(client_mac(1), PORT_ID, "state"), second)
+        self.assertIs(lifecycle.choose_server(client_mac(1), PORT_ID, None), first)
+        self.assertIs(lifecycle.choose_server(client_mac(2), PORT_ID, "state"), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Unittests for chewie/radius_servers.py"""
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from chewie.radius_servers import RadiusServer, RadiusServerPool
+
+
+class RadiusServerPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.first = RadiusServer("10.0.0.1", 1812, "SECRET1")
+        self.second = RadiusServer("10.0.0.2", 1812, "SECRET2", weight=2)
+        self.pool = RadiusServerPool(
+            [self.first, self.second], dead_after_timeouts=2, revive_after_replies=2
+        )
+
+    def test_weighted_least_outstanding(self):
+        chosen = []
+        for _ in range(6):
+            server = self.pool.choose()
+            server.outstanding += 1
+            chosen.append(server.ip)
+        # the second server takes twice the outstanding requests of the first
+        self.assertEqual(self.first.outstanding, 2)
+        self.assertEqual(self.second.outstanding, 4)
+        self.assertEqual(chosen[0], "10.0.0.2")
+
+    def test_name(self):
+        self.assertEqual(self.first.name, "10.0.0.1:1812")
+        self.assertEqual(
+            RadiusServer("2001:db8::1", 1812, "S").name, "[2001:db8::1]:1812"
+        )
+
+    def test_exclude(self):
+        self.assertIs(self.pool.choose(exclude=(self.second,)), self.first)
+        self.assertIsNone(self.pool.choose(exclude=(self.first, self.second)))
+
+    def test_mark_dead_and_revive(self):
+        self.pool.transmission_unanswered(self.second)
+        self.assertFalse(self.second.dead)
+        self.pool.reply_received(self.second, 0.1)
+        self.pool.transmission_unanswered(self.second)
+        self.assertFalse(self.second.dead)
+        self.pool.transmission_unanswered(self.second)
+        self.assertTrue(self.second.dead)
+        self.assertIs(self.pool.choose(), self.first)
+
+        self.pool.reply_received(self.second)
+        self.pool.probe_unanswered(self.second)
+        self.pool.reply_received(self.second)
+        self.assertTrue(self.second.dead)
+        self.pool.reply_received(self.second)
+        self.assertFalse(self.second.dead)
+
+        stats = self.pool.stats()["10.0.0.2:1812"]
+        self.assertEqual(stats["timeouts"], 3)
+        self.assertEqual(stats["replies"], 4)
+        self.assertEqual(stats["times_marked_dead"], 1)
+        self.assertEqual(stats["srtt"], 0.1)
+
+    def test_all_dead_still_chosen(self):
+        for _ in range(2):
+            self.pool.transmission_unanswered(self.first)
+            self.pool.transmission_unanswered(self.second)
+        self.assertIsNotNone(self.pool.choose())
+
+    def test_invalid_weight(self):
+        with self.assertRaises(ValueError):
+            RadiusServer("10.0.0.3", 1812, "SECRET", weight=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
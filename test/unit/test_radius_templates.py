@@ -0,0 +1,92 @@
+"""Unittests for chewie/radius_templates.py"""
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from chewie.mac_address import MacAddress
+from chewie.message_parser import IdentityMessage, MessagePacker
+from chewie.radius_attributes import (
+    CalledStationId,
+    NASIdentifier,
+    NASPortType,
+    State,
+)
+from chewie.radius_templates import AccessRequestTemplate, port_id_to_int
+
+SRC_MAC = MacAddress.from_string("02:42:ac:17:00:6f")
+PORT_ID = MacAddress.from_string("00:00:00:00:00:01")
+REQUEST_AUTHENTICATOR = bytes(range(16))
+
+
+class AccessRequestTemplateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.extra_attributes = [
+            CalledStationId.create("44-44-44-44-44-44:"),
+            NASPortType.create(15),
+            NASIdentifier.create("44-44-44-44-44-44:"),
+        ]
+        self.template = AccessRequestTemplate(self.extra_attributes)
+
+    def test_port_id_to_int(self):
+        self.assertEqual(port_id_to_int("00:00:00:aa:00:01"), 0xAA0001)
+        self.assertEqual(port_id_to_int(PORT_ID), 1)
+
+    def test_cached(self):
+        self.assertIs(self.template.nas_port(PORT_ID), self.template.nas_port(PORT_ID))
+        self.assertIs(
+            self.template.calling_station_id(SRC_MAC),
+            self.template.calling_station_id(SRC_MAC),
+        )
+        self.assertEqual(
+            self.template.calling_station_id(SRC_MAC, "-").data(),
+            "02-42-ac-17-00-6f",
+        )
+        self.assertIsNone(self.template.nas_port("00:00:00:00:00:00"))
+
+    def test_eap_request_matches_uncached(self):
+        for state in (None, State.create(b"state")):
+            self.assertEqual(
+                MessagePacker.radius_pack(
+                    IdentityMessage(SRC_MAC, 1, 2, "host1user"),
+                    SRC_MAC,
+                    "host1user",
+                    1,
+                    REQUEST_AUTHENTICATOR,
+                    state,
+                    "SECRET",
+                    self.template.nas_port(PORT_ID),
+                    self.template.extra_attributes,
+                    self.template.calling_station_id(SRC_MAC),
+                ),
+                MessagePacker.radius_pack(
+                    IdentityMessage(SRC_MAC, 1, 2, "host1user"),
+                    SRC_MAC,
+                    "host1user",
+                    1,
+                    REQUEST_AUTHENTICATOR,
+                    state,
+                    "SECRET",
+                    port_id_to_int(PORT_ID),
+                    self.extra_attributes,
+                ),
+            )
+
+    def test_mab_request_matches_uncached(self):
+        self.assertEqual(
+            MessagePacker.radius_mab_pack(
+                SRC_MAC,
+                1,
+                REQUEST_AUTHENTICATOR,
+                "SECRET",
+                self.template.nas_port(PORT_ID),
+                self.template.calling_station_id(SRC_MAC, "-"),
+            ),
+            MessagePacker.radius_mab_pack(
+                SRC_MAC, 1, REQUEST_AUTHENTICATOR, "SECRET", port_id_to_int(PORT_ID)
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
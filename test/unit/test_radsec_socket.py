@@ -0,0 +1,197 @@
+"""Unittests for chewie/radsec_socket.py, against a local TLS stand-in server"""
+
+# pylint: disable=missing-docstring
+
+import os
+import ssl
+import struct
+import time
+import unittest
+
+import eventlet
+from eventlet.green import socket
+from eventlet.green import ssl as green_ssl
+
+from chewie.chewie import Chewie
+from chewie.radsec_socket import RadSecSocket, radsec_ssl_context
+
+CERTS = os.path.join(
+    os.path.dirname(__file__), "..", "..", "etc", "freeradius", "certs"
+)
+CERTS_PASSWORD = "whatever"
+RADSEC = {
+    "ca_certs": os.path.join(CERTS, "ca.pem"),
+    "certfile": os.path.join(CERTS, "client.pem"),
+    "keyfile": os.path.join(CERTS, "client.key"),
+    "password": CERTS_PASSWORD,
+    "check_hostname": False,
+}
+
+
+def request(packet_id, request_authenticator=bytes(16)):
+    return struct.pack("!BBH16s", 1, packet_id, 20, request_authenticator)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting")
+        eventlet.sleep(0.01)
+
+
+class FakeRadSecServer:
+    """Answers each RADIUS request with an Access-Accept, over mutually
+    authenticated TLS"""
+
+    def __init__(self):
+        self.context = green_ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(
+            os.path.join(CERTS, "server.pem"),
+            os.path.join(CERTS, "server.key"),
+            CERTS_PASSWORD,
+        )
+        self.context.load_verify_locations(os.path.join(CERTS, "ca.pem"))
+        self.context.verify_mode = ssl.CERT_REQUIRED
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(5)
+        self.address = self.listener.getsockname()
+        self.connections = []
+        self.received = []  # (connection number, packet)
+        self.reply = True
+        self.threads = [eventlet.spawn(self.accept)]
+
+    def accept(self):
+        while True:
+            sock, _ = self.listener.accept()
+            try:
+                tls_sock = self.context.wrap_socket(sock, server_side=True)
+            except (OSError, ValueError):
+                sock.close()
+                continue
+            self.connections.append(tls_sock)
+            self.threads.append(
+                eventlet.spawn(self.serve, tls_sock, len(self.connections))
+            )
+
+    def serve(self, tls_sock, connection_number):
+        buffer = b""
+        while True:
+            try:
+                data = tls_sock.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            while len(buffer) >= 4:
+                length = struct.unpack("!H", buffer[2:4])[0]
+                if len(buffer) < length:
+                    break
+                packet, buffer = buffer[:length], buffer[length:]
+                self.received.append((connection_number, packet))
+                if self.reply:
+                    tls_sock.sendall(bytes([2]) + packet[1:20])
+
+    def drop_connections(self):
+        for tls_sock in self.connections:
+            tls_sock.close()
+
+    def close(self):
+        for thread in self.threads:
+            thread.kill()
+        self.drop_connections()
+        self.listener.close()
+
+
+class RadSecSocketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRadSecServer()
+        self.context = radsec_ssl_context(**RADSEC)
+        self.radsec = RadSecSocket(
+            [self.server.address], "test", self.context, reconnect_min=0.01
+        )
+        self.radsec.setup()
+        self.connection = self.radsec.connection(self.server.address)
+        wait_for(lambda: self.connection.connected)
+
+    def tearDown(self):
+        self.radsec.close()
+        self.server.close()
+
+    def test_pipelined_requests(self):
+        for packet_id in range(3):
+            self.radsec.send(request(packet_id))
+        replies = []
+        while len(replies) < 3:
+            replies.extend(self.radsec.receive_batch())
+        self.assertEqual(sorted(reply[1] for reply in replies), [0, 1, 2])
+        self.assertEqual(replies[0][0], 2)
+        self.assertEqual([number for number, _ in self.server.received], [1, 1, 1])
+        self.assertEqual(self.connection.outstanding, {})
+
+    def test_retransmit_only_on_new_connection(self):
+        self.server.reply = False
+        self.radsec.send(request(7))
+        self.radsec.send(request(7))
+        self.radsec.send(request(7, b"\x01" * 16))  # a new request reusing the id
+        wait_for(lambda: len(self.server.received) == 2)
+
+        self.server.drop_connections()
+        wait_for(lambda: self.connection.connects == 2 and self.connection.connected)
+        self.radsec.send(request(7, b"\x01" * 16))
+        wait_for(lambda: len(self.server.received) == 3)
+        self.assertEqual([number for number, _ in self.server.received], [1, 1, 2])
+
+    def test_reconnect_backoff(self):
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        address = closed.getsockname()
+        closed.close()
+        radsec = RadSecSocket(
+            [address], "test", self.context, reconnect_min=0.01, reconnect_max=0.04
+        )
+        radsec.setup()
+        connection = radsec.connection(address)
+        try:
+            wait_for(lambda: connection.failures >= 4)
+            self.assertFalse(connection.connected)
+            self.assertEqual(connection.backoff, 0.04)
+            radsec.send(request(1))
+        finally:
+            radsec.close()
+
+
+class ChewieRadSecTestCase(unittest.TestCase):
+    def test_defaults(self):
+        chewie = Chewie("lo", radius_server_ip="127.0.0.1", radsec=RADSEC)
+        self.assertEqual(chewie.radius_server_port, 2083)
+        self.assertEqual(chewie.radius_secret, "radsec")
+
+    def test_send_over_radsec(self):
+        server = FakeRadSecServer()
+        chewie = Chewie(
+            "lo",
+            radius_server_ip="127.0.0.1",
+            radius_server_port=server.address[1],
+            radius_sockets=2,
+            radsec=RADSEC,
+        )
+        try:
+            chewie.setup_radius_socket()
+            self.assertEqual(len(chewie.radius_sockets), 2)
+            for radius_socket in chewie.radius_sockets:
+                connection = radius_socket.connection(server.address)
+                wait_for(lambda: connection.connected)  # pylint: disable=cell-var-from-loop
+            radius_server = list(chewie.radius_lifecycle.servers)[0]
+            chewie.send_radius_datagram(1, request(9), radius_server)
+            self.assertEqual(chewie.radius_sockets[1].receive()[:2], bytes([2, 9]))
+            self.assertEqual(len(server.connections), 2)
+        finally:
+            chewie.shutdown()
+            server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Unittests for chewie/reauth_policy.py"""
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from chewie.reauth_policy import ReauthPolicy
+from helpers import FakeClock, FakeTimerScheduler
+
+
+class ReauthPolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(now=1000.0)
+        self.timer_scheduler = FakeTimerScheduler()
+        self.fired = []
+
+    def record(self, value):
+        self.fired.append(value)
+
+    def test_no_jitter_keeps_exact_period(self):
+        policy = ReauthPolicy(clock=self.clock)
+        job = policy.call_later(self.timer_scheduler, 3600, self.record, "a")
+        self.assertEqual(job.timer_job.timeout, 3600)
+        self.assertEqual(policy.stats()["queued"], 1)
+
+    def test_jitter_never_exceeds_period(self):
+        policy = ReauthPolicy(jitter=0.1, clock=self.clock)
+        for i in range(1000):
+            job = policy.call_later(self.timer_scheduler, 3600, self.record, i)
+            self.assertLessEqual(job.timer_job.timeout, 3600)
+            self.assertGreaterEqual(job.timer_job.timeout, 3240)
+
+    def test_jitter_spreads_burst_evenly(self):
+        policy = ReauthPolicy(jitter=0.1, clock=self.clock)
+        for i in range(360):
+            policy.call_later(self.timer_scheduler, 3600, self.record, i)
+        # 361 whole seconds in the window, so no second holds more than one.
+        self.assertEqual(max(policy.slots.values()), 1)
+
+    def test_rate_cap_spreads_within_window(self):
+        policy = ReauthPolicy(jitter=0.05, max_per_second=2, clock=self.clock)
+        jobs = [
+            policy.call_later(self.timer_scheduler, 60, self.record, i)
+            for i in range(8)
+        ]
+        # 4 whole seconds in the window, 2 a second
+        self.assertEqual(
+            sorted(job.slot for job in jobs),
+            [1057, 1057, 1058, 1058, 1059, 1059, 1060, 1060],
+        )
+        self.assertEqual(policy.stats()["over_cap"], 0)
+
+    def test_rate_cap_brings_reauths_forward(self):
+        policy = ReauthPolicy(max_per_second=2, clock=self.clock)
+        jobs = [
+            policy.call_later(self.timer_scheduler, 60, self.record, i)
+            for i in range(5)
+        ]
+        self.assertEqual([job.slot for job in jobs], [1060, 1060, 1059, 1059, 1058])
+        for job in jobs:
+            self.assertLessEqual(job.timer_job.timeout, 60)
+            self.assertGreaterEqual(job.timer_job.timeout, job.slot - 1000)
+            self.assertLess(job.timer_job.timeout, job.slot - 999)
+        self.assertEqual(policy.stats()["brought_forward"], 3)
+        self.assertEqual(policy.stats()["over_cap"], 0)
+
+    def test_rate_cap_gives_way_to_period(self):
+        policy = ReauthPolicy(max_per_second=1, clock=self.clock)
+        jobs = [
+            policy.call_later(self.timer_scheduler, 2, self.record, i) for i in range(3)
+        ]
+        self.assertEqual([job.slot for job in jobs], [1002, 1001, 1002])
+        self.assertEqual(jobs[2].timer_job.timeout, 2)
+        self.assertEqual(policy.stats()["over_cap"], 1)
+
+    def test_counters(self):
+        policy = ReauthPolicy(max_per_second=1, clock=self.clock)
+        jobs = [
+            policy.call_later(self.timer_scheduler, 60 + i, self.record, i)
+            for i in range(3)
+        ]
+        jobs[1].cancel()
+        jobs[1].cancel()
+        self.assertTrue(jobs[1].cancelled())
+        self.assertNotIn(1061, policy.slots)
+
+        self.timer_scheduler.run_jobs()
+        self.assertEqual(self.fired, [0, 2])
+        self.assertEqual(
+            policy.stats(),
+            {
+                "queued": 0,
+                "executed": 2,
+                "cancelled": 1,
+                "brought_forward": 0,
+                "over_cap": 0,
+            },
+        )
+        self.assertEqual(policy.slots, {})
+
+    def test_invalid_jitter(self):
+        with self.assertRaises(ValueError):
+            ReauthPolicy(jitter=1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
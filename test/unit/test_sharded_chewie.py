@@ -0,0 +1,135 @@
+"""Unittests for chewie/sharded_chewie.py"""
+
+# pylint: disable=missing-docstring
+
+import multiprocessing
+import unittest
+
+import eventlet
+
+from chewie.mac_address import MacAddress
+from chewie.sharded_chewie import (
+    AUTH_FAILURE,
+    AUTH_SUCCESS,
+    EAP_FRAME,
+    PORT_UP,
+    SEND_EAP,
+    ChewieShard,
+    ShardChannel,
+    ShardedChewie,
+    shard_for_port,
+)
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class ShardedChewieTestCase(unittest.TestCase):
+    PORT_ID = "00:00:00:00:00:01"
+
+    def setUp(self):
+        self.auths = []
+        self.failures = []
+        self.chewie = ShardedChewie(
+            "lo",
+            auth_handler=lambda *args, **kwargs: self.auths.append((args, kwargs)),
+            failure_handler=lambda *args: self.failures.append(args),
+            workers=4,
+        )
+        self.chewie.channels = [FakeChannel() for _ in range(4)]
+
+    def test_shard_for_port_is_stable(self):
+        port_mac = MacAddress.from_string(self.PORT_ID)
+        shard = shard_for_port(self.PORT_ID, 4)
+        self.assertEqual(shard, shard_for_port(port_mac, 4))
+        self.assertEqual(shard, shard_for_port(port_mac.address, 4))
+        self.assertEqual(shard, shard_for_port(self.PORT_ID.upper(), 4))
+
+    def test_ports_spread_over_shards(self):
+        shards = {shard_for_port("00:00:00:00:00:%02x" % i, 4) for i in range(64)}
+        self.assertEqual(shards, {0, 1, 2, 3})
+
+    def test_frame_goes_to_port_shard(self):
+        frame = MacAddress.from_string(self.PORT_ID).address + b"\x00" * 20
+        self.chewie.port_up(self.PORT_ID)
+        self.chewie.dispatch_frame(EAP_FRAME, frame)
+        channel = self.chewie.channels[shard_for_port(self.PORT_ID, 4)]
+        self.assertEqual(channel.sent, [(PORT_UP, self.PORT_ID), (EAP_FRAME, frame)])
+        self.assertEqual(sum(len(channel.sent) for channel in self.chewie.channels), 2)
+
+    def test_shard_callbacks_reach_handlers(self):
+        self.chewie.eap_socket = FakeChannel()
+        self.chewie.handle_shard_message(
+            (AUTH_SUCCESS, "src", "port", ("vlan",), {"filter_id": "f"})
+        )
+        self.chewie.handle_shard_message((AUTH_FAILURE, "src", "port"))
+        self.chewie.handle_shard_message((SEND_EAP, b"frame"))
+        self.assertEqual(self.auths, [(("src", "port", "vlan"), {"filter_id": "f"})])
+        self.assertEqual(self.failures, [("src", "port")])
+        self.assertEqual(self.chewie.eap_socket.sent, [b"frame"])
+
+
+class ShardChannelTestCase(unittest.TestCase):
+    def setUp(self):
+        parent_connection, shard_connection = multiprocessing.Pipe()
+        self.parent = ShardChannel(parent_connection)
+        self.shard = ShardChannel(shard_connection)
+
+    def tearDown(self):
+        self.parent.close()
+        self.shard.close()
+
+    def test_more_than_the_pipe_holds_both_ways_at_once(self):
+        frame = b"\x00" * 4096
+        messages = 1000  # 4MB each way
+
+        def exchange(channel):
+            for i in range(messages):
+                channel.send((EAP_FRAME, i, frame))
+            return [channel.receive()[1] for _ in range(messages)]
+
+        threads = [
+            eventlet.spawn(exchange, self.parent),
+            eventlet.spawn(exchange, self.shard),
+        ]
+        with eventlet.Timeout(30):
+            for thread in threads:
+                self.assertEqual(thread.wait(), list(range(messages)))
+
+    def test_closed_end_is_eof(self):
+        self.shard.send((PORT_UP, "00:00:00:00:00:01"))
+        eventlet.sleep(0)
+        self.shard.close()
+        self.assertEqual(self.parent.receive(), (PORT_UP, "00:00:00:00:00:01"))
+        with self.assertRaises(EOFError):
+            self.parent.receive()
+
+
+class ChewieShardTestCase(unittest.TestCase):
+    def setUp(self):
+        self.channel = FakeChannel()
+        self.shard = ChewieShard(self.channel, 0, "lo", radius_server_ip="127.0.0.1")
+
+    def test_port_events_from_parent(self):
+        self.shard.handle_parent_message((PORT_UP, "00:00:00:00:00:01"))
+        self.assertTrue(self.shard.port_status["00:00:00:00:00:01"])
+
+    def test_handlers_forward_to_parent(self):
+        self.shard.auth_success("src", "port", 3600, "vlan", filter_id="f")
+        self.shard.auth_failure("src", "port")
+        self.assertEqual(
+            self.channel.sent,
+            [
+                (AUTH_SUCCESS, "src", "port", ("vlan",), {"filter_id": "f"}),
+                (AUTH_FAILURE, "src", "port"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Unittests for chewie/timer_scheduler.py"""
+
+# pylint: disable=missing-docstring
+
+import logging
+import unittest
+
+import eventlet
+
+from chewie.timer_scheduler import TimerScheduler
+
+from helpers import FakeClock
+
+
+class TimerSchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        # other test modules attach handlers to the root logger at DEBUG.
+        self.logger = logging.getLogger("test_timer_scheduler")
+        self.logger.setLevel(logging.WARNING)
+        self.clock = FakeClock(now=1000.0)
+        self.scheduler = TimerScheduler(self.logger, clock=self.clock)
+        self.fired = []
+
+    def record(self, value):
+        self.fired.append(value)
+
+    def advance(self, seconds):
+        self.clock.now += seconds
+        for job in self.scheduler.expire_due_jobs(self.clock()):
+            self.scheduler.run_job(job)
+
+    def test_job_never_runs_early(self):
+        self.scheduler.call_later(1.005, self.record, "a")
+        self.advance(1)
+        self.assertEqual(self.fired, [])
+        self.advance(0.02)
+        self.assertEqual(self.fired, ["a"])
+
+    def test_jobs_run_in_expiry_order(self):
+        self.scheduler.call_later(3, self.record, 3)
+        self.scheduler.call_later(1, self.record, 1)
+        self.scheduler.call_later(2, self.record, 2)
+        self.advance(5)
+        self.assertEqual(self.fired, [1, 2, 3])
+
+    def test_zero_timeout_is_ready_immediately(self):
+        self.scheduler.call_later(0, self.record, "now")
+        self.advance(0)
+        self.assertEqual(self.fired, ["now"])
+
+    def test_long_timeouts_cascade_through_overflow_wheels(self):
+        # beyond the span of the first (2.56s) and second (655s) wheels
+        for timeout in (3600, 86400, 700, 30):
+            self.scheduler.call_later(timeout, self.record, timeout)
+        self.advance(29.9)
+        self.assertEqual(self.fired, [])
+        self.advance(0.2)
+        self.assertEqual(self.fired, [30])
+        self.advance(3600)
+        self.assertEqual(self.fired, [30, 700, 3600])
+        self.advance(86400)
+        self.assertEqual(self.fired, [30, 700, 3600, 86400])
+
+    def test_cancel_removes_job(self):
+        job = self.scheduler.call_later(1, self.record, "cancelled")
+        self.scheduler.call_later(1, self.record, "kept")
+        job.cancel()
+        self.assertTrue(job.cancelled())
+        self.advance(2)
+        self.assertEqual(self.fired, ["kept"])
+
+    def test_cancelled_jobs_are_not_pending(self):
+        jobs = [self.scheduler.call_later(5, self.record, i) for i in range(10)]
+        self.assertEqual(self.scheduler.pending_jobs(), 10)
+        for job in jobs[:7]:
+            job.cancel()
+        self.assertEqual(self.scheduler.pending_jobs(), 3)
+
+    def test_bucket_heap_is_compacted(self):
+        # churn through many distinct buckets, cancelling each job
+        for i in range(10000):
+            self.scheduler.call_later(1 + i * 0.01, self.record, i).cancel()
+        self.scheduler.call_later(1, self.record, "live")
+        self.assertEqual(self.scheduler.pending_jobs(), 1)
+        self.assertLessEqual(
+            len(self.scheduler.bucket_queue),
+            2 * self.scheduler.bucket_queue.COMPACT_MIN_SIZE,
+        )
+        self.advance(2)
+        self.assertEqual(self.fired, ["live"])
+
+    def test_many_pending_timers(self):
+        jobs = [
+            self.scheduler.call_later(i % 500, self.record, i) for i in range(100000)
+        ]
+        for job in jobs[::2]:
+            job.cancel()
+        self.advance(600)
+        self.assertEqual(len(self.fired), 50000)
+        self.assertTrue(all(value % 2 for value in self.fired))
+
+    def test_run_wakes_for_earlier_job(self):
+        scheduler = TimerScheduler(self.logger)
+        thread = eventlet.spawn(scheduler.run)
+        try:
+            scheduler.call_later(60, self.record, "late")
+            eventlet.sleep(0.05)
+            scheduler.call_later(0.05, self.record, "early")
+            eventlet.sleep(0.2)
+            self.assertEqual(self.fired, ["early"])
+        finally:
+            thread.kill()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Unittests for chewie/state_machines/transition_table.py"""
+
+# pylint: disable=missing-docstring
+
+import itertools
+import random
+import unittest
+
+from transitions import Machine
+
+from chewie.state_machines.eap_state_machine import FullEAPStateMachine
+from chewie.state_machines.mab_state_machine import MacAuthenticationBypassStateMachine
+from chewie.state_machines.transition_table import TransitionTable
+
+
+class PredicateModel:
+    """Model whose predicates return preset values and whose on_enter callbacks are logged"""
+
+    def __init__(self, predicates, callbacks):
+        self.values = {}
+        self.entered = []
+        for name in predicates:
+            setattr(self, name, self.predicate(name))
+        for name in callbacks:
+            setattr(self, name, self.callback(name))
+
+    def predicate(self, name):
+        return lambda: self.values[name]
+
+    def callback(self, name):
+        return lambda: self.entered.append(name)
+
+
+def names(state_machine_class):
+    predicates = set()
+    for transition in state_machine_class.TRANSITIONS:
+        predicates.update(transition.get("conditions", []))
+        predicates.update(transition.get("unless", []))
+    callbacks = set(
+        itertools.chain.from_iterable(
+            state.on_enter for state in state_machine_class.STATES
+        )
+    )
+    return sorted(predicates), sorted(callbacks)
+
+
+class TransitionTableTestCase(unittest.TestCase):
+    def check_matches_transitions(self, state_machine_class):
+        """Every state, with random predicate values, behaves as transitions.Machine"""
+        predicates, callbacks = names(state_machine_class)
+        table = TransitionTable(
+            state_machine_class.STATES, state_machine_class.TRANSITIONS
+        )
+        expected_model = PredicateModel(predicates, callbacks)
+        model = PredicateModel(predicates, callbacks)
+        Machine(
+            model=expected_model,
+            states=state_machine_class.STATES,
+            transitions=state_machine_class.TRANSITIONS,
+            queued=True,
+            initial=state_machine_class.INITIAL_STATE,
+        )
+        rand = random.Random(4137)
+        for state in state_machine_class.STATES:
+            for _ in range(50):
+                values = {
+                    name: rand.choice([True, False, None, 0, 1]) for name in predicates
+                }
+                expected_model.values = model.values = values
+                expected_model.state = model.state = state.name
+                expected_model.entered = []
+                model.entered = []
+
+                expected_model.process()
+                table.process(model)
+                self.assertEqual(model.state, expected_model.state)
+                self.assertEqual(model.entered, expected_model.entered)
+
+    def test_full_eap_matches_transitions(self):
+        self.check_matches_transitions(FullEAPStateMachine)
+
+    def test_mab_matches_transitions(self):
+        self.check_matches_transitions(MacAuthenticationBypassStateMachine)
+
+    def test_table_is_shared(self):
+        self.assertIs(
+            FullEAPStateMachine.transition_table(),
+            FullEAPStateMachine.transition_table(),
+        )
+        self.assertIsNot(
+            FullEAPStateMachine.transition_table(),
+            MacAuthenticationBypassStateMachine.transition_table(),
+        )
+
+    def test_no_candidate_returns_false(self):
+        table = FullEAPStateMachine.transition_table()
+        model = PredicateModel(*names(FullEAPStateMachine))
+        model.values = {
+            "is_port_enabled": True,
+            "is_eap_restart": False,
+            "is_logoff": False,
+        }
+        model.state = FullEAPStateMachine.SUCCESS
+        self.assertFalse(table.process(model))
+        self.assertEqual(model.state, FullEAPStateMachine.SUCCESS)
+
+
+if __name__ == "__main__":
+    unittest.main()